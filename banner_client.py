@@ -0,0 +1,290 @@
+import os
+import sys
+import time
+import logging
+import itertools
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+import grpc
+
+# Add the root project directory to PYTHONPATH
+sys.path.append(os.path.join(os.path.dirname(__file__), "generated"))
+
+from generated import banner_service_pb2, banner_service_pb2_grpc
+from banner_metadata import VALID_FOR_METADATA
+
+
+DEFAULT_TARGET = "localhost:51234"
+
+
+class Banner:
+    """
+    A banner as shown to a user, with its image bytes.
+
+    Attributes:
+        title (str): The banner title.
+        description (str): The banner description.
+        image (bytes): The image bytes, empty if the banner has no image.
+        image_format (str): The format of the image, e.g. "png".
+        etag (str): Content hash of the image, empty if the banner has no image.
+        variant (str): Id of the experiment variant shown, empty if the banner has no variants.
+    """
+
+    __slots__ = ("title", "description", "image", "image_format", "etag", "variant")
+
+    def __init__(self, title: str, description: str, image: bytes, image_format: str, etag: str, variant: str):
+        self.title = title
+        self.description = description
+        self.image = image
+        self.image_format = image_format
+        self.etag = etag
+        self.variant = variant
+
+    def __repr__(self) -> str:
+        return f"Banner(title={self.title!r}, variant={self.variant!r}, image_size={len(self.image)})"
+
+
+class _Entry:
+    """
+    A cached banner. It is served until `expires_at` and refreshed in the background from
+    `refresh_at` on. Both are `time.monotonic()` values.
+    """
+
+    __slots__ = ("banner", "refresh_at", "expires_at")
+
+    def __init__(self, banner: Banner, refresh_at: float, expires_at: float):
+        self.banner = banner
+        self.refresh_at = refresh_at
+        self.expires_at = expires_at
+
+
+class BannerClient:
+    """
+    Client for the banner service with a local cache of the banners of each location.
+
+    Banners are fetched with GetCurrentBanner and cached for as long as the server says the
+    selection holds (the "banner-valid-for-ms" trailing metadata), at most `max_ttl` seconds.
+    The cap bounds how long a config reload on the server goes unnoticed; entries cached for
+    the full cap are refreshed in the background once `refresh_ahead` of it is left, so callers
+    do not wait for the refresh. Entries that expire at a known selection change are fetched
+    again when they expire, as refreshing them early would fetch the same banner.
+
+    Concurrent fetches of the same banner are coalesced into one RPC, and images are fetched
+    by reference and cached by content hash, so a banner change that keeps its image does not
+    transfer the image again. If the server cannot be reached, expired banners are served for
+    up to `stale_if_error` seconds more.
+
+    Channels are created once and shared by all calls, round-robin over `channels` channels;
+    each is a separate HTTP/2 connection. The client is thread-safe.
+
+    Attributes:
+        max_ttl (float): Longest time in seconds a banner is cached.
+        refresh_ahead (float): Fraction of `max_ttl` left when a background refresh starts.
+        timeout (float): Deadline in seconds of each RPC.
+        stale_if_error (float): Seconds past expiry a banner is served if refreshing it fails.
+        stats (Counter): Approximate counts of "hits", "misses", "coalesced", "refreshes",
+            "stale" and "errors", and of "image_hits" and "image_misses".
+    """
+
+    def __init__(
+        self,
+        target: str = DEFAULT_TARGET,
+        channels: int = 1,
+        max_ttl: float = 60.0,
+        refresh_ahead: float = 0.2,
+        timeout: float = 1.0,
+        stale_if_error: float = 300.0,
+        max_entries: int = 10000,
+        image_cache_bytes: int = 16 * 1024 * 1024,
+        accept_formats: Sequence[str] = (),
+        max_width: int = 0,
+        workers: int = 2,
+        options: Sequence[Tuple[str, object]] = ()
+    ):
+        """
+        Args:
+            target (str): Address of the banner service.
+            channels (int): Number of channels (connections) to spread calls over.
+            max_ttl (float): Longest time in seconds a banner is cached.
+            refresh_ahead (float): Fraction of `max_ttl` left when a background refresh starts.
+            timeout (float): Deadline in seconds of each RPC.
+            stale_if_error (float): Seconds past expiry a banner is served if refreshing it fails.
+            max_entries (int): Most banners cached, one per location and user id.
+            image_cache_bytes (int): Byte budget for cached images.
+            accept_formats (Sequence[str]): Image formats the client can display, see
+                GetCurrentBannerRequest.accept_formats.
+            max_width (int): Widest image the client displays in pixels, 0 for no limit.
+            workers (int): Threads for background refreshes.
+            options (Sequence[Tuple[str, object]]): Additional gRPC channel options.
+
+        Raises:
+            ValueError: If `channels` is not positive or `refresh_ahead` is not in [0, 1).
+        """
+        if channels < 1:
+            raise ValueError(f"channels must be positive, got {channels}.")
+        if not 0.0 <= refresh_ahead < 1.0:
+            raise ValueError(f"refresh_ahead must be in [0, 1), got {refresh_ahead}.")
+        self.max_ttl = max_ttl
+        self.refresh_ahead = refresh_ahead
+        self.timeout = timeout
+        self.stale_if_error = stale_if_error
+        self.max_entries = max_entries
+        self.image_cache_bytes = image_cache_bytes
+        self.accept_formats = list(accept_formats)
+        self.max_width = max_width
+        self.stats: Counter = Counter()
+        # Distinct channel ids keep gRPC from sharing one connection between the channels
+        self._channels = [
+            grpc.insecure_channel(target, options=[("grpc.channel_id", index), *options])
+            for index in range(channels)
+        ]
+        self._stubs = [banner_service_pb2_grpc.BannerServiceStub(channel) for channel in self._channels]
+        self._next_stub = itertools.count()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()
+        self._image_size = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="banner-client")
+
+    def get_banner(self, location: str, user_id: str = "") -> Banner:
+        """
+        Return the current banner for a location, from the cache if it is still valid.
+
+        Args:
+            location (str): The location.
+            user_id (str): Stable user or session id for experiment variant assignment.
+                Banners are cached per location and user id.
+
+        Returns:
+            Banner: The banner.
+
+        Raises:
+            grpc.RpcError: If the banner is not cached and fetching it fails.
+        """
+        key = (location, user_id)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.expires_at:
+            self.stats["hits"] += 1
+            if now >= entry.refresh_at:
+                self._load(key, background=True)
+            return entry.banner
+
+        self.stats["misses"] += 1
+        try:
+            return self._load(key, background=False).result()
+        except grpc.RpcError:
+            if entry is not None and now < entry.expires_at + self.stale_if_error:
+                self.stats["stale"] += 1
+                return entry.banner
+            raise
+
+    def invalidate(self, location: Optional[str] = None) -> None:
+        """
+        Drop the cached banners of a location, or of all locations.
+        """
+        with self._lock:
+            if location is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == location]:
+                    del self._entries[key]
+
+    def close(self) -> None:
+        """
+        Stop background refreshes and close the channels.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        for channel in self._channels:
+            channel.close()
+
+    def __enter__(self) -> "BannerClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _load(self, key: Tuple[str, str], background: bool) -> Future:
+        # Only the first caller for a key fetches; later ones wait on its future
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                if not background:
+                    self.stats["coalesced"] += 1
+                return future
+            future = self._inflight[key] = Future()
+        if background:
+            self.stats["refreshes"] += 1
+            self._executor.submit(self._complete, key, future)
+        else:
+            self._complete(key, future)
+        return future
+
+    def _complete(self, key: Tuple[str, str], future: Future) -> None:
+        try:
+            entry = self._fetch(*key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.warning(f"Error fetching the banner for location {key[0]!r}: {e}")
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            del self._inflight[key]
+        future.set_result(entry.banner)
+
+    def _fetch(self, location: str, user_id: str) -> _Entry:
+        stub = self._stubs[next(self._next_stub) % len(self._stubs)]
+        request = banner_service_pb2.GetCurrentBannerRequest(
+            location=location,
+            user_id=user_id,
+            image_by_reference=True,
+            accept_formats=self.accept_formats,
+            max_width=self.max_width
+        )
+        # The server's hint counts from when it answered, so expiry is measured from the request
+        started = time.monotonic()
+        response, call = stub.GetCurrentBanner.with_call(request, timeout=self.timeout)
+        ttl = self.max_ttl
+        for name, value in call.trailing_metadata() or ():
+            if name == VALID_FOR_METADATA:
+                ttl = min(ttl, int(value) / 1000)
+        image = self._image(stub, response.etag) if response.etag else b""
+
+        banner = Banner(
+            response.title, response.description, image, response.image_format, response.etag, response.variant
+        )
+        expires_at = started + ttl
+        # Refreshing before a known change would fetch the same banner, and ever shorter hints
+        refresh_at = expires_at - self.refresh_ahead * ttl if ttl >= self.max_ttl else expires_at
+        return _Entry(banner, refresh_at, expires_at)
+
+    def _image(self, stub: banner_service_pb2_grpc.BannerServiceStub, etag: str) -> bytes:
+        with self._lock:
+            image = self._images.get(etag)
+            if image is not None:
+                self._images.move_to_end(etag)
+                self.stats["image_hits"] += 1
+                return image
+
+        self.stats["image_misses"] += 1
+        chunks = stub.GetBannerImage(banner_service_pb2.GetBannerImageRequest(image_id=etag), timeout=self.timeout)
+        image = b"".join(chunk.data for chunk in chunks)
+        if len(image) <= self.image_cache_bytes:
+            with self._lock:
+                if etag not in self._images:
+                    self._images[etag] = image
+                    self._image_size += len(image)
+                while self._image_size > self.image_cache_bytes:
+                    _, evicted = self._images.popitem(last=False)
+                    self._image_size -= len(evicted)
+        return image
@@ -0,0 +1,68 @@
+import grpc
+from typing import Dict
+
+
+ALGORITHMS: Dict[str, grpc.Compression] = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+class CompressionPolicy:
+    """
+    Decides per response whether it is worth compressing.
+
+    Banner images are PNGs, already compressed, so compressing them again costs CPU without
+    saving bytes. A response is compressed only if its compressible part, everything but the
+    image bytes, reaches `min_size` and makes up at least `min_compressible_ratio` of it.
+    Small text-only responses and image-heavy responses are sent uncompressed.
+
+    Attributes:
+        algorithm (grpc.Compression): The compression algorithm, or NoCompression to disable.
+        min_size (int): Minimum compressible bytes for a response to be compressed.
+        min_compressible_ratio (float): Minimum share of compressible bytes in the response.
+    """
+
+    def __init__(self, algorithm: str = "none", min_size: int = 1024, min_compressible_ratio: float = 0.5):
+        """
+        Args:
+            algorithm (str): One of "none", "gzip" or "deflate".
+            min_size (int): Minimum compressible bytes for a response to be compressed.
+            min_compressible_ratio (float): Minimum share of compressible bytes in the response.
+
+        Raises:
+            ValueError: If the algorithm is unknown.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown compression algorithm {algorithm!r}, expected one of {sorted(ALGORITHMS)}")
+        self.algorithm = ALGORITHMS[algorithm]
+        self.min_size = min_size
+        self.min_compressible_ratio = min_compressible_ratio
+
+    def should_compress(self, size: int, incompressible: int = 0) -> bool:
+        """
+        Return whether a response should be compressed.
+
+        Args:
+            size (int): Serialized size of the response in bytes.
+            incompressible (int): Bytes of already compressed data in it, e.g. image bytes.
+        """
+        compressible = size - incompressible
+        return (
+            self.algorithm != grpc.Compression.NoCompression
+            and compressible >= self.min_size
+            and compressible >= self.min_compressible_ratio * size
+        )
+
+    def apply(self, context, size: int, incompressible: int = 0) -> None:
+        """
+        Enable compression for the call's response if the policy says it pays off.
+
+        Args:
+            context: The gRPC servicer context, sync or asyncio.
+            size (int): Serialized size of the response in bytes.
+            incompressible (int): Bytes of already compressed data in it.
+        """
+        if context is not None and self.should_compress(size, incompressible):
+            context.set_compression(self.algorithm)
@@ -1,36 +1,499 @@
 import os
+import sys
 import json
-from datetime import datetime
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import accumulate
 import logging
-from typing import List, Optional
+from typing import Callable, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+_WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+_CRON_WEEKDAYS = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+_CRON_MONTHS = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+
+# Inputs with fewer configs than this are loaded sequentially; a pool would only add overhead
+_PARALLEL_MIN_ITEMS = 512
+_MIN_BATCH_SIZE = 128
+
+# Bounds the search for the next transition of a condition; past it, the caller just re-evaluates.
+_MAX_TRANSITION_STEPS = 4096
+
+
+class _Term:
+    """
+    One compiled clause of a special condition, evaluated in its own timezone.
+
+    `matches` decides the clause for a local time. `boundary` returns the next local time at
+    which the clause could change its value, which lets the transition search skip whole hours
+    or days instead of stepping minute by minute.
+    """
+
+    __slots__ = ("matches", "boundary", "tz")
+
+    def __init__(self, matches: Callable[[datetime], bool], boundary: Callable[[datetime], datetime], tz: timezone):
+        self.matches = matches
+        self.boundary = boundary
+        self.tz = tz
+
+
+class Condition:
+    """
+    A special condition compiled into a predicate over the current time.
+
+    Conditions are immutable and shared between banners using the same expression.
+
+    Attributes:
+        expression (str): The special condition as written in the config.
+    """
+
+    __slots__ = ("expression", "_terms")
+
+    def __init__(self, expression: str, terms: Tuple[_Term, ...]):
+        self.expression = expression
+        self._terms = terms
+
+    def __call__(self, current_time: datetime) -> bool:
+        """
+        Return whether the condition holds at the given (timezone-aware) time.
+        """
+        return all(term.matches(current_time.astimezone(term.tz)) for term in self._terms)
+
+    def next_transition(self, current_time: datetime) -> datetime:
+        """
+        Return the earliest time after `current_time` at which the condition may change value.
+
+        The result is exact unless the search hits its step limit, in which case the returned
+        time is still safe: the condition does not change before it.
+
+        Args:
+            current_time (datetime): The (timezone-aware) time to search from.
+
+        Returns:
+            datetime: The next transition time, in UTC.
+        """
+        value = self(current_time)
+        candidate = current_time.astimezone(timezone.utc)
+        for _ in range(_MAX_TRANSITION_STEPS):
+            candidate = min(self._next_boundary(term, candidate) for term in self._terms)
+            if self(candidate) != value:
+                break
+        return candidate
+
+    @staticmethod
+    def _next_boundary(term: _Term, current_time: datetime) -> datetime:
+        boundary = term.boundary(current_time.astimezone(term.tz)).astimezone(timezone.utc)
+        if boundary <= current_time:  # Guard against wall-clock oddities around DST changes
+            boundary = _next_minute(current_time)
+        return boundary
+
+    def __eq__(self, other):
+        return isinstance(other, Condition) and other.expression == self.expression
+
+    def __hash__(self):
+        return hash(self.expression)
+
+    def __repr__(self):
+        return f"Condition({self.expression!r})"
+
+
+def _next_minute(local_time: datetime) -> datetime:
+    return local_time.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+
+def _next_hour(local_time: datetime) -> datetime:
+    return local_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+
+def _next_day(local_time: datetime) -> datetime:
+    return local_time.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+
+def _parse_values(spec: str, low: int, high: int, names: Optional[dict] = None, wrap: bool = False) -> FrozenSet[int]:
+    """
+    Parse a comma-separated list of values, ranges ("a-b") and steps ("*/n", "a-b/n").
+    With `wrap`, a range whose end is below its start wraps around (e.g. hours "22-2").
+    """
+    def value(token: str) -> int:
+        token = token.strip().lower()
+        number = names[token] if names and token in names else int(token)
+        if not low <= number <= high:
+            raise ValueError(f"value {number} out of range {low}-{high}")
+        return number
+
+    values = set()
+    for part in spec.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise ValueError(f"invalid step in {spec!r}")
+        if part.strip() == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (value(token) for token in part.split("-", 1))
+        else:
+            start = end = value(part)
+        if end < start:
+            if not wrap:
+                raise ValueError(f"invalid range in {spec!r}")
+            span = list(range(start, high + 1)) + list(range(low, end + 1))
+        else:
+            span = list(range(start, end + 1))
+        values.update(span[::step])
+    return frozenset(values)
+
+
+def _minute_term(modulus: int, remainder: int, tz: timezone) -> _Term:
+    if modulus < 1 or not 0 <= remainder < modulus:
+        raise ValueError(f"invalid minute modulus {modulus}:{remainder}")
+    return _Term(lambda t: t.minute % modulus == remainder, _next_minute, tz)
+
+
+def _cron_term(spec: str, tz: timezone) -> _Term:
+    fields = spec.split()
+    if len(fields) != 5:
+        raise ValueError(f"cron expression needs 5 fields, got {len(fields)}")
+    minutes = _parse_values(fields[0], 0, 59)
+    hours = _parse_values(fields[1], 0, 23)
+    days = _parse_values(fields[2], 1, 31)
+    months = _parse_values(fields[3], 1, 12, _CRON_MONTHS)
+    weekdays = frozenset(day % 7 for day in _parse_values(fields[4], 0, 7, _CRON_WEEKDAYS))
+    # As in cron, a restricted day-of-month and day-of-week match if either of them matches
+    any_day = fields[2] != "*" and fields[4] != "*"
+
+    def day_matches(t: datetime) -> bool:
+        if t.month not in months:
+            return False
+        day, weekday = t.day in days, (t.weekday() + 1) % 7 in weekdays
+        return day or weekday if any_day else day and weekday
+
+    def matches(t: datetime) -> bool:
+        return t.minute in minutes and t.hour in hours and day_matches(t)
+
+    def boundary(t: datetime) -> datetime:
+        if not day_matches(t):
+            return _next_day(t)
+        if t.hour not in hours:
+            return _next_hour(t)
+        return _next_minute(t)
+
+    return _Term(matches, boundary, tz)
+
+
+def _compile_term(clause: str) -> _Term:
+    clause, _, zone = clause.partition("@")
+    try:
+        tz = ZoneInfo(zone.strip()) if zone.strip() else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"unknown timezone {zone.strip()!r}") from e
+
+    kind, _, spec = clause.strip().partition(":")
+    match kind:
+        case "odd-minutes" if not spec:
+            return _minute_term(2, 1, tz)
+        case "even-minutes" if not spec:
+            return _minute_term(2, 0, tz)
+        case "minute-mod":
+            modulus, _, remainder = spec.partition(":")
+            return _minute_term(int(modulus), int(remainder or 0), tz)
+        case "hours":
+            hours = _parse_values(spec, 0, 23, wrap=True)
+            return _Term(lambda t: t.hour in hours, _next_hour, tz)
+        case "days":
+            weekdays = _parse_values(spec, 0, 6, _WEEKDAYS, wrap=True)
+            return _Term(lambda t: t.weekday() in weekdays, _next_day, tz)
+        case "cron":
+            return _cron_term(spec, tz)
+        case _:
+            raise ValueError(f"unrecognized condition {clause.strip()!r}")
+
+
+@lru_cache(maxsize=None)
+def compile_condition(expression: str) -> Condition:
+    """
+    Compile a special condition into a Condition.
+
+    An expression is one or more clauses joined with "&", all of which must hold. Each clause
+    may end with "@<IANA timezone>" to be evaluated in that timezone (UTC by default):
+
+        odd-minutes / even-minutes   minute of the hour is odd / even
+        minute-mod:N:R               minute of the hour modulo N equals R
+        hours:9-17                   hour of the day, inclusive ranges and lists ("22-2" wraps)
+        days:mon-fri                 day of the week, names or 0 (Monday) to 6 (Sunday)
+        cron:*/15 9-17 * * 1-5       standard 5-field cron schedule, matching whole minutes
+
+    Example: "hours:9-17 & days:mon-fri @Europe/Berlin" matches Berlin office hours.
+
+    Args:
+        expression (str): The special condition from the config.
+
+    Returns:
+        Condition: The compiled condition. Equal expressions share one instance.
+
+    Raises:
+        ValueError: If the expression is invalid.
+    """
+    if not isinstance(expression, str):
+        raise ValueError(f"special condition must be a string, got {expression!r}")
+    if not expression.strip():
+        raise ValueError("empty special condition")
+    try:
+        terms = tuple(_compile_term(clause) for clause in expression.split("&"))
+    except ValueError as e:
+        raise ValueError(f"Invalid special condition {expression!r}: {e}") from e
+    return Condition(expression, terms)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def parse_timestamp(value: str) -> int:
+    """
+    Parse an ISO 8601 timestamp into microseconds since the Unix epoch. Times without an
+    offset are taken as UTC.
+
+    Raises:
+        ValueError: If the value is not a valid ISO 8601 timestamp.
+    """
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError) as e:
+        raise ValueError(f"Invalid datetime format {value!r}: {e}") from e
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - _EPOCH) // _MICROSECOND
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check_text(name: str, value, allow_empty: bool = True) -> None:
+    if not isinstance(value, str) or not (allow_empty or value):
+        raise ValueError(f"{name} must be a {'' if allow_empty else 'non-empty '}string, got {value!r}")
+
+
+def _from_timestamp(epoch_us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=epoch_us)
+
+
+class BannerVariant:
+    """
+    One variant of a banner experiment, shown to a share of users given by its weight.
+
+    Attributes:
+        id (str): Identifier of the variant, unique within its banner.
+        title (str): Title shown for the variant.
+        description (str): Description shown for the variant.
+        image_id (str): Id of the image in the content directory.
+        weight (int): Share of users assigned to the variant, relative to the other variants.
+    """
+
+    __slots__ = ("id", "title", "description", "image_id", "weight")
+
+    def __init__(self, id: str, title: str, description: str, image_id: str, weight: int):
+        _check_text("variant id", id, allow_empty=False)
+        _check_text(f"title of variant {id!r}", title)
+        _check_text(f"description of variant {id!r}", description)
+        _check_text(f"image of variant {id!r}", image_id, allow_empty=False)
+        if not (_is_int(weight) and weight > 0):
+            raise ValueError(f"weight of variant {id!r} must be a positive integer, got {weight!r}")
+        init = object.__setattr__
+        init(self, "id", id)
+        init(self, "title", title)
+        init(self, "description", description)
+        init(self, "image_id", image_id)
+        init(self, "weight", weight)
+
+    @classmethod
+    def parse(cls, config: Mapping, banner_id: str, title: str, description: str) -> "BannerVariant":
+        """
+        Build a variant from its config, taking title, description and image from the banner
+        where the variant does not override them.
+
+        Raises:
+            ValueError: If the variant config is invalid.
+        """
+        if not isinstance(config, Mapping) or "id" not in config or "weight" not in config:
+            raise ValueError(f"variants must be objects with an id and a weight, got {config!r}")
+        return cls(
+            config["id"], config.get("title", title), config.get("description", description),
+            config.get("image", banner_id), config["weight"]
+        )
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"BannerVariant is immutable; cannot set {name!r}")
+
+    def __reduce__(self):
+        return BannerVariant, (self.id, self.title, self.description, self.image_id, self.weight)
+
+    def __repr__(self):
+        return f"BannerVariant(id={self.id}, weight={self.weight})"
 
 
 class BannerConfig:
     """
-    Represents a single banner configuration.
+    Represents a single, immutable banner configuration.
+
+    Times are held as integer microseconds since the Unix epoch and location codes are
+    interned, so large numbers of configs stay compact and share their strings.
 
     Attributes:
         id (str): Unique identifier for the banner.
         title (str): Title of the banner.
         description (str): Description of the banner.
+        start_us (int): Start time of the banner in microseconds since the Unix epoch.
+        end_us (int): End time of the banner in microseconds since the Unix epoch.
         start_time (datetime): Start time of the banner (parsed from ISO 8601 format).
         end_time (datetime): End time of the banner (parsed from ISO 8601 format).
-        locations (List[str]): List of locations where the banner is displayed.
+        locations (Tuple[str, ...]): Locations where the banner is displayed.
+        special_condition (Optional[str]): Optional schedule restricting when the banner is shown.
+        condition (Optional[Condition]): The compiled special condition, if any.
+        priority (int): Banners with a higher priority win over other matching banners. Defaults to 0.
+        weight (Optional[int]): Share of the rotation among matching banners of the same priority
+            that also have a weight. Banners without a weight are never rotated.
+        variants (Tuple[BannerVariant, ...]): Experiment variants; empty if the banner has none.
+        variant_weights (Tuple[int, ...]): Running totals of the variant weights, for assignment.
     """
 
-    def __init__(self, id: str, title: str, description: str, start_time: str, end_time: str, locations: List[str], special_condition: Optional[str] = None):
-        self.id = id
-        self.title = title
-        self.description = description
-        self.start_time = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-        self.end_time = datetime.fromisoformat(end_time.replace("Z", "+00:00"))
-        self.locations = locations
-        self.special_condition = special_condition
+    __slots__ = (
+        "id", "title", "description", "start_us", "end_us", "locations", "special_condition", "condition",
+        "priority", "weight", "variants", "variant_weights"
+    )
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        description: str,
+        start_time: str,
+        end_time: str,
+        locations: List[str],
+        special_condition: Optional[str] = None,
+        priority: int = 0,
+        weight: Optional[int] = None,
+        variants: Optional[Sequence[Mapping]] = None
+    ):
+        if variants is not None and not isinstance(variants, list):
+            raise ValueError(f"variants must be a list, got {variants!r}")
+        self._init(
+            id, title, description, parse_timestamp(start_time), parse_timestamp(end_time), locations,
+            special_condition, priority, weight,
+            [BannerVariant.parse(variant, id, title, description) for variant in variants or ()]
+        )
+
+    @classmethod
+    def from_fields(
+        cls,
+        id: str,
+        title: str,
+        description: str,
+        start_us: int,
+        end_us: int,
+        locations: Iterable[str],
+        special_condition: Optional[str] = None,
+        priority: int = 0,
+        weight: Optional[int] = None,
+        variants: Sequence[BannerVariant] = ()
+    ) -> "BannerConfig":
+        """
+        Create a BannerConfig from already parsed fields, e.g. read from a compiled snapshot.
+        """
+        config = cls.__new__(cls)
+        config._init(id, title, description, start_us, end_us, locations, special_condition, priority, weight, variants)
+        return config
+
+    def _init(
+        self, id, title, description, start_us, end_us, locations, special_condition, priority, weight, variants
+    ) -> None:
+        _check_text("id", id, allow_empty=False)
+        _check_text("title", title)
+        _check_text("description", description)
+        if isinstance(locations, str) or not all(isinstance(location, str) for location in locations):
+            raise ValueError(f"locations must be a list of strings, got {locations!r}")
+        if special_condition is not None:
+            _check_text("special_condition", special_condition)
+        if len({variant.id for variant in variants}) != len(variants):
+            raise ValueError(f"variant ids must be unique, got {[variant.id for variant in variants]}")
+        if not _is_int(priority):
+            raise ValueError(f"priority must be an integer, got {priority!r}")
+        if weight is not None and not (_is_int(weight) and weight > 0):
+            raise ValueError(f"weight must be a positive integer, got {weight!r}")
+        init = object.__setattr__
+        init(self, "id", id)
+        init(self, "title", title)
+        init(self, "description", description)
+        init(self, "start_us", start_us)
+        init(self, "end_us", end_us)
+        init(self, "locations", tuple(sys.intern(location) for location in locations))
+        init(self, "special_condition", special_condition)
+        init(self, "condition", compile_condition(special_condition) if special_condition else None)
+        init(self, "priority", priority)
+        init(self, "weight", weight)
+        init(self, "variants", tuple(variants))
+        init(self, "variant_weights", tuple(accumulate(variant.weight for variant in variants)))
+
+    @property
+    def start_time(self) -> datetime:
+        return _from_timestamp(self.start_us)
+
+    @property
+    def end_time(self) -> datetime:
+        return _from_timestamp(self.end_us)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"BannerConfig is immutable; cannot set {name!r}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"BannerConfig is immutable; cannot delete {name!r}")
+
+    def __reduce__(self):
+        return BannerConfig.from_fields, (
+            self.id, self.title, self.description, self.start_us, self.end_us, self.locations, self.special_condition,
+            self.priority, self.weight, self.variants
+        )
 
     def __repr__(self):
         return f"BannerConfig(id={self.id}, title={self.title}, start_time={self.start_time}, end_time={self.end_time})"
 
 
+_REQUIRED_KEYS = frozenset({"id", "title", "description", "start_time", "end_time", "locations"})
+
+
+def parse_config(config: dict) -> Optional[BannerConfig]:
+    """
+    Validates a configuration dictionary and builds its BannerConfig, parsing every field once.
+
+    Args:
+        config (dict): The configuration dictionary.
+
+    Returns:
+        Optional[BannerConfig]: The BannerConfig, or None if the configuration is invalid.
+    """
+    if not isinstance(config, dict):
+        logging.error("Invalid config: Expected a JSON object.")
+        return None
+    if not config.keys() >= _REQUIRED_KEYS:
+        logging.error(f"Invalid config: Missing keys. Found keys: {config.keys()}")
+        return None
+    try:
+        return BannerConfig(
+            config["id"], config["title"], config["description"], config["start_time"], config["end_time"],
+            config["locations"], config.get("special_condition"), config.get("priority", 0), config.get("weight"),
+            config.get("variants")
+        )
+    except (TypeError, ValueError) as e:
+        logging.error(f"Invalid config: {e}")
+        return None
+
+
 def validate_config(config: dict) -> bool:
     """
     Validates the given configuration dictionary.
@@ -41,50 +504,167 @@ def validate_config(config: dict) -> bool:
     Returns:
         bool: True if the configuration is valid, False otherwise.
     """
-    required_keys = {"id", "title", "description", "start_time", "end_time", "locations"}
-    if not all(key in config for key in required_keys):
-        logging.error(f"Invalid config: Missing keys. Found keys: {config.keys()}")
-        return False
+    return parse_config(config) is not None
+
+
+def load_config_file(file_path: str) -> Optional[BannerConfig]:
+    """
+    Loads and validates a single banner configuration file.
+
+    Args:
+        file_path (str): Path to the JSON configuration file.
+
+    Returns:
+        Optional[BannerConfig]: The validated BannerConfig, or None if the file is invalid or
+            unreadable, or loading it failed in any other way.
+    """
+    filename = os.path.basename(file_path)
     try:
-        # Validate ISO 8601 datetime format
-        datetime.fromisoformat(config["start_time"].replace("Z", "+00:00"))
-        datetime.fromisoformat(config["end_time"].replace("Z", "+00:00"))
-    except ValueError as e:
-        logging.error(f"Invalid datetime format in config: {e}")
-        return False
-    return True
+        with open(file_path, "rb") as file:
+            config = parse_config(json.loads(file.read()))
+            if config is not None:
+                return config
+            logging.warning(f"Skipping invalid config file: {filename}")
+    except (json.JSONDecodeError, UnicodeDecodeError, IOError) as e:
+        logging.error(f"Error reading file {filename}: {e}")
+    except Exception as e:
+        # Confined to this file, so the rest of the load goes on
+        logging.error(f"Unexpected error loading file {filename}: {e!r}")
+    return None
+
+
+def list_config_files(config_dir: str) -> List[str]:
+    """
+    Return the paths of the JSON config files in a directory, sorted by file name.
+    """
+    with os.scandir(config_dir) as entries:
+        return sorted(entry.path for entry in entries if entry.name.endswith(".json") and entry.is_file())
+
+
+def _load_file_batch(paths: Sequence[str]) -> List[Optional[BannerConfig]]:
+    return [load_config_file(path) for path in paths]
+
+
+def _parse_line_batch(source: str, first_line: int, lines: Sequence[str]) -> List[Optional[BannerConfig]]:
+    configs = []
+    for number, line in enumerate(lines, start=first_line):
+        if not line.strip():
+            continue
+        try:
+            config = parse_config(json.loads(line))
+        except json.JSONDecodeError as e:
+            logging.error(f"Error reading {source} line {number}: {e}")
+            config = None
+        except Exception as e:
+            logging.error(f"Unexpected error loading {source} line {number}: {e!r}")
+            config = None
+        if config is None:
+            logging.warning(f"Skipping invalid config in {source} line {number}")
+        configs.append(config)
+    return configs
+
+
+def _map_batches(function: Callable, batches: List[tuple], workers: Optional[int]) -> Iterator[List[Optional[BannerConfig]]]:
+    """
+    Apply `function` to each batch of arguments and yield the results in batch order, as soon
+    as each batch is done. Batches run in a process pool so JSON parsing is not serialized by
+    the GIL; once the process has started threads, forking is unsafe and a thread pool is used.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(batches) <= 1:
+        yield from (function(*batch) for batch in batches)
+        return
+    if threading.active_count() == 1:
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="config-loader")
+    with executor:
+        yield from executor.map(function, *zip(*batches))
+
 
+def _batches(items: Sequence, workers: Optional[int]) -> List[Sequence]:
+    workers = workers or os.cpu_count() or 1
+    if len(items) < _PARALLEL_MIN_ITEMS:
+        return [items] if items else []
+    size = max(_MIN_BATCH_SIZE, -(-len(items) // (workers * 4)))
+    return [items[start:start + size] for start in range(0, len(items), size)]
 
-def load_configs(config_dir: str = "resources/configs") -> List[BannerConfig]:
+
+def load_config_files(paths: Sequence[str], workers: Optional[int] = None) -> List[Optional[BannerConfig]]:
+    """
+    Loads and validates many banner configuration files, in parallel for large numbers of files.
+
+    Args:
+        paths (Sequence[str]): Paths to the JSON configuration files.
+        workers (Optional[int]): Number of parallel workers. Defaults to the number of CPUs.
+
+    Returns:
+        List[Optional[BannerConfig]]: The config for each path, in order; None for invalid or unreadable files.
+    """
+    results = []
+    for configs in _map_batches(_load_file_batch, [(batch,) for batch in _batches(paths, workers)], workers):
+        results.extend(configs)
+    return results
+
+
+def iter_configs(source: str = "resources/configs", workers: Optional[int] = None) -> Iterator[BannerConfig]:
+    """
+    Yields the valid banner configurations from a config directory or an NDJSON bundle.
+
+    A directory is read as one JSON config per `*.json` file, in file name order. Any other
+    path is read as a bundle holding one JSON config per line. Large inputs are parsed in
+    parallel batches; configs are yielded in order as soon as their batch is parsed, and
+    invalid entries are logged and skipped without aborting the load.
+
+    Args:
+        source (str): Config directory or bundle file. Defaults to "resources/configs".
+        workers (Optional[int]): Number of parallel workers. Defaults to the number of CPUs.
+
+    Yields:
+        BannerConfig: The validated configs, in load order.
+    """
+    if os.path.isdir(source):
+        batches = [(batch,) for batch in _batches(list_config_files(source), workers)]
+        function = _load_file_batch
+    else:
+        with open(source, "r", encoding="utf-8") as bundle:
+            lines = bundle.read().splitlines()
+        function = _parse_line_batch
+        batches = []
+        first_line = 1
+        for batch in _batches(lines, workers):
+            batches.append((os.path.basename(source), first_line, batch))
+            first_line += len(batch)
+
+    for configs in _map_batches(function, batches, workers):
+        yield from (config for config in configs if config is not None)
+
+
+def load_configs(config_dir: str = "resources/configs", workers: Optional[int] = None) -> List[BannerConfig]:
     """
-    Loads all banner configurations from the specified directory.
+    Loads all banner configurations from the specified directory or NDJSON bundle.
 
     Args:
-        config_dir (str): Path to the directory containing configuration files. Defaults to "resources/configs".
+        config_dir (str): Path to the directory containing configuration files, or to a bundle
+            with one JSON config per line. Defaults to "resources/configs".
+        workers (Optional[int]): Number of parallel workers. Defaults to the number of CPUs.
 
     Returns:
         List[BannerConfig]: A list of validated BannerConfig objects.
     """
     logging.info("Loading banner configs.")
     
-    configs = []
     if not os.path.exists(config_dir):
         logging.error(f"Config directory {config_dir} does not exist.")
-        return configs
-
-    for filename in os.listdir(config_dir):
-        if filename.endswith(".json"):
-            file_path = os.path.join(config_dir, filename)
-            try:
-                with open(file_path, "r", encoding="utf-8") as file:
-                    config_data = json.load(file)
-                    if validate_config(config_data):
-                        configs.append(BannerConfig(**config_data))
-                    else:
-                        logging.warning(f"Skipping invalid config file: {filename}")
-            except (json.JSONDecodeError, IOError) as e:
-                logging.error(f"Error reading file {filename}: {e}")
+        return []
 
+    started = time.perf_counter()
+    try:
+        configs = list(iter_configs(config_dir, workers))
+    except OSError as e:
+        logging.error(f"Error loading configs from {config_dir}: {e}")
+        return []
+    logging.info(f"Loaded {len(configs)} banner configs in {(time.perf_counter() - started) * 1000:.1f} ms.")
     return configs
 
 
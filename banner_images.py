@@ -0,0 +1,276 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+
+# Signature used to detect on-disk changes: (mtime_ns, size), or None if the file is missing.
+FileSignature = Optional[Tuple[int, int]]
+
+
+def content_etag(data: bytes) -> str:
+    """
+    Return the content hash used as the ETag of an image.
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class _ImageEntry:
+    """
+    A cached image lookup. `data` is None for a negative (missing file) entry, and for the
+    record of an image too large to cache, which only keeps its hash. A known `etag` is not
+    computed again.
+    """
+
+    __slots__ = ("data", "etag", "signature", "checked_at")
+
+    def __init__(self, data: Optional[bytes], signature: FileSignature, checked_at: float, etag: Optional[str] = None):
+        self.data = data
+        if etag is None:
+            etag = content_etag(data) if data is not None else ""
+        self.etag = etag
+        self.signature = signature
+        self.checked_at = checked_at
+
+
+class ImageStore:
+    """
+    In-memory store for banner images, keyed by banner id.
+
+    Image bytes are read from disk once and served from memory afterwards. Entries are
+    revalidated against the file's mtime/size at most once per `revalidate_interval`
+    seconds, and the least recently used images are evicted once the cached bytes exceed
+    `max_bytes`. Missing images are cached as negative entries so repeated lookups for a
+    banner without content do not hit the filesystem on every request.
+
+    An image larger than `max_bytes` is read from disk on every `get`, but its hash and file
+    signature are kept, so `current_etag` answers for it from memory like for cached images.
+
+    Attributes:
+        content_dir (str): Directory containing the `{banner_id}.png` files.
+        max_bytes (int): Byte budget for cached image data.
+        revalidate_interval (float): Seconds between mtime/size checks of a cached entry.
+    """
+
+    def __init__(
+        self,
+        content_dir: str = "resources/content",
+        max_bytes: int = 64 * 1024 * 1024,
+        revalidate_interval: float = 1.0
+    ):
+        self.content_dir = content_dir
+        self.max_bytes = max_bytes
+        self.revalidate_interval = revalidate_interval
+        self._entries: "OrderedDict[str, _ImageEntry]" = OrderedDict()
+        self._by_etag: Dict[str, _ImageEntry] = {}
+        self._oversized: Dict[str, _ImageEntry] = {}  # banner id -> hash-only record
+        # Banner id of each banner's current image hash, kept after eviction to read it again
+        self._etag_ids: Dict[str, str] = {}
+        self._banner_etags: Dict[str, str] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total number of image bytes currently held in memory."""
+        return self._size
+
+    def path_for(self, banner_id: str) -> str:
+        return os.path.join(self.content_dir, f"{banner_id}.png")
+
+    def get(self, banner_id: str) -> Optional[bytes]:
+        """
+        Return the image bytes for a banner.
+
+        Args:
+            banner_id (str): The banner id.
+
+        Returns:
+            Optional[bytes]: The image data, or None if the banner has no image on disk.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(banner_id)
+        if entry is not None:
+            if now - entry.checked_at < self.revalidate_interval:
+                self._touch(banner_id)
+                return entry.data
+            if self._signature(self.path_for(banner_id)) == entry.signature:
+                entry.checked_at = now
+                self._touch(banner_id)
+                return entry.data
+        return self._load(banner_id, now).data
+
+    def current_etag(self, banner_id: str) -> str:
+        """
+        Return the content hash of a banner's current image, revalidated like `get`.
+
+        Unlike `get`, an image too large to cache is only read again if its file changed.
+
+        Args:
+            banner_id (str): The banner id.
+
+        Returns:
+            str: The content hash, or "" if the banner has no image on disk.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(banner_id) or self._oversized.get(banner_id)
+        if entry is not None:
+            if now - entry.checked_at < self.revalidate_interval:
+                return entry.etag
+            if self._signature(self.path_for(banner_id)) == entry.signature:
+                entry.checked_at = now
+                return entry.etag
+        return self._load(banner_id, now).etag
+
+    def etag(self, banner_id: str, data: bytes) -> str:
+        """
+        Return the ETag of image bytes previously returned by `get`.
+
+        The hash is computed once when the image is loaded; it is only recomputed if the entry
+        has since been evicted or replaced.
+
+        Args:
+            banner_id (str): The banner id.
+            data (bytes): The image data returned by `get`.
+
+        Returns:
+            str: The content hash of the image.
+        """
+        entry = self._entries.get(banner_id)
+        if entry is not None and entry.data is data:
+            return entry.etag
+        return content_etag(data)
+
+    def get_by_etag(self, etag: str) -> Optional[bytes]:
+        """
+        Return image bytes by content hash.
+
+        Images in memory are served without touching the disk: the bytes for a hash cannot
+        change. Images that were evicted, or are too large to cache, may still be referenced by
+        cached responses, so they are read again from their file if it still has this hash.
+
+        Args:
+            etag (str): The content hash of the image.
+
+        Returns:
+            Optional[bytes]: The image data, or None if no image with this hash is known.
+        """
+        entry = self._by_etag.get(etag)
+        if entry is not None:
+            return entry.data
+        banner_id = self._etag_ids.get(etag)
+        if banner_id is None:
+            return None
+        data = self.get(banner_id)
+        if data is None or self.etag(banner_id, data) != etag:
+            return None  # The file changed; its new hash is handed out instead
+        return data
+
+    def is_fresh(self, banner_id: str) -> bool:
+        """
+        Return whether `current_etag` can answer for this banner without touching the disk.
+        """
+        entry = self._entries.get(banner_id) or self._oversized.get(banner_id)
+        return entry is not None and time.monotonic() - entry.checked_at < self.revalidate_interval
+
+    def preload(self, banner_ids: Iterable[str]) -> None:
+        """
+        Load the images for the given banners ahead of the first request.
+
+        Args:
+            banner_ids (Iterable[str]): Ids of the banners to load.
+        """
+        for banner_id in banner_ids:
+            self.get(banner_id)
+
+    def invalidate(self, banner_id: Optional[str] = None) -> None:
+        """
+        Drop a single cached entry, or every entry if no banner id is given.
+        """
+        with self._lock:
+            if banner_id is None:
+                self._entries.clear()
+                self._by_etag.clear()
+                self._etag_ids.clear()
+                self._banner_etags.clear()
+                self._oversized.clear()
+                self._size = 0
+            else:
+                self._discard(self._entries.pop(banner_id, None))
+                self._oversized.pop(banner_id, None)
+
+    def _load(self, banner_id: str, now: float) -> _ImageEntry:
+        path = self.path_for(banner_id)
+        try:
+            with open(path, "rb") as image_file:
+                data = image_file.read()
+        except FileNotFoundError:
+            data = None
+            signature = None
+        else:
+            signature = self._signature(path)
+            if signature is None:
+                return _ImageEntry(data, None, now)  # Removed while reading; do not cache a stale copy
+
+        # An unchanged image too large to cache is not hashed again
+        oversized = self._oversized.get(banner_id)
+        etag = oversized.etag if oversized is not None and oversized.signature == signature else None
+        new_entry = _ImageEntry(data, signature, now, etag)  # Hashes the image outside the lock
+        with self._lock:
+            self._discard(self._entries.pop(banner_id, None))
+            self._set_etag(banner_id, new_entry.etag)
+            if data is not None and len(data) > self.max_bytes:
+                if self._oversized.pop(banner_id, None) is None:
+                    logging.warning(
+                        "Image for banner ID %s exceeds the cache budget of %d bytes; reading it from disk.",
+                        banner_id, self.max_bytes
+                    )
+                self._oversized[banner_id] = _ImageEntry(None, signature, now, new_entry.etag)
+                return new_entry
+            self._oversized.pop(banner_id, None)
+            self._entries[banner_id] = new_entry
+            if data is not None:
+                self._size += len(data)
+                self._by_etag[new_entry.etag] = new_entry
+                self._evict()
+        return new_entry
+
+    def _set_etag(self, banner_id: str, etag: str) -> None:
+        # Must be called with the lock held. Only the current hash of a banner stays readable,
+        # so the map holds at most one entry per banner however often its image changes.
+        old_etag = self._banner_etags.pop(banner_id, None)
+        if old_etag is not None and self._etag_ids.get(old_etag) == banner_id:
+            del self._etag_ids[old_etag]
+        if etag:
+            self._etag_ids[etag] = banner_id
+            self._banner_etags[banner_id] = etag
+
+    def _touch(self, banner_id: str) -> None:
+        try:
+            self._entries.move_to_end(banner_id)
+        except KeyError:
+            pass  # Evicted concurrently; the caller already holds the data
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._discard(entry)
+
+    def _discard(self, entry: Optional[_ImageEntry]) -> None:
+        # Must be called with the lock held, after removing the entry from _entries
+        if entry is None or entry.data is None:
+            return
+        self._size -= len(entry.data)
+        if self._by_etag.get(entry.etag) is entry:
+            del self._by_etag[entry.etag]
+
+    @staticmethod
+    def _signature(path: str) -> FileSignature:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,60 @@
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+from banner_config import BannerConfig
+
+
+ALL_LOCATIONS = "ALL"
+
+
+class BannerIndex:
+    """
+    Immutable location -> banners index built from the output of `load_configs()`.
+
+    Every known location maps to a tuple holding its own banners merged with the banners
+    configured for "ALL", in selection order: by descending priority, then start time, then
+    id. The order only depends on the configs themselves, not on the order they were loaded
+    in, so every worker process and restart resolves conflicts the same way. Unknown
+    locations fall back to the "ALL" bucket, so a lookup only touches the banners that can
+    apply to the location.
+
+    Attributes:
+        source (Sequence[BannerConfig]): The banner list the index was built from.
+    """
+
+    def __init__(self, banners: Sequence[BannerConfig]):
+        self.source = banners
+        by_location: Dict[str, List[BannerConfig]] = {}
+        all_bucket: List[BannerConfig] = []
+        for banner in banners:
+            locations = frozenset(banner.locations)
+            if ALL_LOCATIONS in locations:
+                all_bucket.append(banner)  # Already a candidate everywhere
+                continue
+            for location in locations:
+                by_location.setdefault(location, []).append(banner)
+
+        self._all: Tuple[BannerConfig, ...] = self._sorted(all_bucket)
+        self._by_location: Dict[str, Tuple[BannerConfig, ...]] = {
+            location: self._sorted(bucket + all_bucket)
+            for location, bucket in by_location.items()
+        }
+
+    def candidates(self, location: str) -> Tuple[BannerConfig, ...]:
+        """
+        Return the banners that can be shown at a location, in selection order.
+
+        Args:
+            location (str): The requested location.
+
+        Returns:
+            Tuple[BannerConfig, ...]: Banners for the location plus the "ALL" banners.
+        """
+        return self._by_location.get(location, self._all)
+
+    @property
+    def known_locations(self) -> FrozenSet[str]:
+        return frozenset(self._by_location)
+
+    @staticmethod
+    def _sorted(banners: List[BannerConfig]) -> Tuple[BannerConfig, ...]:
+        return tuple(sorted(banners, key=lambda banner: (-banner.priority, banner.start_us, banner.id)))
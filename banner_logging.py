@@ -0,0 +1,197 @@
+import time
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+
+_DEFAULT_SUMMARY = (logging.INFO, "%(count)d %(key)s events for %(label)s in the last %(interval).0fs.")
+
+
+class _KeyState:
+    __slots__ = ("window_start", "emitted", "suppressed")
+
+    def __init__(self, window_start: float):
+        self.window_start = window_start
+        self.emitted = 0
+        self.suppressed = 0
+
+
+class HotPathLogger:
+    """
+    Logging for code that runs on every request.
+
+    Messages are rate limited per key: at most `limit` records per key are emitted in each
+    `window` seconds, and the number of suppressed records is reported when the window rolls
+    over. Arguments are only formatted for records that are actually emitted.
+
+    Events that are only interesting in aggregate are counted with `count` instead and
+    reported as one summary line per key and label every `summary_interval` seconds, e.g.
+    "25 requests fell back to the default banner for location XX in the last 60s".
+
+    Attributes:
+        logger (logging.Logger): The logger records are emitted to.
+        limit (int): Records emitted per key and window.
+        window (float): Length of a rate limiting window in seconds.
+        summary_interval (float): Seconds between summaries of counted events.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        limit: int = 5,
+        window: float = 60.0,
+        summary_interval: float = 60.0
+    ):
+        self.logger = logger or logging.getLogger()
+        self.limit = limit
+        self.window = window
+        self.summary_interval = summary_interval
+        self._keys: Dict[str, _KeyState] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._summaries: Dict[str, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def log(self, level: int, key: str, msg: str, *args) -> bool:
+        """
+        Log a message subject to the rate limit of its key.
+
+        Args:
+            level (int): The logging level.
+            key (str): Identifies the kind of message; each key has its own limit.
+            msg (str): %-style format string, only formatted if the record is emitted.
+            *args: Arguments for the format string.
+
+        Returns:
+            bool: Whether the record was emitted.
+        """
+        if not self.logger.isEnabledFor(level):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                state = self._keys[key] = _KeyState(now)
+            suppressed = 0
+            if now - state.window_start >= self.window:
+                suppressed = state.suppressed
+                state.window_start, state.emitted, state.suppressed = now, 0, 0
+            if state.emitted >= self.limit:
+                state.suppressed += 1
+                return False
+            state.emitted += 1
+        if suppressed:
+            self.logger.log(level, "Suppressed %d similar messages (%s) in the last %.0fs.", suppressed, key, self.window)
+        self.logger.log(level, msg, *args)
+        return True
+
+    def error(self, key: str, msg: str, *args) -> bool:
+        return self.log(logging.ERROR, key, msg, *args)
+
+    def warning(self, key: str, msg: str, *args) -> bool:
+        return self.log(logging.WARNING, key, msg, *args)
+
+    def summarize(self, key: str, level: int, msg: str) -> None:
+        """
+        Register how counted events of a key are summarized.
+
+        Args:
+            key (str): The event key passed to `count`.
+            level (int): The logging level of the summary.
+            msg (str): %-style format string with the mapping keys `count`, `key`, `label` and `interval`.
+        """
+        self._summaries[key] = (level, msg)
+
+    def count(self, key: str, label: str) -> None:
+        """
+        Count an event for the next summary.
+        """
+        with self._lock:
+            self._counts[key, label] = self._counts.get((key, label), 0) + 1
+
+    def flush(self) -> None:
+        """
+        Emit one summary line per counted key and label, and reset the counts.
+        """
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        for (key, label), count in sorted(counts.items()):
+            level, msg = self._summaries.get(key, _DEFAULT_SUMMARY)
+            self.logger.log(level, msg, {"count": count, "key": key, "label": label, "interval": self.summary_interval})
+
+    def start(self) -> None:
+        """
+        Start the thread emitting the periodic summaries.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-summaries", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the summary thread and emit the remaining counts.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.summary_interval):
+            self.flush()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread instead of the logging thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            return super().prepare(record)  # Tracebacks cannot be formatted after the fact
+        return record
+
+
+def start_queue_logging(logger: Optional[logging.Logger] = None) -> Optional[QueueListener]:
+    """
+    Move the handlers of a logger behind an unbounded queue so logging never blocks the caller
+    on formatting or I/O. A listener thread formats and writes the records.
+
+    Must be called in the process that logs; after a fork, the listener thread is gone.
+
+    Args:
+        logger (Optional[logging.Logger]): The logger to wrap. Defaults to the root logger.
+
+    Returns:
+        Optional[QueueListener]: The running listener, to be stopped on shutdown, or None if
+            the logger has no handlers.
+    """
+    logger = logger or logging.getLogger()
+    handlers: List[logging.Handler] = [h for h in logger.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return None
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(_DeferredQueueHandler(records))
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def stop_queue_logging(listener: Optional[QueueListener], logger: Optional[logging.Logger] = None) -> None:
+    """
+    Flush and stop a listener started with `start_queue_logging`, restoring the original handlers.
+    """
+    if listener is None:
+        return
+    logger = logger or logging.getLogger()
+    for handler in [h for h in logger.handlers if isinstance(h, _DeferredQueueHandler)]:
+        logger.removeHandler(handler)
+    for handler in listener.handlers:
+        logger.addHandler(handler)
+    listener.stop()  # Writes the records still queued
@@ -0,0 +1,6 @@
+# gRPC metadata keys shared by the service and the client library. Kept free of imports so
+# clients do not depend on the server's modules.
+
+# Trailing metadata key with the milliseconds for which a response's banner selection holds.
+# Relative rather than absolute, so client and server clocks do not need to agree.
+VALID_FOR_METADATA = "banner-valid-for-ms"
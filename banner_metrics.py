@@ -0,0 +1,435 @@
+import time
+import logging
+import ipaddress
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import grpc
+
+
+# Latency buckets in seconds, fine-grained at the low end where the cached hot path sits
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Config reloads take milliseconds for a few files and seconds for many thousands
+RELOAD_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Server streams last from milliseconds (an image) to hours (a WatchBanner subscription)
+STREAM_BUCKETS = (0.001, 0.01, 0.1, 1.0, 10.0, 60.0, 300.0, 1800.0, 3600.0, 14400.0)
+
+# Metrics are only served to the local host unless another address is configured
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+# Path of the on-demand profiler endpoint, see banner_profiling.py
+PROFILE_PATH = "/debug/profile"
+# Path of the schedule preview, see banner_schedule.py
+SCHEDULE_PATH = "/debug/schedule"
+
+# Label used for locations without configured banners, so clients cannot blow up the number of series
+OTHER_LOCATION = "other"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """
+    A monotonically increasing counter with one series per combination of label values.
+
+    Attributes:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (Tuple[str, ...]): Names of the labels.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    A histogram of observed values with one series per combination of label values.
+
+    Attributes:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (Tuple[str, ...]): Names of the labels.
+        buckets (Tuple[float, ...]): Sorted upper bounds of the buckets, without +Inf.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        position = bisect_left(self.buckets, value)  # First bucket with value <= bound
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[position] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series is not None else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            all_series = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in all_series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class BannerMetrics:
+    """
+    The service's metrics, rendered in the Prometheus text exposition format.
+
+    Attributes:
+        rpc_requests (Counter): Finished RPCs by method and status code.
+        rpc_latency (Histogram): Unary RPC handler latency by method.
+        rpc_stream_duration (Histogram): Server-streaming RPC lifetime by method, kept apart from
+            `rpc_latency` as a stream stays open for as long as the client watches.
+        selection_latency (Histogram): Time spent selecting a banner on a response cache miss.
+        image_load_latency (Histogram): Time spent fetching the selected banner's image.
+        serialization_latency (Histogram): Time spent building and serializing a response.
+        response_cache (Counter): Response cache lookups by location and result (hit or miss).
+        default_banner (Counter): Responses serving the default banner, by location and reason.
+        image_not_found (Counter): Selected banners without an image, by location.
+        request_stage_latency (Histogram): Stage durations of sampled requests, by method and stage.
+        config_reloads (Counter): Config snapshots swapped in by the hot reload watcher.
+        config_reload_errors (Counter): Config directory scans that failed.
+        config_files_parsed (Counter): Config files (re-)parsed by the hot reload watcher.
+        config_reload_latency (Histogram): Time from the start of a scan to the new snapshot being served.
+    """
+
+    def __init__(self):
+        self.rpc_requests = Counter("banner_rpc_requests_total", "Finished RPCs.", ("method", "code"))
+        self.rpc_latency = Histogram("banner_rpc_latency_seconds", "Unary RPC handler latency.", ("method",))
+        self.rpc_stream_duration = Histogram(
+            "banner_rpc_stream_duration_seconds", "Server-streaming RPC lifetime.", ("method",), buckets=STREAM_BUCKETS
+        )
+        self.selection_latency = Histogram(
+            "banner_selection_latency_seconds", "Banner selection time on a response cache miss.", ("location",)
+        )
+        self.image_load_latency = Histogram(
+            "banner_image_load_latency_seconds", "Image fetch time on a response cache miss.", ("location",)
+        )
+        self.serialization_latency = Histogram(
+            "banner_serialization_latency_seconds", "Response build and serialization time.", ("location",)
+        )
+        self.response_cache = Counter(
+            "banner_response_cache_requests_total", "Response cache lookups.", ("location", "result")
+        )
+        self.default_banner = Counter(
+            "banner_default_fallbacks_total", "Responses that fell back to the default banner.", ("location", "reason")
+        )
+        self.image_not_found = Counter(
+            "banner_image_not_found_total", "Selected banners without an image.", ("location",)
+        )
+        self.request_stage_latency = Histogram(
+            "banner_request_stage_seconds", "Stage durations of sampled requests.", ("method", "stage")
+        )
+        self.config_reloads = Counter("banner_config_reloads_total", "Config snapshots swapped in by hot reload.")
+        self.config_reload_errors = Counter("banner_config_reload_errors_total", "Failed config directory scans.")
+        self.config_files_parsed = Counter("banner_config_files_parsed_total", "Config files (re-)parsed by hot reload.")
+        self.config_reload_latency = Histogram(
+            "banner_config_reload_seconds", "Config reload time, from scan start to the new snapshot.",
+            buckets=RELOAD_BUCKETS
+        )
+        self._metrics = (
+            self.rpc_requests, self.rpc_latency, self.rpc_stream_duration, self.selection_latency, self.image_load_latency,
+            self.serialization_latency, self.response_cache, self.default_banner, self.image_not_found,
+            self.request_stage_latency, self.config_reloads, self.config_reload_errors, self.config_files_parsed,
+            self.config_reload_latency
+        )
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _method_name(handler_call_details) -> str:
+    return handler_call_details.method.rsplit("/", 1)[-1]
+
+
+def _status_code(context, failed: bool) -> str:
+    code = context.code()
+    if code is None:
+        return "UNKNOWN" if failed else "OK"
+    return getattr(code, "name", str(code))
+
+
+def _rebuild_handler(handler, wrap_unary: Callable, wrap_stream: Callable):
+    if handler.unary_unary:
+        factory, behavior = grpc.unary_unary_rpc_method_handler, wrap_unary(handler.unary_unary)
+    elif handler.unary_stream:
+        factory, behavior = grpc.unary_stream_rpc_method_handler, wrap_stream(handler.unary_stream)
+    elif handler.stream_unary:
+        factory, behavior = grpc.stream_unary_rpc_method_handler, wrap_unary(handler.stream_unary)
+    else:
+        factory, behavior = grpc.stream_stream_rpc_method_handler, wrap_stream(handler.stream_stream)
+    return factory(
+        behavior,
+        request_deserializer=handler.request_deserializer,
+        response_serializer=handler.response_serializer
+    )
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """
+    Records the count and status code of every RPC on a thread-pool server, and the latency of
+    unary RPCs or the lifetime of streaming ones.
+
+    Attributes:
+        metrics (BannerMetrics): The metrics to record into.
+    """
+
+    def __init__(self, metrics: BannerMetrics):
+        self.metrics = metrics
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        metrics = self.metrics
+
+        def record(context, started: float, failed: bool, latency: Histogram) -> None:
+            latency.observe(time.perf_counter() - started, method)
+            metrics.rpc_requests.inc(method, _status_code(context, failed))
+
+        def wrap_unary(behavior):
+            def wrapper(request, context):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    response = behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    record(context, started, failed, metrics.rpc_latency)
+            return wrapper
+
+        def wrap_stream(behavior):
+            def wrapper(request, context):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    yield from behavior(request, context)
+                    failed = False
+                finally:
+                    record(context, started, failed, metrics.rpc_stream_duration)
+            return wrapper
+
+        return _rebuild_handler(handler, wrap_unary, wrap_stream)
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Records the count and status code of every RPC on a grpc.aio server, and the latency of
+    unary RPCs or the lifetime of streaming ones.
+
+    Attributes:
+        metrics (BannerMetrics): The metrics to record into.
+    """
+
+    def __init__(self, metrics: BannerMetrics):
+        self.metrics = metrics
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        metrics = self.metrics
+
+        def record(context, started: float, failed: bool, latency: Histogram) -> None:
+            latency.observe(time.perf_counter() - started, method)
+            metrics.rpc_requests.inc(method, _status_code(context, failed))
+
+        def wrap_unary(behavior):
+            async def wrapper(request, context):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    response = await behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    record(context, started, failed, metrics.rpc_latency)
+            return wrapper
+
+        def wrap_stream(behavior):
+            async def wrapper(request, context):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    async for response in behavior(request, context):
+                        yield response
+                    failed = False
+                finally:
+                    record(context, started, failed, metrics.rpc_stream_duration)
+            return wrapper
+
+        return _rebuild_handler(handler, wrap_unary, wrap_stream)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: BannerMetrics
+    profiler = None
+    schedule = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith("/debug/") and not ipaddress.ip_address(self.client_address[0]).is_loopback:
+            # Profiles and schedules are for operators on the host, e.g. through a port-forward
+            self.send_error(403)
+        elif url.path == "/metrics":
+            self._send(200, self.metrics.render(), "text/plain; version=0.0.4; charset=utf-8")
+        elif url.path == PROFILE_PATH and self.profiler is not None:
+            logging.info(f"Starting profile capture requested by {self.client_address[0]}: {url.query}")
+            self._send(*self.profiler.handle_request(parse_qs(url.query)), "text/plain; charset=utf-8")
+        elif url.path == SCHEDULE_PATH and self.schedule is not None:
+            self._send(*self.schedule.handle_request(parse_qs(url.query)), "application/json")
+        else:
+            self.send_error(404)
+
+    def _send(self, status: int, text: str, content_type: str) -> None:
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are too frequent to log
+
+
+class MetricsServer:
+    """
+    Serves `/metrics` over HTTP from a background thread, the on-demand profiler on
+    `/debug/profile` if a profiler is given and the schedule preview on `/debug/schedule` if
+    a schedule is given.
+
+    The server binds the loopback address by default; Prometheus scraping from elsewhere needs
+    `host` set, e.g. to "0.0.0.0". The `/debug` endpoints are unauthenticated and therefore
+    answered only for clients on the local host, whatever the bind address.
+
+    If the port is taken, e.g. by the worker being replaced during a rolling restart, binding
+    is retried until it succeeds or the server is stopped.
+
+    Attributes:
+        metrics (BannerMetrics): The metrics to expose.
+        port (int): The HTTP port.
+        host (str): The address to bind.
+        profiler (Optional[Profiler]): The profiler serving captures, see banner_profiling.py.
+        schedule (Optional[ScheduleBuilder]): The schedule to preview, see banner_schedule.py.
+    """
+
+    def __init__(
+        self,
+        metrics: BannerMetrics,
+        port: int,
+        retry_interval: float = 1.0,
+        profiler=None,
+        schedule=None,
+        host: str = DEFAULT_METRICS_HOST
+    ):
+        self.metrics = metrics
+        self.port = port
+        self.host = host
+        self.profiler = profiler
+        self.schedule = schedule
+        self.retry_interval = retry_interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="metrics-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            server = self._server
+        if server is not None:
+            server.shutdown()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": self.metrics, "profiler": self.profiler, "schedule": self.schedule})
+        while not self._stop.is_set():
+            try:
+                server = ThreadingHTTPServer((self.host, self.port), handler)
+                break
+            except OSError as e:
+                logging.warning(f"Metrics port {self.port} unavailable, retrying: {e}")
+                self._stop.wait(self.retry_interval)
+        else:
+            return
+        server.daemon_threads = True
+        with self._lock:
+            # Once published, stop() relies on serve_forever() running to return from shutdown()
+            if self._stop.is_set():
+                server.server_close()
+                return
+            self._server = server
+        logging.info(f"Serving metrics on {self.host}:{self.port}.")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
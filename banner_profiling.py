@@ -0,0 +1,420 @@
+import io
+import os
+import sys
+import time
+import random
+import pstats
+import cProfile
+import threading
+from collections import Counter as Tally
+from contextvars import ContextVar
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import grpc
+
+from banner_metrics import BannerMetrics, _method_name, _rebuild_handler
+
+
+MAX_CAPTURE_SECONDS = 60.0
+PROFILER_MODES = ("sample", "cprofile")
+
+# Innermost frames of threads that are waiting for work rather than doing any, by file and function
+_IDLE_FRAMES = frozenset({
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+    ("handlers.py", "dequeue"),
+    ("selectors.py", "select"),
+    ("socketserver.py", "serve_forever"),
+    ("_server.py", "_serve"),
+    ("_server.py", "wait_for_termination"),
+})
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("banner_request_trace", default=None)
+
+
+class RequestTrace:
+    """
+    Stage timings of one sampled request.
+
+    Each `mark` closes the stage that ran since the previous mark (or the start of the
+    request), so the stages of a request add up to the time spent in the handler.
+
+    Attributes:
+        stages (Dict[str, float]): Seconds spent per stage; stages reached repeatedly, e.g. once
+            per location of a GetBanners request, are summed.
+    """
+
+    __slots__ = ("stages", "started", "_last")
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.started = self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """
+    Return the trace of the request being handled, or None if it is not sampled.
+    """
+    return _current_trace.get()
+
+
+class _HandlerProfiles:
+    """
+    cProfile profiles of the RPC handlers running during a capture, one per thread.
+
+    cProfile only profiles the thread that enables it, so each handler thread profiles itself
+    while it runs an RPC. Nested or interleaved RPCs on one thread, as on the asyncio event
+    loop, share the thread's profile, which stays enabled until the last of them finishes.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._profiles: List[cProfile.Profile] = []
+        self._active = 0
+        self._idle = threading.Condition()
+
+    def enter(self) -> None:
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        if depth == 0:
+            profile = getattr(local, "profile", None)
+            with self._idle:
+                if profile is None:
+                    profile = local.profile = cProfile.Profile()
+                    self._profiles.append(profile)
+                self._active += 1
+            profile.enable()
+        local.depth = depth + 1
+
+    def exit(self) -> None:
+        local = self._local
+        local.depth -= 1
+        if local.depth == 0:
+            local.profile.disable()
+            with self._idle:
+                self._active -= 1
+                self._idle.notify_all()
+
+    def report(self, sort: str, limit: int, timeout: float = 1.0) -> str:
+        """
+        Wait for the RPCs still running under a profile, then format the merged statistics.
+        """
+        with self._idle:
+            self._idle.wait_for(lambda: self._active == 0, timeout)
+            profiles = list(self._profiles)
+        if not profiles:
+            return "No RPCs were handled during the capture.\n"
+        output = io.StringIO()
+        stats = pstats.Stats(*profiles, stream=output)
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+def _frame_key(frame) -> Tuple[str, int, str]:
+    code = frame.f_code
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def _format_frame(key: Tuple[str, int, str]) -> str:
+    filename, line, name = key
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def sample_stacks(seconds: float, interval: float, include_idle: bool = False) -> Tuple[Tally, int]:
+    """
+    Sample the Python stacks of all other threads at a fixed interval.
+
+    Unlike cProfile, sampling adds no overhead to the sampled threads beyond holding the GIL
+    while a sample is taken, and it sees every thread, including the asyncio event loop.
+
+    Args:
+        seconds (float): How long to sample.
+        interval (float): Seconds between samples.
+        include_idle (bool): Also count threads that are waiting for work.
+
+    Returns:
+        Tuple[Counter, int]: The number of times each stack, outermost frame first, was seen,
+            and the number of samples taken.
+    """
+    stacks: Tally = Tally()
+    samples = 0
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me:
+                continue
+            if not include_idle:
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame))
+                frame = frame.f_back
+            stacks[tuple(reversed(stack))] += 1
+        samples += 1
+        time.sleep(interval)
+    return stacks, samples
+
+
+def format_samples(stacks: Tally, samples: int, seconds: float, interval: float, limit: int) -> str:
+    """
+    Format sampled stacks as a table of the functions seen most often, by own and total samples.
+    """
+    own: Tally = Tally()
+    total: Tally = Tally()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for key in set(stack):
+            total[key] += count
+    seen = sum(stacks.values()) or 1
+    lines = [
+        f"{seen} busy stacks in {samples} samples over {seconds:.1f}s, every {interval * 1000:.1f}ms.",
+        "",
+        f"{'own %':>7} {'total %':>8}  function",
+    ]
+    for key, count in total.most_common(limit):
+        lines.append(f"{own[key] / seen * 100:>7.1f} {count / seen * 100:>8.1f}  {_format_frame(key)}")
+    return "\n".join(lines) + "\n"
+
+
+def format_collapsed(stacks: Tally) -> str:
+    """
+    Format sampled stacks in the collapsed format read by flamegraph.pl and speedscope.
+    """
+    return "".join(
+        f"{';'.join(_format_frame(key) for key in stack)} {count}\n" for stack, count in stacks.most_common()
+    )
+
+
+class ProfilerBusy(RuntimeError):
+    """
+    Raised when a profile is requested while another capture is running.
+    """
+
+
+class Profiler:
+    """
+    Request sampling and on-demand profile captures for a live server.
+
+    A fraction `sample_rate` of requests is traced: the service marks the end of each stage
+    of handling a request, and the stage timings are recorded in the
+    `banner_request_stage_seconds` histogram. Captures profile the whole process for a fixed
+    time, by sampling the stacks of all threads or by running cProfile in the RPC handlers.
+
+    Requests that are not sampled only pay for one random draw in the interceptor and one
+    context variable lookup in the service. Without sampling and the profiler endpoint, the
+    interceptor is not installed at all.
+
+    Attributes:
+        metrics (BannerMetrics): The metrics stage timings are recorded into.
+        sample_rate (float): Fraction of requests whose stage timings are recorded.
+        max_seconds (float): Longest capture allowed.
+        handler_profiles (Optional[_HandlerProfiles]): The running cProfile capture, if any.
+    """
+
+    def __init__(self, metrics: BannerMetrics, sample_rate: float = 0.0, max_seconds: float = MAX_CAPTURE_SECONDS):
+        """
+        Raises:
+            ValueError: If the sample rate is not between 0 and 1.
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Sample rate must be between 0 and 1, got {sample_rate}")
+        self.metrics = metrics
+        self.sample_rate = sample_rate
+        self.max_seconds = max_seconds
+        self.handler_profiles: Optional[_HandlerProfiles] = None
+        self._capture_lock = threading.Lock()
+
+    def start_trace(self) -> Optional[RequestTrace]:
+        """
+        Return a new trace if this request is sampled, otherwise None.
+        """
+        if self.sample_rate and random.random() < self.sample_rate:
+            return RequestTrace()
+        return None
+
+    def finish_trace(self, method: str, trace: RequestTrace) -> None:
+        """
+        Record the stage timings of a sampled request and its total handler time.
+        """
+        observe = self.metrics.request_stage_latency.observe
+        for stage, seconds in trace.stages.items():
+            observe(seconds, method, stage)
+        observe(time.perf_counter() - trace.started, method, "total")
+
+    def capture(
+        self,
+        mode: str = "sample",
+        seconds: float = 10.0,
+        interval: float = 0.005,
+        limit: int = 40,
+        sort: str = "cumulative",
+        collapsed: bool = False,
+        include_idle: bool = False
+    ) -> str:
+        """
+        Profile the process for a fixed time and return the report. Blocks for `seconds`.
+
+        Args:
+            mode (str): "sample" to sample the stacks of all threads, or "cprofile" to run
+                cProfile in the RPC handlers.
+            seconds (float): How long to profile, up to `max_seconds`.
+            interval (float): Seconds between samples in "sample" mode.
+            limit (int): Number of functions to report.
+            sort (str): pstats sort key in "cprofile" mode, e.g. "cumulative" or "tottime".
+            collapsed (bool): Report all sampled stacks in the collapsed flame graph format.
+            include_idle (bool): Also count threads that are waiting for work in "sample" mode.
+
+        Returns:
+            str: The profile as text.
+
+        Raises:
+            ValueError: If a parameter is out of range.
+            ProfilerBusy: If another capture is running.
+        """
+        if mode not in PROFILER_MODES:
+            raise ValueError(f"Unknown profiler mode {mode!r}, expected one of {list(PROFILER_MODES)}")
+        if not 0 < seconds <= self.max_seconds:
+            raise ValueError(f"Capture length must be between 0 and {self.max_seconds:.0f} seconds, got {seconds}")
+        if interval <= 0 or limit <= 0:
+            raise ValueError("Sampling interval and limit must be positive")
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            raise ValueError(f"Unknown sort key {sort!r}")
+        if not self._capture_lock.acquire(blocking=False):
+            raise ProfilerBusy("Another profile capture is running")
+        try:
+            if mode == "sample":
+                stacks, samples = sample_stacks(seconds, interval, include_idle)
+                if collapsed:
+                    return format_collapsed(stacks)
+                return format_samples(stacks, samples, seconds, interval, limit)
+
+            profiles = _HandlerProfiles()
+            self.handler_profiles = profiles
+            try:
+                time.sleep(seconds)
+            finally:
+                self.handler_profiles = None
+            return f"cProfile of the RPC handlers over {seconds:.1f}s.\n\n" + profiles.report(sort, limit)
+        finally:
+            self._capture_lock.release()
+
+    def handle_request(self, query: Mapping[str, Sequence[str]]) -> Tuple[int, str]:
+        """
+        Run a capture for an HTTP request to the profiler endpoint.
+
+        Args:
+            query (Mapping[str, Sequence[str]]): The parsed query string, with the parameters of
+                `capture`: mode, seconds, interval_ms, limit, sort, format ("text" or
+                "collapsed") and idle ("1" to include idle threads).
+
+        Returns:
+            Tuple[int, str]: The HTTP status and the response body.
+        """
+        def param(name: str, default: str) -> str:
+            return query.get(name, [default])[-1]
+
+        try:
+            report = self.capture(
+                mode=param("mode", "sample"),
+                seconds=float(param("seconds", "10")),
+                interval=float(param("interval_ms", "5")) / 1000,
+                limit=int(param("limit", "40")),
+                sort=param("sort", "cumulative"),
+                collapsed=param("format", "text") == "collapsed",
+                include_idle=param("idle", "0") == "1"
+            )
+        except ValueError as e:
+            return 400, f"{e}\n"
+        except ProfilerBusy as e:
+            return 409, f"{e}\n"
+        return 200, report
+
+
+class ProfilingInterceptor(grpc.ServerInterceptor):
+    """
+    Traces sampled unary RPCs and runs cProfile captures in the handlers of a thread-pool server.
+
+    Attributes:
+        profiler (Profiler): The profiler deciding what to sample and capture.
+    """
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or not (handler.unary_unary or handler.stream_unary):
+            return handler
+        method = _method_name(handler_call_details)
+        profiler = self.profiler
+
+        def wrap_unary(behavior):
+            def wrapper(request, context):
+                trace = profiler.start_trace()
+                profiles = profiler.handler_profiles
+                if trace is None and profiles is None:
+                    return behavior(request, context)
+                token = _current_trace.set(trace)
+                if profiles is not None:
+                    profiles.enter()
+                try:
+                    return behavior(request, context)
+                finally:
+                    if profiles is not None:
+                        profiles.exit()
+                    _current_trace.reset(token)
+                    if trace is not None:
+                        profiler.finish_trace(method, trace)
+            return wrapper
+
+        return _rebuild_handler(handler, wrap_unary, lambda behavior: behavior)
+
+
+class AsyncProfilingInterceptor(grpc.aio.ServerInterceptor):
+    """
+    Traces sampled unary RPCs and runs cProfile captures in the handlers of a grpc.aio server.
+
+    Attributes:
+        profiler (Profiler): The profiler deciding what to sample and capture.
+    """
+
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or not (handler.unary_unary or handler.stream_unary):
+            return handler
+        method = _method_name(handler_call_details)
+        profiler = self.profiler
+
+        def wrap_unary(behavior):
+            async def wrapper(request, context):
+                trace = profiler.start_trace()
+                profiles = profiler.handler_profiles
+                if trace is None and profiles is None:
+                    return await behavior(request, context)
+                token = _current_trace.set(trace)
+                if profiles is not None:
+                    profiles.enter()
+                try:
+                    return await behavior(request, context)
+                finally:
+                    if profiles is not None:
+                        profiles.exit()
+                    _current_trace.reset(token)
+                    if trace is not None:
+                        profiler.finish_trace(method, trace)
+            return wrapper
+
+        return _rebuild_handler(handler, wrap_unary, lambda behavior: behavior)
@@ -0,0 +1,235 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from banner_config import BannerConfig, load_config_files
+from banner_metrics import BannerMetrics
+
+try:
+    import inotify_simple
+except ImportError:  # Optional dependency; fall back to mtime polling
+    inotify_simple = None
+
+
+# Signature used to detect changed files: (mtime_ns, size)
+FileSignature = Tuple[int, int]
+
+
+def _fields(config: BannerConfig) -> tuple:
+    _, fields = config.__reduce__()
+    return fields[:-1] + (tuple(variant.__reduce__()[1] for variant in config.variants),)
+
+
+def same_configs(first: Sequence[BannerConfig], second: Sequence[BannerConfig]) -> bool:
+    """
+    Return whether two banner lists hold the same configs, field by field, in the same order.
+    """
+    return len(first) == len(second) and all(
+        a is b or _fields(a) == _fields(b) for a, b in zip(first, second)
+    )
+
+
+class ReloadStats:
+    """
+    Counters describing config reloads.
+
+    Attributes:
+        reloads (int): Number of times a new snapshot was swapped in.
+        files_parsed (int): Number of config files (re-)parsed by the watcher.
+        errors (int): Number of scans that failed.
+        last_duration (float): Duration of the last reload in seconds.
+        total_duration (float): Total time spent in reloads in seconds.
+    """
+
+    def __init__(self):
+        self.reloads = 0
+        self.files_parsed = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "reloads": self.reloads,
+            "files_parsed": self.files_parsed,
+            "errors": self.errors,
+            "last_duration": self.last_duration,
+            "total_duration": self.total_duration,
+        }
+
+
+class ConfigWatcher:
+    """
+    Watches a config directory and publishes a new banner snapshot whenever it changes.
+
+    Only files whose mtime/size changed since the previous scan are re-parsed. Each snapshot is
+    a new tuple handed to `on_reload`, so readers holding the previous snapshot never observe a
+    partially updated list. Uses inotify when the optional `inotify_simple` package is
+    installed and the platform supports it, and polls file signatures otherwise.
+
+    The first scan of the background thread primes the watcher. Configs may have changed since
+    the caller loaded the snapshot it serves, so that scan is published if its result differs
+    from `loaded`.
+
+    Attributes:
+        config_dir (str): Directory containing the JSON config files.
+        interval (float): Seconds between polls, or the maximum wait for inotify events.
+        loaded (Sequence[BannerConfig]): The snapshot served before the first scan.
+        stats (ReloadStats): Reload counters and latencies.
+        metrics (Optional[BannerMetrics]): Metrics to record reloads into as well.
+    """
+
+    def __init__(
+        self,
+        on_reload: Callable[[Tuple[BannerConfig, ...]], None],
+        config_dir: str = "resources/configs",
+        interval: float = 1.0,
+        loaded: Sequence[BannerConfig] = (),
+        metrics: Optional[BannerMetrics] = None
+    ):
+        self.on_reload = on_reload
+        self.config_dir = config_dir
+        self.interval = interval
+        self.loaded = loaded
+        self.stats = ReloadStats()
+        self.metrics = metrics
+        self._files: Dict[str, Tuple[FileSignature, Optional[BannerConfig]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self, notify: bool = True) -> bool:
+        """
+        Re-parse changed config files and publish a new snapshot if anything changed.
+
+        Args:
+            notify (bool): Whether to call `on_reload` with the new snapshot.
+
+        Returns:
+            bool: True if the directory changed since the previous scan.
+        """
+        started = time.perf_counter()
+        try:
+            signatures = self._signatures()
+        except OSError as e:
+            self._record_error()
+            logging.error(f"Error scanning config directory {self.config_dir}: {e}")
+            return False
+
+        modified = [
+            filename for filename, signature in signatures.items()
+            if filename not in self._files or self._files[filename][0] != signature
+        ]
+        if not modified and signatures.keys() == self._files.keys():
+            return False
+
+        # Changed files are parsed together, in parallel when there are many of them
+        parsed = dict(zip(modified, load_config_files([os.path.join(self.config_dir, name) for name in modified])))
+        self.stats.files_parsed += len(modified)
+        if self.metrics is not None:
+            self.metrics.config_files_parsed.inc(amount=len(modified))
+        files = {
+            filename: (signature, parsed[filename]) if filename in parsed else self._files[filename]
+            for filename, signature in sorted(signatures.items())
+        }
+
+        self._files = files
+        if notify:
+            self._publish(started)
+        return True
+
+    def prime(self) -> None:
+        """
+        Record the current directory contents, and publish them if they differ from `loaded`.
+        """
+        started = time.perf_counter()
+        self.scan(notify=False)
+        if not same_configs(self.snapshot(), self.loaded):
+            logging.info("Configs changed since they were loaded.")
+            self._publish(started)
+
+    def snapshot(self) -> Tuple[BannerConfig, ...]:
+        """
+        Return the valid configs of the last scan, in file name order.
+        """
+        return tuple(config for _, config in self._files.values() if config is not None)
+
+    def _publish(self, started: float) -> None:
+        snapshot = self.snapshot()
+        self.on_reload(snapshot)
+        duration = time.perf_counter() - started
+        self.stats.reloads += 1
+        self.stats.last_duration = duration
+        self.stats.total_duration += duration
+        if self.metrics is not None:
+            self.metrics.config_reloads.inc()
+            self.metrics.config_reload_latency.observe(duration)
+        logging.info(f"Reloaded {len(snapshot)} banner configs in {duration * 1000:.1f} ms.")
+
+    def _record_error(self) -> None:
+        self.stats.errors += 1
+        if self.metrics is not None:
+            self.metrics.config_reload_errors.inc()
+
+    def start(self) -> None:
+        """
+        Start the background thread. It first primes the watcher with the current directory
+        contents (see `prime`), so starting does not delay serving.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        inotify = self._open_inotify()
+        try:
+            self._safe_scan(prime=True)
+            while not self._stop.is_set():
+                if inotify is not None:
+                    # Wait for events, letting a burst of writes settle before scanning
+                    if inotify.read(timeout=int(self.interval * 1000), read_delay=50):
+                        self._safe_scan()
+                elif not self._stop.wait(self.interval):
+                    self._safe_scan()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _safe_scan(self, prime: bool = False) -> None:
+        try:
+            self.prime() if prime else self.scan()
+        except Exception as e:
+            # Keep serving the previous snapshot; the next change triggers another attempt
+            self._record_error()
+            logging.error(f"Error reloading banner configs: {e}")
+
+    def _open_inotify(self):
+        if inotify_simple is None:
+            return None
+        try:
+            inotify = inotify_simple.INotify()
+            flags = inotify_simple.flags
+            inotify.add_watch(
+                self.config_dir,
+                flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE | flags.CREATE
+            )
+            return inotify
+        except OSError as e:
+            logging.warning(f"inotify unavailable for {self.config_dir}, polling instead: {e}")
+            return None
+
+    def _signatures(self) -> Dict[str, FileSignature]:
+        signatures = {}
+        with os.scandir(self.config_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return signatures
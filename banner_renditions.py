@@ -0,0 +1,297 @@
+import io
+import os
+import zlib
+import struct
+import logging
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from banner_images import content_etag
+
+try:
+    from PIL import Image
+except ImportError:  # Optional dependency; without it only lossless PNG recompression is available
+    Image = None
+
+
+SOURCE_FORMAT = "png"
+DEFAULT_WIDTHS = (320, 640, 1280)
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_PNG_CHUNK = struct.Struct(">I4s")
+# Metadata chunks that do not affect how the image is rendered
+_PNG_DROPPED_CHUNKS = frozenset({b"tEXt", b"zTXt", b"iTXt", b"tIME"})
+
+
+class Rendition:
+    """
+    An encoded version of a source image in one format and width.
+
+    Attributes:
+        format (str): The image format, e.g. "png" or "webp".
+        width (int): The width in pixels, 0 if the source size was kept but is unknown.
+        data (bytes): The encoded image.
+        etag (str): The content hash of the encoded image.
+    """
+
+    __slots__ = ("format", "width", "data", "etag")
+
+    def __init__(self, format: str, width: int, data: bytes):
+        self.format = format
+        self.width = width
+        self.data = data
+        self.etag = content_etag(data)
+
+    def __repr__(self):
+        return f"Rendition(format={self.format}, width={self.width}, size={len(self.data)})"
+
+
+class _SourceRenditions:
+    """
+    The renditions of one version of a source image, with the choices already made per request shape.
+    """
+
+    __slots__ = ("source_etag", "source_width", "by_width", "widths", "choices")
+
+    def __init__(self, source_etag: str, source_width: int, renditions: Sequence[Rendition]):
+        self.source_etag = source_etag
+        self.source_width = source_width
+        self.by_width: Dict[int, List[Rendition]] = {}
+        for rendition in renditions:
+            self.by_width.setdefault(rendition.width, []).append(rendition)
+        self.widths = tuple(sorted(self.by_width))
+        self.choices: Dict[Tuple[FrozenSet[str], int], Optional[Rendition]] = {}
+
+
+def supported_formats() -> FrozenSet[str]:
+    """
+    Return the formats renditions can be encoded in with the installed libraries.
+    """
+    if Image is None:
+        return frozenset({SOURCE_FORMAT})
+    Image.init()
+    return frozenset(name.lower() for name in ("PNG", "WEBP", "AVIF") if name in Image.SAVE)
+
+
+def optimize_png(data: bytes) -> Optional[bytes]:
+    """
+    Losslessly shrink a PNG without any imaging library: drop metadata chunks and recompress
+    the image data at the highest zlib level.
+
+    Args:
+        data (bytes): The PNG file contents.
+
+    Returns:
+        Optional[bytes]: The smaller PNG, or None if it is not smaller or not a valid PNG.
+    """
+    if not data.startswith(_PNG_SIGNATURE):
+        return None
+    chunks: List[Tuple[bytes, bytes]] = []
+    image_data: List[bytes] = []
+    position = len(_PNG_SIGNATURE)
+    try:
+        while position < len(data):
+            length, kind = _PNG_CHUNK.unpack_from(data, position)
+            body = data[position + _PNG_CHUNK.size:position + _PNG_CHUNK.size + length]
+            position += _PNG_CHUNK.size + length + 4  # Skip the CRC
+            if kind == b"IDAT":
+                if not image_data:
+                    chunks.append((kind, b""))  # Placeholder keeping the chunk order
+                image_data.append(body)
+            elif kind not in _PNG_DROPPED_CHUNKS:
+                chunks.append((kind, body))
+            if kind == b"IEND":
+                break
+        compressed = zlib.compress(zlib.decompress(b"".join(image_data)), 9)
+    except (struct.error, zlib.error):
+        return None
+
+    output = [_PNG_SIGNATURE]
+    for kind, body in chunks:
+        if kind == b"IDAT":
+            body = compressed
+        output += [struct.pack(">I", len(body)), kind, body, struct.pack(">I", zlib.crc32(kind + body))]
+    optimized = b"".join(output)
+    return optimized if len(optimized) < len(data) else None
+
+
+def encode_renditions(data: bytes, formats: Iterable[str], widths: Iterable[int]) -> Tuple[int, List[Rendition]]:
+    """
+    Encode a PNG source image in each format at its own width and each smaller target width.
+
+    Renditions at the source width are only kept if they are smaller than the source itself.
+
+    Args:
+        data (bytes): The source PNG.
+        formats (Iterable[str]): The formats to encode, see `supported_formats`.
+        widths (Iterable[int]): The target widths in pixels.
+
+    Returns:
+        Tuple[int, List[Rendition]]: The width of the source (0 if unknown) and its renditions.
+    """
+    if Image is None:
+        optimized = optimize_png(data) if SOURCE_FORMAT in formats else None
+        return 0, [Rendition(SOURCE_FORMAT, 0, optimized)] if optimized is not None else []
+
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        image = source if source.mode in ("RGB", "RGBA") else source.convert("RGBA")
+        source_width, source_height = image.size
+        renditions = []
+        for width in sorted({source_width, *(width for width in widths if width < source_width)}):
+            resized = image if width == source_width else image.resize(
+                (width, max(1, round(source_height * width / source_width))), Image.LANCZOS
+            )
+            for format in formats:
+                encoded = _encode(resized, format)
+                if width < source_width or len(encoded) < len(data):
+                    renditions.append(Rendition(format, width, encoded))
+    return source_width, renditions
+
+
+def _encode(image, format: str) -> bytes:
+    output = io.BytesIO()
+    if format == "png":
+        image.save(output, "PNG", optimize=True)
+    else:
+        image.save(output, format.upper(), quality=80)
+    return output.getvalue()
+
+
+class RenditionCache:
+    """
+    Optimized renditions of banner images: recompressed PNG, WebP or AVIF where the optional
+    Pillow package supports them, and scaled down to the configured widths.
+
+    Renditions are encoded by a background worker pool when a source image is first seen,
+    never on the request path. Until they are ready, and whenever no rendition suits the
+    request, the source image is served. Renditions are tied to the content hash of their
+    source, so a changed image is never served from outdated renditions.
+
+    Attributes:
+        formats (FrozenSet[str]): The formats renditions are encoded in.
+        widths (Tuple[int, ...]): The widths images are scaled down to.
+        workers (int): Size of the encoding worker pool.
+    """
+
+    def __init__(
+        self,
+        formats: Optional[Iterable[str]] = None,
+        widths: Iterable[int] = DEFAULT_WIDTHS,
+        workers: int = 0
+    ):
+        available = supported_formats()
+        self.formats = available if formats is None else frozenset(formats) & available
+        self.widths = tuple(sorted(widths))
+        self.workers = workers or os.cpu_count() or 1
+        self._sources: Dict[str, _SourceRenditions] = {}
+        self._by_etag: Dict[str, Rendition] = {}
+        self._pending: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid = 0
+
+    def prepare(self, image_id: str, data: bytes, etag: str) -> None:
+        """
+        Encode the renditions of an image in the background, unless they exist or are pending.
+
+        Args:
+            image_id (str): The image id.
+            data (bytes): The source image.
+            etag (str): The content hash of the source image.
+        """
+        if not self.formats:
+            return
+        sources = self._sources.get(image_id)
+        if sources is not None and sources.source_etag == etag:
+            return
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending.get(image_id) == etag:
+                return
+            self._pending[image_id] = etag
+        executor.submit(self._encode, image_id, data, etag)
+
+    def wait(self) -> None:
+        """
+        Block until all renditions prepared so far are encoded, e.g. before forking workers.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def choose(self, image_id: str, etag: str, accept: Iterable[str], max_width: int = 0) -> Optional[Rendition]:
+        """
+        Choose the rendition to send instead of a source image.
+
+        Only renditions in an accepted format are considered. With a maximum width, the largest
+        rendition width within it is used (or the smallest width if none fits); otherwise only
+        renditions at the source width. Among those, the smallest encoding wins.
+
+        Args:
+            image_id (str): The image id.
+            etag (str): The content hash of the source image being served.
+            accept (Iterable[str]): The formats the client accepts; the source format if empty.
+            max_width (int): The maximum width the client displays, 0 for no limit.
+
+        Returns:
+            Optional[Rendition]: The rendition to send, or None to send the source image.
+        """
+        sources = self._sources.get(image_id)
+        if sources is None or sources.source_etag != etag:
+            return None
+        accepted = frozenset(format for format in accept if format in self.formats) if accept else frozenset({SOURCE_FORMAT})
+        widths = sources.widths
+        if max_width and widths:
+            width = widths[max(bisect_right(widths, max_width) - 1, 0)]
+        else:
+            width = sources.source_width
+        key = (accepted, width)
+        try:
+            return sources.choices[key]
+        except KeyError:
+            pass
+        candidates = [rendition for rendition in sources.by_width.get(width, ()) if rendition.format in accepted]
+        choice = min(candidates, key=lambda rendition: len(rendition.data)) if candidates else None
+        sources.choices[key] = choice
+        return choice
+
+    def get_by_etag(self, etag: str) -> Optional[Rendition]:
+        """
+        Return a rendition by its content hash, for GetBannerImage.
+        """
+        return self._by_etag.get(etag)
+
+    def _encode(self, image_id: str, data: bytes, etag: str) -> None:
+        try:
+            source_width, renditions = encode_renditions(data, self.formats, self.widths)
+        except Exception as e:
+            logging.error(f"Failed to encode renditions of image {image_id}: {e}")
+            source_width, renditions = 0, []
+        sources = _SourceRenditions(etag, source_width, renditions)
+        with self._lock:
+            if self._pending.get(image_id) != etag:
+                return  # Superseded by a newer version of the image
+            del self._pending[image_id]
+            previous = self._sources.get(image_id)
+            if previous is not None:
+                for old in previous.by_width.values():
+                    for rendition in old:
+                        self._by_etag.pop(rendition.etag, None)
+            for rendition in renditions:
+                self._by_etag[rendition.etag] = rendition
+            self._sources[image_id] = sources
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Must be called with the lock held. Pool threads do not survive a fork, so forked
+        # worker processes start their own pool and forget work pending in the parent.
+        if self._executor_pid != os.getpid():
+            self._executor = None
+            self._pending.clear()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="renditions")
+            self._executor_pid = os.getpid()
+        return self._executor
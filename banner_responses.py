@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from generated import banner_service_pb2
+from banner_renditions import Rendition
+
+
+class CachedResponse:
+    """
+    A GetCurrentBannerResponse together with its serialized bytes.
+
+    Field access is delegated to the wrapped message, so callers can treat it like the
+    message itself, while `SerializeToString` returns the bytes computed once at creation.
+
+    Attributes:
+        message (GetCurrentBannerResponse): The response message. Must not be modified.
+        serialized (bytes): The serialized message.
+        banner_id (Optional[str]): Id the image was looked up by, if any: the banner's, or the
+            image id of its experiment variant.
+        config_id (Optional[str]): Id of the banner config the response shows.
+        image_data (Optional[bytes]): The image bytes the response was built from.
+        embedded_image_size (int): Number of image bytes carried in the serialized message.
+    """
+
+    __slots__ = ("message", "serialized", "banner_id", "config_id", "image_data", "embedded_image_size", "_variants")
+
+    def __init__(
+        self,
+        message: banner_service_pb2.GetCurrentBannerResponse,
+        banner_id: Optional[str] = None,
+        image_data: Optional[bytes] = None,
+        config_id: Optional[str] = None
+    ):
+        self.message = message
+        self.serialized = message.SerializeToString()
+        self.banner_id = banner_id
+        self.config_id = config_id
+        self.image_data = image_data
+        self.embedded_image_size = len(message.image)
+        self._variants: Dict[str, CachedResponse] = {}
+
+    def as_not_modified(self) -> "CachedResponse":
+        """
+        Return the "not modified" variant of this response: same title, description and ETag,
+        but no image bytes.
+        """
+        return self._variant("not_modified", not_modified=True)
+
+    def as_reference(self) -> "CachedResponse":
+        """
+        Return the variant of this response that references the image by etag and image_size
+        instead of carrying its bytes.
+        """
+        return self._variant("reference")
+
+    def as_rendition(self, rendition: Rendition) -> "CachedResponse":
+        """
+        Return the variant of this response carrying a rendition of the image instead of the
+        source image.
+        """
+        return self._variant(
+            f"rendition:{rendition.etag}", rendition.data,
+            image=rendition.data, image_format=rendition.format, etag=rendition.etag, image_size=len(rendition.data)
+        )
+
+    def _variant(self, name: str, image_data: Optional[bytes] = None, **fields) -> "CachedResponse":
+        # Variants are built on first use and kept alongside the full response
+        response = self._variants.get(name)
+        if response is None:
+            message = banner_service_pb2.GetCurrentBannerResponse()
+            message.CopyFrom(self.message)
+            message.image = b""
+            for field, value in fields.items():
+                setattr(message, field, value)
+            response = CachedResponse(message, self.banner_id, image_data or self.image_data, self.config_id)
+            self._variants[name] = response
+        return response
+
+    def __getattr__(self, name: str):
+        return getattr(self.message, name)
+
+    def SerializeToString(self) -> bytes:
+        return self.serialized
+
+    def __repr__(self):
+        return f"CachedResponse(banner_id={self.banner_id}, size={len(self.serialized)})"
+
+
+def serialize_response(response) -> bytes:
+    """
+    gRPC response serializer accepting both plain messages and CachedResponse objects.
+    """
+    return response.SerializeToString()
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized responses.
+
+    The service keys responses by the selected BannerConfig or experiment variant, so
+    locations showing the same banner share one entry and a reloaded config never hits a
+    stale response.
+
+    Attributes:
+        max_entries (int): Maximum number of cached responses.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        response = self._entries.get(key)
+        if response is not None:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                pass  # Evicted concurrently
+        return response
+
+    def put(self, key: Hashable, response: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,311 @@
+import json
+import time
+import logging
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+from banner_config import BannerConfig
+from banner_index import ALL_LOCATIONS
+from banner_metrics import OTHER_LOCATION
+from banner_selection import Selection, select_banners
+from banner_timeline import BannerTimeline
+
+
+DEFAULT_HORIZON = timedelta(hours=24)
+
+# Longest the builder sleeps between checks for a stale table
+_MAX_SLEEP = 60.0
+
+
+class LocationSchedule:
+    """
+    The selections of one location over a schedule's horizon, as consecutive time ranges.
+
+    Attributes:
+        starts (List[datetime]): Start of each range; a range ends where the next one starts.
+        selections (List[Selection]): The selection that holds during each range.
+    """
+
+    __slots__ = ("starts", "selections")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.selections: List[Selection] = []
+
+    def at(self, current_time: datetime) -> Selection:
+        return self.selections[bisect_right(self.starts, current_time) - 1]
+
+
+class ScheduleTable:
+    """
+    The precomputed selection of every known location over [valid_from, valid_until).
+
+    Selection is a pure function of the location, the active banner set and the values of the
+    special conditions, all of which only change at known instants. The table resolves it once
+    per location and time range, so a lookup is a dict access plus a bisect. Consecutive ranges
+    with the same banners are merged, so a location without special conditions has one range
+    per change of its active banners.
+
+    Weighted rotation and experiment variants are still drawn per request from the selection.
+
+    Attributes:
+        source (Sequence[BannerConfig]): The banner list the table was built from.
+        locations (FrozenSet[str]): The locations with their own schedule; all others share one.
+        valid_from (datetime): First instant covered.
+        valid_until (datetime): First instant no longer covered.
+    """
+
+    def __init__(
+        self,
+        source: Sequence[BannerConfig],
+        locations: FrozenSet[str],
+        valid_from: datetime,
+        valid_until: datetime,
+        schedules: Dict[Optional[str], LocationSchedule]
+    ):
+        self.source = source
+        self.locations = locations
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+        self._schedules = schedules
+        self._other = schedules[None]
+
+    def lookup(self, location: str, current_time: datetime) -> Optional[Selection]:
+        """
+        Return the selection for a location at the given time.
+
+        Args:
+            location (str): The requested location.
+            current_time (datetime): The current time.
+
+        Returns:
+            Optional[Selection]: The selection, or None if the time is outside the table.
+        """
+        if not self.valid_from <= current_time < self.valid_until:
+            return None
+        return self._schedules.get(location, self._other).at(current_time)
+
+    def until(self, location: str, current_time: datetime) -> Optional[datetime]:
+        """
+        Return when the selection for a location at the given time may change next: the end
+        of its time range, or the end of the table. None if the time is outside the table.
+        """
+        if not self.valid_from <= current_time < self.valid_until:
+            return None
+        starts = self._schedules.get(location, self._other).starts
+        position = bisect_right(starts, current_time)
+        return starts[position] if position < len(starts) else self.valid_until
+
+    def preview(self, location: Optional[str] = None) -> List[dict]:
+        """
+        Return what a location sees over the table's horizon, for debugging and previews.
+
+        Args:
+            location (Optional[str]): The location; None for locations without configured banners.
+
+        Returns:
+            List[dict]: One entry per time range, with "from" and "until" as ISO 8601 strings
+                and "banners" holding the ids of the banners served, with their rotation weights.
+        """
+        schedule = self._schedules.get(location, self._other)
+        ends = schedule.starts[1:] + [self.valid_until]
+        return [
+            {
+                "from": start.isoformat(),
+                "until": end.isoformat(),
+                "banners": [{"id": banner.id, "weight": banner.weight} for banner in selection.banners],
+            }
+            for start, end, selection in zip(schedule.starts, ends, schedule.selections)
+        ]
+
+    def ties(self) -> List[Tuple[Optional[str], Selection]]:
+        """
+        Return the selections decided between equal-priority banners by start time or id alone,
+        once per location and pair of banners.
+        """
+        ties = {}
+        for location, schedule in self._schedules.items():
+            for selection in schedule.selections:
+                if selection.tied is not None:
+                    ties.setdefault((location, selection.banners[0].id, selection.tied.id), selection)
+        return [(location, selection) for (location, _, _), selection in ties.items()]
+
+    def ranges(self) -> int:
+        """
+        Return the total number of time ranges in the table.
+        """
+        return sum(len(schedule.starts) for schedule in self._schedules.values())
+
+
+def build_schedule(
+    source: Sequence[BannerConfig],
+    start: datetime,
+    horizon: timedelta = DEFAULT_HORIZON,
+    timeline: Optional[BannerTimeline] = None
+) -> ScheduleTable:
+    """
+    Build the schedule table of a banner list for [start, start + horizon).
+
+    Time is walked from one change to the next: timeline segment boundaries, where the active
+    set changes, and the transitions of the active special conditions. At a segment boundary
+    every location is reselected; at a condition transition only the locations with a
+    conditional candidate.
+
+    Args:
+        source (Sequence[BannerConfig]): The banner list.
+        start (datetime): The start of the horizon.
+        horizon (timedelta): The length of time covered.
+        timeline (Optional[BannerTimeline]): The timeline of `source`, if already built.
+
+    Returns:
+        ScheduleTable: The table.
+    """
+    timeline = timeline or BannerTimeline(source)
+    end = start + horizon
+    keys: List[Optional[str]] = [*sorted(timeline.locations), None]
+    schedules = {key: LocationSchedule() for key in keys}
+
+    current_time = start
+    segment = None
+    conditional: List[Optional[str]] = []
+    while current_time < end:
+        next_segment = timeline.segment_at(current_time)
+        conditions = {condition: condition(current_time) for condition in next_segment.conditions}
+        until = min(
+            [next_segment.valid_until, end] + [condition.next_transition(current_time) for condition in conditions]
+        )
+        if next_segment is not segment:
+            segment = next_segment
+            affected = keys
+            conditional = [
+                key for key in keys
+                if any(banner.condition is not None for banner in segment.index.candidates(key or ALL_LOCATIONS))
+            ]
+        else:
+            affected = conditional
+
+        for key in affected:
+            selection = select_banners(segment.index.candidates(key or ALL_LOCATIONS), conditions)
+            schedule = schedules[key]
+            if not schedule.selections or schedule.selections[-1].banners != selection.banners:
+                schedule.starts.append(current_time)
+                schedule.selections.append(selection)
+        current_time = until
+
+    return ScheduleTable(source, timeline.locations, start, end, schedules)
+
+
+class ScheduleBuilder:
+    """
+    Keeps a schedule table over a rolling horizon current, rebuilding it in a background thread.
+
+    A table is rebuilt once half of its horizon has passed, and after the banner list changes
+    (see `notify`). Until the first table is built, and while it is outdated, `table` may be
+    None or cover another banner list; callers then resolve selections themselves.
+
+    Attributes:
+        horizon (timedelta): The time covered by each table.
+        table (Optional[ScheduleTable]): The latest table, replaced with a single assignment.
+    """
+
+    def __init__(self, horizon: timedelta = DEFAULT_HORIZON):
+        self.horizon = horizon
+        self.table: Optional[ScheduleTable] = None
+        self._source: Callable[[], Sequence[BannerConfig]] = lambda: ()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self, source: Sequence[BannerConfig], current_time: datetime) -> ScheduleTable:
+        """
+        Build and publish the table for a banner list, starting at the given time.
+
+        Ties between equal-priority banners are logged once per location and table.
+        """
+        started = time.perf_counter()
+        table = build_schedule(source, current_time, self.horizon)
+        for location, selection in table.ties():
+            logging.warning(
+                f"Multiple banners with priority {selection.banners[0].priority} match for location "
+                f"{location or OTHER_LOCATION!r}. Choosing {selection.banners[0].id} over {selection.tied.id}."
+            )
+        self.table = table
+        elapsed = time.perf_counter() - started
+        logging.info(
+            f"Built schedule table for {len(table.locations)} locations until {table.valid_until.isoformat()}: "
+            f"{table.ranges()} ranges in {elapsed:.3f}s."
+        )
+        return table
+
+    def start(self, source: Callable[[], Sequence[BannerConfig]]) -> None:
+        """
+        Start the background thread.
+
+        Args:
+            source (Callable[[], Sequence[BannerConfig]]): Returns the current banner list.
+        """
+        if self.horizon <= timedelta(0) or self._thread is not None:
+            return
+        self._source = source
+        self._thread = threading.Thread(target=self._run, name="schedule-builder", daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        """
+        Wake the builder to check whether the table is outdated, e.g. after a config reload.
+        """
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def handle_request(self, query: Mapping[str, Sequence[str]]) -> Tuple[int, str]:
+        """
+        Preview the current table for an HTTP request to the schedule endpoint.
+
+        Args:
+            query (Mapping[str, Sequence[str]]): The parsed query string. Each "location"
+                parameter selects a location to preview; all known locations by default.
+                Locations without configured banners are previewed as "other".
+
+        Returns:
+            Tuple[int, str]: The HTTP status and the JSON response body.
+        """
+        table = self.table
+        if table is None:
+            return 503, json.dumps({"error": "The schedule table is not built yet."}) + "\n"
+        locations = query.get("location") or [*sorted(table.locations), OTHER_LOCATION]
+        preview = {
+            "valid_from": table.valid_from.isoformat(),
+            "valid_until": table.valid_until.isoformat(),
+            "locations": {
+                location: table.preview(location if location in table.locations else None)
+                for location in locations
+            },
+        }
+        return 200, json.dumps(preview, indent=2) + "\n"
+
+    def _run(self) -> None:
+        while not self._stopped:
+            # Clear before checking so a notification arriving meanwhile triggers another pass
+            self._wake.clear()
+            current_time = datetime.now(timezone.utc)
+            table = self.table
+            try:
+                source = self._source()
+                if table is None or table.source is not source or current_time >= self._refresh_due(table):
+                    table = self.refresh(source, current_time)
+                timeout = (self._refresh_due(table) - current_time).total_seconds()
+            except Exception as e:
+                logging.error(f"Error building the schedule table: {e}")
+                timeout = 1.0
+            self._wake.wait(min(max(timeout, 0.0), _MAX_SLEEP))
+
+    def _refresh_due(self, table: ScheduleTable) -> datetime:
+        return table.valid_from + (table.valid_until - table.valid_from) / 2
@@ -0,0 +1,108 @@
+import random
+from bisect import bisect_right
+from hashlib import blake2b
+from itertools import accumulate
+from typing import Dict, Optional, Sequence, Tuple
+
+from banner_config import BannerConfig, BannerVariant, Condition
+
+
+class Selection:
+    """
+    The banners that can be served for a location while the active set and the special
+    condition values stay the same.
+
+    Usually a single banner. When the winning banners share a priority and have weights, the
+    selection rotates between them in proportion to their weights.
+
+    Attributes:
+        banners (Tuple[BannerConfig, ...]): The selected banners; empty if none matched.
+        cumulative_weights (Tuple[int, ...]): Running totals of the weights, for rotation.
+        tied (Optional[BannerConfig]): A matching banner with the same priority as the first
+            one that lost only by start time or id, if any.
+    """
+
+    __slots__ = ("banners", "cumulative_weights", "tied", "_total")
+
+    def __init__(self, banners: Tuple[BannerConfig, ...], tied: Optional[BannerConfig] = None):
+        self.banners = banners
+        self.tied = tied
+        self.cumulative_weights = tuple(accumulate(banner.weight for banner in banners)) if len(banners) > 1 else ()
+        self._total = self.cumulative_weights[-1] if self.cumulative_weights else 0
+
+    def pick(self, rng: random.Random) -> Optional[BannerConfig]:
+        """
+        Return the banner to serve for one request, or None if no banner matched.
+        """
+        if not self._total:
+            return self.banners[0] if self.banners else None
+        return self.banners[bisect_right(self.cumulative_weights, rng.random() * self._total)]
+
+    def __repr__(self):
+        return f"Selection(banners={[banner.id for banner in self.banners]})"
+
+
+NO_SELECTION = Selection(())
+
+
+def select_banners(candidates: Sequence[BannerConfig], conditions: Dict[Condition, bool]) -> Selection:
+    """
+    Select the banners to serve from a location's candidates.
+
+    Candidates are in selection order (see BannerIndex), so the first banner whose special
+    condition holds wins and the rest are not evaluated. Only if the winner has a weight are
+    the following banners of the same priority checked, to rotate between all matching
+    weighted banners of that priority. An unweighted banner of the same priority ends the scan
+    and is reported as `tied`, since the winner was then decided by start time or id alone.
+
+    Args:
+        candidates (Sequence[BannerConfig]): The location's active banners, in selection order.
+        conditions (Dict[Condition, bool]): Current values of the special conditions.
+
+    Returns:
+        Selection: The selected banners.
+    """
+    for position, banner in enumerate(candidates):
+        if banner.condition is None or conditions[banner.condition]:
+            break
+    else:
+        return NO_SELECTION
+
+    group = [banner]
+    for other in candidates[position + 1:]:
+        if other.priority != banner.priority:
+            break
+        if other.condition is not None and not conditions[other.condition]:
+            continue
+        if banner.weight is None or other.weight is None:
+            return Selection(tuple(group), tied=other)
+        group.append(other)
+    return Selection(tuple(group))
+
+
+def assign_variant(banner: BannerConfig, user_id: str, rng: random.Random) -> Optional[BannerVariant]:
+    """
+    Assign a user to one of a banner's experiment variants.
+
+    The assignment is a hash of the banner and user id mapped onto the cumulative variant
+    weights, so a user sees the same variant on every request and every worker process
+    without any stored state, and users of different experiments are assigned independently.
+    Requests without a user id get a random variant.
+
+    Args:
+        banner (BannerConfig): The selected banner.
+        user_id (str): The user or session id from the request, or "".
+        rng (random.Random): Source of randomness for requests without a user id.
+
+    Returns:
+        Optional[BannerVariant]: The variant to show, or None if the banner has no variants.
+    """
+    weights = banner.variant_weights
+    if not weights:
+        return None
+    if user_id:
+        digest = blake2b(f"{banner.id}\0{user_id}".encode(), digest_size=8).digest()
+        point = (int.from_bytes(digest, "little") * weights[-1]) >> 64
+    else:
+        point = rng.randrange(weights[-1])
+    return banner.variants[bisect_right(weights, point)]
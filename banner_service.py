@@ -1,9 +1,17 @@
 import grpc
-from typing import Optional
+import asyncio
+import argparse
+import signal
+import contextvars
+import functools
+import threading
+import time
+import random
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from grpc import ServicerContext
 from concurrent import futures
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import sys
 import os
@@ -11,11 +19,70 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "generated"))
 
 from generated import banner_service_pb2, banner_service_pb2_grpc
-from banner_config import load_configs, BannerConfig
+from banner_compression import ALGORITHMS, CompressionPolicy
+from banner_config import load_configs, BannerConfig, BannerVariant
+from banner_images import ImageStore
+from banner_logging import HotPathLogger, start_queue_logging, stop_queue_logging
+from banner_metrics import (
+    DEFAULT_METRICS_HOST, OTHER_LOCATION, AsyncMetricsInterceptor, BannerMetrics, MetricsInterceptor, MetricsServer
+)
+from banner_profiling import AsyncProfilingInterceptor, Profiler, ProfilingInterceptor, RequestTrace, current_trace
+from banner_metadata import VALID_FOR_METADATA
+from banner_responses import CachedResponse, ResponseCache, serialize_response
+from banner_reload import ConfigWatcher
+from banner_schedule import ScheduleBuilder
+from banner_renditions import SOURCE_FORMAT, RenditionCache
+from banner_selection import Selection, assign_variant, select_banners
+from banner_snapshot import load_snapshot
+from banner_supervisor import Supervisor
+from banner_watch import BannerScheduler
+from banner_timeline import BannerTimeline, TimelineSegment
+
+
+# Optional compiled config snapshot (see banner_snapshot.py), loaded instead of the JSON files
+CONFIG_SNAPSHOT = os.environ.get("BANNER_CONFIG_SNAPSHOT")
+# Optional NDJSON bundle with one config per line, loaded instead of the JSON files
+CONFIG_BUNDLE = os.environ.get("BANNER_CONFIG_BUNDLE")
+
+
+def load_banners() -> List[BannerConfig]:
+    """
+    Load the banner configurations from the compiled snapshot, the bundle or the config
+    directory, whichever is configured.
+    """
+    if CONFIG_SNAPSHOT:
+        return load_snapshot(CONFIG_SNAPSHOT)
+    if CONFIG_BUNDLE:
+        return load_configs(CONFIG_BUNDLE)
+    return load_configs()
 
 
 # Load all banner configurations
-banners = load_configs()
+banners = load_banners()
+
+
+def set_banners(snapshot: Sequence[BannerConfig]) -> None:
+    """
+    Atomically replace the banner configurations used by the service.
+
+    Requests in flight keep using the snapshot they started with; derived indexes and caches
+    are rebuilt on the next request that sees the new snapshot.
+
+    Args:
+        snapshot (Sequence[BannerConfig]): The new, immutable banner list.
+    """
+    global banners
+    banners = snapshot
+
+# Chunk size for streaming images with GetBannerImage
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+# Threads of the thread-pool server kept for unary calls and short streams
+REQUEST_WORKERS = 10
+# WatchBanner streams each hold a thread for their lifetime; the server gets this many more
+DEFAULT_MAX_WATCH_STREAMS = 100
+
+_MILLISECOND = timedelta(milliseconds=1)
 
 DEFAULT_BANNER = BannerConfig(
     id="default",
@@ -28,11 +95,52 @@ DEFAULT_BANNER = BannerConfig(
 
 
 class BannerService(banner_service_pb2_grpc.BannerServiceServicer):
+    def __init__(
+        self,
+        image_store: Optional[ImageStore] = None,
+        response_cache: Optional[ResponseCache] = None,
+        metrics: Optional[BannerMetrics] = None,
+        renditions: Optional[RenditionCache] = None,
+        compression: Optional[CompressionPolicy] = None,
+        schedule: Optional[ScheduleBuilder] = None,
+        max_watch_streams: int = DEFAULT_MAX_WATCH_STREAMS
+    ):
+        """
+        Args:
+            image_store (Optional[ImageStore]): Store used to serve banner images. Defaults to a new
+                in-memory store over `resources/content`.
+            response_cache (Optional[ResponseCache]): Cache of serialized responses. Defaults to a new cache.
+            metrics (Optional[BannerMetrics]): Metrics to record into. Defaults to a new set of metrics.
+            renditions (Optional[RenditionCache]): Optimized renditions of the images. Defaults to a new cache.
+            compression (Optional[CompressionPolicy]): When to compress responses. Defaults to never.
+            schedule (Optional[ScheduleBuilder]): Precomputed selections per location. Defaults to a
+                builder that is not started, so selections are resolved on demand.
+            max_watch_streams (int): Most concurrent WatchBanner streams; more are rejected with
+                RESOURCE_EXHAUSTED. Only enforced by the thread-pool service.
+        """
+        self.images = image_store or ImageStore()
+        self.responses = response_cache or ResponseCache()
+        self.metrics = metrics or BannerMetrics()
+        self.renditions = renditions or RenditionCache()
+        self.compression = compression or CompressionPolicy()
+        self.schedule = schedule or ScheduleBuilder()
+        self.log = HotPathLogger()
+        self.log.summarize(
+            "default_fallback", logging.WARNING,
+            "%(count)d requests fell back to the default banner for location %(label)s in the last %(interval).0fs."
+        )
+        self._timeline: Optional[BannerTimeline] = None
+        self._segment: Optional[TimelineSegment] = None
+        self._conditions: Optional[_ConditionState] = None
+        self._rng = random.Random()
+        self.scheduler = BannerScheduler(self)
+        self._watch_slots = threading.BoundedSemaphore(max_watch_streams)
+
     def GetCurrentBanner(
         self, 
         request: banner_service_pb2.GetCurrentBannerRequest, 
         context: ServicerContext
-    ) -> banner_service_pb2.GetCurrentBannerResponse:
+    ) -> CachedResponse:
         """
         Handle the GetCurrentBanner gRPC request.
 
@@ -41,69 +149,502 @@ class BannerService(banner_service_pb2_grpc.BannerServiceServicer):
             context (ServicerContext): The context of the gRPC call.
 
         Returns:
-            GetCurrentBannerResponse: The response with banner data, based on time and location.
+            CachedResponse: The serialized response with banner data, based on time and location.
+        """
+        current_time = datetime.now(timezone.utc)
+        response = self.get_response(request.location, current_time, request.user_id)
+        response = self._response_variant(request, response)
+        self.compression.apply(context, len(response.serialized), response.embedded_image_size)
+        self._send_valid_until(context, self.valid_until(request.location, current_time), current_time)
+        trace = current_trace()
+        if trace is not None:
+            trace.mark("negotiation")
+        return response
+
+    def GetBanners(
+        self,
+        request: banner_service_pb2.GetBannersRequest,
+        context: ServicerContext
+    ) -> banner_service_pb2.GetBannersResponse:
+        """
+        Handle the GetBanners gRPC request.
+
+        Resolves all requested locations against the same point in time. Each distinct banner
+        is included once and referenced by id from the per-location placements.
+
+        Args:
+            request (GetBannersRequest): The incoming gRPC request containing the locations.
+            context (ServicerContext): The context of the gRPC call.
+
+        Returns:
+            GetBannersResponse: The selected banner id per location and the distinct banners.
         """
-        # Extract location and current time
-        location = request.location
         current_time = datetime.now(timezone.utc)
+        response = self.get_banners(
+            request.locations, current_time, request.user_id, request.accept_formats, request.max_width
+        )
+        self.compression.apply(context, response.ByteSize(), sum(len(banner.image) for banner in response.banners))
+        if request.locations:
+            valid_until = min(self.valid_until(location, current_time) for location in request.locations)
+            self._send_valid_until(context, valid_until, current_time)
+        return response
+
+    def get_banners(
+        self,
+        locations: Sequence[str],
+        current_time: datetime,
+        user_id: str = "",
+        accept_formats: Sequence[str] = (),
+        max_width: int = 0
+    ) -> banner_service_pb2.GetBannersResponse:
+        """
+        Resolve the banners for several locations at the given time.
+
+        Args:
+            locations (Sequence[str]): The requested locations.
+            current_time (datetime): The current time.
+            user_id (str): The user or session id, for experiment variant assignment.
+            accept_formats (Sequence[str]): Image formats the client can display.
+            max_width (int): Widest image the client displays in pixels, 0 for no limit.
+
+        Returns:
+            GetBannersResponse: The selected banner id per location and the distinct banners.
+        """
+        response = banner_service_pb2.GetBannersResponse()
+        included = set()
+        for location in dict.fromkeys(locations):
+            banner_response = self.get_response(location, current_time, user_id)
+            # A variant's image may be another banner's, so placements use the selected config's id
+            banner_id = banner_response.config_id
+            variant = banner_response.variant
+            response.placements.add(location=location, banner_id=banner_id, variant=variant)
+            if (banner_id, variant) not in included:
+                included.add((banner_id, variant))
+                banner_response = self._with_rendition(banner_response, accept_formats, max_width)
+                response.banners.add(
+                    id=banner_id,
+                    title=banner_response.title,
+                    description=banner_response.description,
+                    image=banner_response.image_data or b"",
+                    image_format=banner_response.image_format,
+                    variant=variant
+                )
+        return response
+
+    def GetBannerImage(
+        self,
+        request: banner_service_pb2.GetBannerImageRequest,
+        context: ServicerContext
+    ) -> Iterator[banner_service_pb2.BannerImageChunk]:
+        """
+        Handle the GetBannerImage gRPC request.
+
+        Streams the bytes of a cached image by content hash. The bytes for a hash never change,
+        so clients can cache them indefinitely.
+
+        Args:
+            request (GetBannerImageRequest): The incoming gRPC request containing the image id (etag).
+            context (ServicerContext): The context of the gRPC call.
+
+        Yields:
+            BannerImageChunk: Consecutive chunks of the image.
+        """
+        image_data, image_format = self._image_by_etag(request.image_id)
+        if image_data is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Image {request.image_id} not found.")
+        yield from _image_chunks(image_data, image_format)
+
+    def WatchBanner(
+        self,
+        request: banner_service_pb2.WatchBannerRequest,
+        context: ServicerContext
+    ) -> Iterator[CachedResponse]:
+        """
+        Handle the WatchBanner gRPC request.
+
+        Streams the current banner for the location, then a new message each time the selected
+        banner changes, until the client cancels.
+
+        Each stream holds a server thread while it is open. At most `max_watch_streams` are
+        served at once, from threads the server has on top of those for unary calls (see
+        `serve`), so watchers can never lock out other callers.
+
+        Args:
+            request (WatchBannerRequest): The incoming gRPC request containing the location.
+            context (ServicerContext): The context of the gRPC call.
+
+        Yields:
+            CachedResponse: The serialized response with banner data.
+        """
+        if not self._watch_slots.acquire(blocking=False):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Too many WatchBanner streams; use the aio server for more.")
+        try:
+            yield from self._watch(request, context)
+        finally:
+            self._watch_slots.release()
 
-        # Filter banners based on time and location
-        matching_banners = [
-            banner for banner in banners
-            if banner.start_time <= current_time <= banner.end_time and
-               (location in banner.locations or "ALL" in banner.locations) and
-               self._is_special_condition_met(banner.special_condition, current_time)
-        ]
-
-        if not matching_banners:
-            logging.error("No matching banners found. Returning default banner.")
-            return self._create_response(DEFAULT_BANNER, "png")
-        
-        if len(matching_banners) > 1:
-            logging.warning(f"Multiple banners match the criteria. Choosing the first one: {matching_banners[0].id}")
-
-        # Choose the first matching banner
-        selected_banner = matching_banners[0]
-
-        # Prepare image path and read image data
-        image_path = f"resources/content/{selected_banner.id}.png"
+    def _watch(self, request: banner_service_pb2.WatchBannerRequest, context: ServicerContext) -> Iterator[CachedResponse]:
+        pending = threading.Event()
+        subscription = self.scheduler.subscribe(request.location, pending.set)
+        context.add_callback(pending.set)  # Wake up to notice cancellation
         try:
-            with open(image_path, "rb") as image_file:
-                image_data = image_file.read()
-        except FileNotFoundError:
-            logging.error(f"Image not found for banner ID {selected_banner.id}. Returning default banner.")
-            return self._create_response(DEFAULT_BANNER, "png")
+            while context.is_active():
+                pending.wait()
+                pending.clear()
+                response = subscription.take()
+                if response is not None:
+                    yield response
+        finally:
+            self.scheduler.unsubscribe(subscription)
+
+    def get_response(self, location: str, current_time: datetime, user_id: str = "") -> CachedResponse:
+        """
+        Resolve the banner response for a location at the given time.
+
+        Args:
+            location (str): The requested location.
+            current_time (datetime): The current time.
+            user_id (str): The user or session id, for experiment variant assignment.
+
+        Returns:
+            CachedResponse: The serialized response with banner data.
+        """
+        trace = current_trace()
+        banner, location_label = self._pick_banner(location, current_time)
+        variant = assign_variant(banner, user_id, self._rng) if banner is not None else None
+        if trace is not None:
+            trace.mark("selection")
+
+        # Hot banners are served from already-serialized bytes
+        cache_key = variant or banner or DEFAULT_BANNER
+        response = self.responses.get(cache_key)
+        if response is not None and self._is_response_current(response):
+            self._record_response(location_label, response, "hit")
+            if trace is not None:
+                trace.mark("cache_lookup")
+            return response
+        if trace is not None:
+            trace.mark("cache_lookup")
+
+        response = self._load_response(location, banner, variant, location_label)
+        self.responses.put(cache_key, response)
+        self._record_response(location_label, response, "miss")
+        return response
+
+    def _response_variant(self, request: banner_service_pb2.GetCurrentBannerRequest, response: CachedResponse) -> CachedResponse:
+        """
+        Return the variant of the response the request asked for: "not modified" if the client
+        already has the image, a reference without image bytes, or the full response. The image
+        is replaced by the best ready rendition for the client's formats and width, if any.
+        """
+        response = self._with_rendition(response, request.accept_formats, request.max_width)
+        if request.if_none_match and request.if_none_match == response.etag:
+            return response.as_not_modified()
+        if request.image_by_reference:
+            return response.as_reference()
+        return response
+
+    def _with_rendition(self, response: CachedResponse, accept_formats: Sequence[str], max_width: int) -> CachedResponse:
+        """
+        Return the response with its image replaced by the best ready rendition for the client's
+        formats and width, or the response itself if there is none.
+        """
+        if response.image_data is not None:
+            rendition = self.renditions.choose(response.banner_id, response.etag, accept_formats, max_width)
+            if rendition is not None:
+                return response.as_rendition(rendition)
+        return response
+
+    def next_change(self, current_time: datetime) -> datetime:
+        """
+        Return the next time at which the response for any location may change.
+
+        Args:
+            current_time (datetime): The current time.
+
+        Returns:
+            datetime: The end of the current timeline segment, or the next transition of a
+                special condition of the active banners if that comes first.
+        """
+        return self._get_condition_state(current_time).valid_until
+
+    def valid_until(self, location: str, current_time: datetime) -> datetime:
+        """
+        Return the next time at which the banner selected for a location may change.
+
+        From the schedule table this is the end of the location's current time range; without
+        a current table it is `next_change`, the next change for any location.
+
+        Args:
+            location (str): The requested location.
+            current_time (datetime): The current time.
 
-        return self._create_response(selected_banner, "png", image_data)
+        Returns:
+            datetime: The time until which the location's selection holds.
+        """
+        table = self.schedule.table
+        if table is not None and table.source is banners:
+            until = table.until(location, current_time)
+            if until is not None:
+                return until
+        return self.next_change(current_time)
+
+    def _send_valid_until(self, context: Optional[ServicerContext], valid_until: datetime, current_time: datetime) -> None:
+        """
+        Tell the client for how long the response holds, as trailing metadata, so it can cache it.
+        """
+        if context is not None:
+            milliseconds = int((valid_until - current_time) / _MILLISECOND)
+            context.set_trailing_metadata(((VALID_FOR_METADATA, str(milliseconds)),))
+
+    def watch_response(self, location: str, current_time: datetime) -> CachedResponse:
+        """
+        Resolve the banner response pushed to the WatchBanner streams of a location.
+
+        One response is fanned out to all watchers of a location and streams carry no user id,
+        so it must not depend on chance: a weighted rotation is represented by its first banner
+        and an experiment by its first variant. Nothing is recorded in the request metrics,
+        since no request is being answered.
+
+        Args:
+            location (str): The watched location.
+            current_time (datetime): The current time.
+
+        Returns:
+            CachedResponse: The serialized response with banner data.
+        """
+        selection, location_label = self._selection(location, current_time)
+        banner = selection.banners[0] if selection.banners else None
+        variant = banner.variants[0] if banner is not None and banner.variants else None
+        cache_key = variant or banner or DEFAULT_BANNER
+        response = self.responses.get(cache_key)
+        if response is None or not self._is_response_current(response):
+            response = self._load_response(location, banner, variant, location_label, record=False)
+            self.responses.put(cache_key, response)
+        return response
+
+    def _pick_banner(self, location: str, current_time: datetime) -> Tuple[Optional[BannerConfig], str]:
+        """
+        Pick the banner to serve for one request, or None if no banner matches, along with the
+        location as recorded in metrics.
+        """
+        selection, location_label = self._selection(location, current_time)
+        return selection.pick(self._rng), location_label
+
+    def _selection(self, location: str, current_time: datetime) -> Tuple[Selection, str]:
+        """
+        Return the selection for a location at the given time, along with the location as
+        recorded in metrics.
+
+        The selection is looked up in the precomputed schedule table. If the table is not built
+        yet, outdated or does not cover the time, it is resolved from the condition state instead.
+        """
+        table = self.schedule.table
+        if table is not None and table.source is banners:
+            selection = table.lookup(location, current_time)
+            if selection is not None:
+                return selection, location if location in table.locations else OTHER_LOCATION
+        self.schedule.notify()
+        state = self._get_condition_state(current_time)
+        location_label = self._location_label(location)
+        return self._selection_from_state(location, state, location_label), location_label
+
+    def _selection_from_state(self, location: str, state: "_ConditionState", location_label: str) -> Selection:
+        """
+        Return the selection for a location from the condition state.
+
+        The selection for a location is computed once per condition state, since it only
+        depends on the active banner set and the values of their special conditions; each
+        request then only draws from it.
+        """
+        # Locations without configured banners share the "ALL" candidates and one selection
+        key = location if location in self._timeline.locations else None
+        selection = state.selections.get(key)
+        if selection is None:
+            selection = self._select(location, state, location_label)
+            state.selections[key] = selection
+        return selection
 
-    def _is_special_condition_met(self, special_condition: str|None, current_time: datetime) -> bool:
+    def _select(self, location: str, state: "_ConditionState", location_label: str) -> Selection:
         """
-        Evaluate if the special condition for a banner is met.
+        Select the banners for a location from its candidates in the current segment.
 
         Args:
-            special_condition (str): The special condition to evaluate.
-            current_time (datetime): The current time to evaluate against.
+            location (str): The requested location.
+            state (_ConditionState): The current segment and values of its special conditions.
+            location_label (str): The location as recorded in metrics.
 
         Returns:
-            bool: True if the condition is met, otherwise False.
-        """
-        if not special_condition:
-            return True  # No special condition means always valid
-        
-        match special_condition:
-            case "odd-minutes":
-                return current_time.minute % 2 != 0
-            case "even-minutes":
-                return current_time.minute % 2 == 0
-            case _:
-                logging.warning(f"Unrecognized special condition: {special_condition}")
-                return False
+            Selection: The banners to serve until the condition state changes.
+        """
+        started = time.perf_counter()
+        selection = select_banners(state.segment.index.candidates(location), state.results)
+        self.metrics.selection_latency.observe(time.perf_counter() - started, location_label)
+        if selection.tied is not None:
+            self.log.warning(
+                "multiple_matches", "Multiple banners with priority %d match for location %r. Choosing %s over %s.",
+                selection.banners[0].priority, location, selection.banners[0].id, selection.tied.id
+            )
+        return selection
+
+    def _record_response(self, location_label: str, response: CachedResponse, cache_result: str) -> None:
+        """
+        Record a served response in the metrics and the default banner summary.
+        """
+        self.metrics.response_cache.inc(location_label, cache_result)
+        if response.image_data is None:
+            reason = "no_match" if response.banner_id is None else "image_not_found"
+            self.metrics.default_banner.inc(location_label, reason)
+            self.log.count("default_fallback", location_label)
+
+    def _location_label(self, location: str) -> str:
+        """
+        Return the location as recorded in metrics. Locations without any configured banner are
+        grouped, so arbitrary client input cannot create unbounded numbers of series.
+        """
+        return location if location in self._timeline.locations else OTHER_LOCATION
+
+    def _is_response_current(self, response: CachedResponse) -> bool:
+        """
+        Check that a cached response was built from the current image in the image store.
+        """
+        return response.banner_id is None or self.images.current_etag(response.banner_id) == response.etag
+
+    def _load_response(
+        self,
+        location: str,
+        banner: Optional[BannerConfig],
+        variant: Optional[BannerVariant] = None,
+        location_label: str = OTHER_LOCATION,
+        record: bool = True
+    ) -> CachedResponse:
+        """
+        Load the image of a selected banner and build its response.
+
+        Args:
+            location (str): The requested location.
+            banner (Optional[BannerConfig]): The selected banner, or None if no banner matched.
+            variant (Optional[BannerVariant]): The experiment variant assigned, if the banner has variants.
+            location_label (str): The location as recorded in metrics.
+            record (bool): Whether to record the request in the metrics.
+
+        Returns:
+            CachedResponse: The serialized response for the banner, or for the default banner.
+        """
+        if banner is None:
+            self.log.error("no_match", "No matching banners found for location %r. Returning default banner.", location)
+            return self._build_response(location_label, DEFAULT_BANNER, record=record)
+
+        # Fetch image data from the in-memory store
+        image_id = variant.image_id if variant is not None else banner.id
+        started = time.perf_counter()
+        image_data = self.images.get(image_id)
+        if record:
+            self.metrics.image_load_latency.observe(time.perf_counter() - started, location_label)
+        trace = current_trace()
+        if trace is not None:
+            trace.mark("image_fetch")
+        if image_data is None:
+            self.log.error("image_not_found", "Image not found for banner ID %s. Returning default banner.", image_id)
+            if record:
+                self.metrics.image_not_found.inc(location_label)
+            return self._build_response(location_label, DEFAULT_BANNER, banner_id=image_id, record=record)
+
+        return self._build_response(location_label, banner, image_data, image_id, variant, record)
+
+    def _build_response(
+        self,
+        location_label: str,
+        banner: BannerConfig,
+        image_data: Optional[bytes] = None,
+        banner_id: Optional[str] = None,
+        variant: Optional[BannerVariant] = None,
+        record: bool = True
+    ) -> CachedResponse:
+        """
+        Build and serialize the response for a banner, recording the time it takes unless
+        `record` is False. `banner_id` is the id its image was looked up by.
+        """
+        started = time.perf_counter()
+        if image_data is None:
+            response = CachedResponse(self._create_response(banner, SOURCE_FORMAT), banner_id, config_id=banner.id)
+        else:
+            etag = self.images.etag(banner_id, image_data)
+            message = self._create_response(banner, SOURCE_FORMAT, image_data, etag, variant)
+            self.renditions.prepare(banner_id, image_data, etag)  # Encoded in the background
+            response = CachedResponse(message, banner_id, image_data, banner.id)
+        if record:
+            self.metrics.serialization_latency.observe(time.perf_counter() - started, location_label)
+        trace = current_trace()
+        if trace is not None:
+            trace.mark("proto_build")
+        return response
+
+    def _image_by_etag(self, etag: str) -> Tuple[Optional[bytes], str]:
+        """
+        Return the bytes and format of a source image or rendition by content hash.
+        """
+        image_data = self.images.get_by_etag(etag)
+        if image_data is not None:
+            return image_data, SOURCE_FORMAT
+        rendition = self.renditions.get_by_etag(etag)
+        if rendition is not None:
+            return rendition.data, rendition.format
+        return None, SOURCE_FORMAT
+
+    def _get_segment(self, current_time: datetime) -> TimelineSegment:
+        """
+        Return the timeline segment holding the banners active at the given time.
+
+        The cached segment is reused until the time crosses its next boundary or `banners` is
+        replaced, so most requests only compare against the cached boundary. New timelines and
+        segments are swapped in with a single assignment so concurrent requests never see a
+        partially built one.
+
+        Args:
+            current_time (datetime): The current time.
+
+        Returns:
+            TimelineSegment: The segment containing the current time.
+        """
+        segment = self._segment
+        timeline = self._timeline
+        if timeline is None or timeline.source is not banners:
+            timeline = BannerTimeline(banners)
+            self._timeline = timeline
+            segment = None
+        if segment is None or not segment.contains(current_time):
+            segment = timeline.segment_at(current_time)
+            self._segment = segment
+        return segment
+
+    def _get_condition_state(self, current_time: datetime) -> "_ConditionState":
+        """
+        Return the values of the active special conditions at the given time.
+
+        Like the segment, the state is reused until the time reaches the next point at which
+        a condition can flip, so conditions are evaluated once per transition, not per request.
+
+        Args:
+            current_time (datetime): The current time.
+
+        Returns:
+            _ConditionState: The condition values and the time range they hold for.
+        """
+        segment = self._get_segment(current_time)
+        state = self._conditions
+        if state is None or state.segment is not segment or not state.contains(current_time):
+            state = _ConditionState(segment, current_time)
+            self._conditions = state
+        return state
 
     def _create_response(
         self, 
         banner: BannerConfig, 
         image_format: str, 
-        image_data: Optional[bytes] = None
+        image_data: Optional[bytes] = None,
+        etag: str = "",
+        variant: Optional[BannerVariant] = None
     ) -> banner_service_pb2.GetCurrentBannerResponse:
         """
         Create a GetCurrentBannerResponse object.
@@ -112,28 +653,553 @@ class BannerService(banner_service_pb2_grpc.BannerServiceServicer):
             banner (BannerConfig): The banner configuration to include in the response.
             image_format (str): The format of the image (e.g., 'png').
             image_data (Optional[bytes]): The image data in bytes.
+            etag (str): The content hash of the image data.
+            variant (Optional[BannerVariant]): The experiment variant whose title and description to show.
 
         Returns:
             GetCurrentBannerResponse: The response with banner data.
         """
+        content = variant or banner
         # Return response with banner data
         return banner_service_pb2.GetCurrentBannerResponse(
-            title=banner.title,
-            description=banner.description,
+            title=content.title,
+            description=content.description,
             image=image_data or b"",  # Default empty image if not found
+            image_format=image_format,
+            etag=etag,
+            image_size=len(image_data or b""),
+            variant=variant.id if variant is not None else ""
+        )
+
+
+class _ConditionState:
+    """
+    Values of a segment's special conditions over the range [valid_from, valid_until) in which
+    none of them changes, and the selections made from them so far.
+    """
+
+    __slots__ = ("segment", "valid_from", "valid_until", "results", "selections")
+
+    def __init__(self, segment: TimelineSegment, current_time: datetime):
+        self.segment = segment
+        self.valid_from = current_time
+        self.valid_until = min(
+            [segment.valid_until] + [condition.next_transition(current_time) for condition in segment.conditions]
+        )
+        self.results = {condition: condition(current_time) for condition in segment.conditions}
+        self.selections: Dict[Optional[str], Selection] = {}
+
+    def contains(self, current_time: datetime) -> bool:
+        return self.valid_from <= current_time < self.valid_until
+
+
+def _image_chunks(image_data: bytes, image_format: str = SOURCE_FORMAT) -> Iterator[banner_service_pb2.BannerImageChunk]:
+    view = memoryview(image_data)
+    for offset in range(0, len(image_data), IMAGE_CHUNK_SIZE):
+        yield banner_service_pb2.BannerImageChunk(
+            data=view[offset:offset + IMAGE_CHUNK_SIZE].tobytes(),
+            offset=offset,
+            total_size=len(image_data),
             image_format=image_format
         )
 
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    banner_service_pb2_grpc.add_BannerServiceServicer_to_server(BannerService(), server)
+def _in_context(trace: Optional[RequestTrace], function: Callable) -> Callable:
+    """
+    Return `function` to run in an executor. Executors do not inherit context variables, so a
+    sampled request's trace is carried over by running it in a copy of the current context.
+    """
+    if trace is None:
+        return function
+    return functools.partial(contextvars.copy_context().run, function)
+
+
+class AsyncBannerService(BannerService):
+    """
+    BannerService for the grpc.aio server.
+
+    Requests answered from the response cache with images already in memory are handled on the
+    event loop. Anything that may touch the disk, such as an image load or revalidation, runs
+    in a thread pool so the loop is never blocked.
+    """
+
+    def __init__(
+        self,
+        image_store: Optional[ImageStore] = None,
+        response_cache: Optional[ResponseCache] = None,
+        executor: Optional[futures.Executor] = None,
+        metrics: Optional[BannerMetrics] = None,
+        renditions: Optional[RenditionCache] = None,
+        compression: Optional[CompressionPolicy] = None,
+        schedule: Optional[ScheduleBuilder] = None
+    ):
+        """
+        Args:
+            image_store (Optional[ImageStore]): Store used to serve banner images.
+            response_cache (Optional[ResponseCache]): Cache of serialized responses.
+            executor (Optional[futures.Executor]): Executor for blocking work. Defaults to the loop's default executor.
+            metrics (Optional[BannerMetrics]): Metrics to record into.
+            renditions (Optional[RenditionCache]): Optimized renditions of the images.
+            compression (Optional[CompressionPolicy]): When to compress responses.
+            schedule (Optional[ScheduleBuilder]): Precomputed selections per location.
+        """
+        super().__init__(image_store, response_cache, metrics, renditions, compression, schedule)
+        self._executor = executor
+
+    async def GetCurrentBanner(
+        self,
+        request: banner_service_pb2.GetCurrentBannerRequest,
+        context: grpc.aio.ServicerContext
+    ) -> CachedResponse:
+        """
+        Handle the GetCurrentBanner gRPC request without blocking the event loop.
+
+        Args:
+            request (GetCurrentBannerRequest): The incoming gRPC request containing the location.
+            context (grpc.aio.ServicerContext): The context of the gRPC call.
+
+        Returns:
+            CachedResponse: The serialized response with banner data, based on time and location.
+        """
+        trace = current_trace()
+        current_time = datetime.now(timezone.utc)
+        banner, location_label = self._pick_banner(request.location, current_time)
+        variant = assign_variant(banner, request.user_id, self._rng) if banner is not None else None
+        if trace is not None:
+            trace.mark("selection")
+        response = self.responses.get(variant or banner or DEFAULT_BANNER)
+        if response is not None and (response.banner_id is None or self.images.is_fresh(response.banner_id)):
+            if self._is_response_current(response):
+                self._record_response(location_label, response, "hit")
+                if trace is not None:
+                    trace.mark("cache_lookup")
+                response = self._response_variant(request, response)
+                self.compression.apply(context, len(response.serialized), response.embedded_image_size)
+                self._send_valid_until(context, self.valid_until(request.location, current_time), current_time)
+                if trace is not None:
+                    trace.mark("negotiation")
+                return response
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _in_context(trace, super().GetCurrentBanner), request, context)
+
+    async def GetBanners(
+        self,
+        request: banner_service_pb2.GetBannersRequest,
+        context: grpc.aio.ServicerContext
+    ) -> banner_service_pb2.GetBannersResponse:
+        """
+        Handle the GetBanners gRPC request in the executor, since it may load images.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _in_context(current_trace(), super().GetBanners), request, context)
+
+    async def GetBannerImage(
+        self,
+        request: banner_service_pb2.GetBannerImageRequest,
+        context: grpc.aio.ServicerContext
+    ) -> AsyncIterator[banner_service_pb2.BannerImageChunk]:
+        """
+        Handle the GetBannerImage gRPC request on the event loop; images are served from memory.
+        """
+        image_data, image_format = self._image_by_etag(request.image_id)
+        if image_data is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"Image {request.image_id} not found.")
+        for chunk in _image_chunks(image_data, image_format):
+            yield chunk
+
+    async def WatchBanner(
+        self,
+        request: banner_service_pb2.WatchBannerRequest,
+        context: grpc.aio.ServicerContext
+    ) -> AsyncIterator[CachedResponse]:
+        """
+        Handle the WatchBanner gRPC request on the event loop.
+
+        Args:
+            request (WatchBannerRequest): The incoming gRPC request containing the location.
+            context (grpc.aio.ServicerContext): The context of the gRPC call.
+
+        Yields:
+            CachedResponse: The serialized response with banner data.
+        """
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Event()
+        subscription = self.scheduler.subscribe(request.location, lambda: loop.call_soon_threadsafe(pending.set))
+        try:
+            while True:
+                await pending.wait()
+                pending.clear()
+                response = subscription.take()
+                if response is not None:
+                    yield response
+        finally:
+            self.scheduler.unsubscribe(subscription)
+
+
+def add_banner_service_to_server(servicer: BannerService, server: grpc.Server) -> None:
+    """
+    Register the BannerService on a server.
+
+    Mirrors the generated `add_BannerServiceServicer_to_server`, but uses a response serializer
+    that sends the bytes of a CachedResponse as-is instead of reserializing the message.
+
+    Args:
+        servicer (BannerService): The service implementation.
+        server (grpc.Server): The server to register the service on.
+    """
+    rpc_method_handlers = {
+        "GetCurrentBanner": grpc.unary_unary_rpc_method_handler(
+            servicer.GetCurrentBanner,
+            request_deserializer=banner_service_pb2.GetCurrentBannerRequest.FromString,
+            response_serializer=serialize_response,
+        ),
+        "GetBanners": grpc.unary_unary_rpc_method_handler(
+            servicer.GetBanners,
+            request_deserializer=banner_service_pb2.GetBannersRequest.FromString,
+            response_serializer=banner_service_pb2.GetBannersResponse.SerializeToString,
+        ),
+        "GetBannerImage": grpc.unary_stream_rpc_method_handler(
+            servicer.GetBannerImage,
+            request_deserializer=banner_service_pb2.GetBannerImageRequest.FromString,
+            response_serializer=banner_service_pb2.BannerImageChunk.SerializeToString,
+        ),
+        "WatchBanner": grpc.unary_stream_rpc_method_handler(
+            servicer.WatchBanner,
+            request_deserializer=banner_service_pb2.WatchBannerRequest.FromString,
+            response_serializer=serialize_response,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler("banner.BannerService", rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers("banner.BannerService", rpc_method_handlers)
+
+
+def _start_watcher(reload_interval: float, service: BannerService) -> Optional[ConfigWatcher]:
+    if reload_interval <= 0:
+        return None
+    if CONFIG_SNAPSHOT or CONFIG_BUNDLE:
+        logging.info(f"Serving configs from {CONFIG_SNAPSHOT or CONFIG_BUNDLE}; config hot reload is disabled.")
+        return None
+
+    def on_reload(snapshot: Sequence[BannerConfig]) -> None:
+        set_banners(snapshot)
+        service.scheduler.notify()  # Push changed banners to WatchBanner streams
+        service.schedule.notify()  # Rebuild the schedule table
+
+    watcher = ConfigWatcher(on_reload, interval=reload_interval, loaded=banners, metrics=service.metrics)
+    watcher.start()
+    return watcher
+
+
+def _image_ids(snapshot: Sequence[BannerConfig]) -> Iterator[str]:
+    for banner in snapshot:
+        yield banner.id
+        for variant in banner.variants:
+            yield variant.image_id
+
+
+def preload_images(images: ImageStore, renditions: RenditionCache, snapshot: Sequence[BannerConfig]) -> None:
+    """
+    Load the images of all banners and their variants, and start encoding their renditions.
+    """
+    for image_id in dict.fromkeys(_image_ids(snapshot)):
+        image_data = images.get(image_id)
+        if image_data is not None:
+            renditions.prepare(image_id, image_data, images.etag(image_id, image_data))
+
+
+def _start_metrics_server(
+    port: int,
+    service: BannerService,
+    profiler: Optional[Profiler] = None,
+    host: str = DEFAULT_METRICS_HOST
+) -> Optional[MetricsServer]:
+    if port <= 0:
+        return None
+    metrics_server = MetricsServer(service.metrics, port, profiler=profiler, schedule=service.schedule, host=host)
+    metrics_server.start()
+    return metrics_server
+
+
+def _interceptors(
+    service: BannerService,
+    profiler: Profiler,
+    profiler_endpoint: bool,
+    metrics_interceptor: type,
+    profiling_interceptor: type
+) -> list:
+    # The profiling interceptor is left out unless needed, so requests pay nothing for it
+    interceptors = [metrics_interceptor(service.metrics)]
+    if profiler.sample_rate or profiler_endpoint:
+        interceptors.append(profiling_interceptor(profiler))
+    return interceptors
+
+
+def _server_options(reuse_port: bool) -> list:
+    # SO_REUSEPORT lets several worker processes bind the same port (see banner_supervisor.py)
+    return [("grpc.so_reuseport", 1 if reuse_port else 0)]
+
+
+def serve(
+    reload_interval: float = 1.0,
+    image_store: Optional[ImageStore] = None,
+    reuse_port: bool = False,
+    grace: float = 5.0,
+    metrics_port: int = 0,
+    renditions: Optional[RenditionCache] = None,
+    compression: Optional[CompressionPolicy] = None,
+    profile_sample_rate: float = 0.0,
+    profiler_endpoint: bool = False,
+    schedule_horizon: float = 24.0,
+    max_watch_streams: int = DEFAULT_MAX_WATCH_STREAMS,
+    metrics_host: str = DEFAULT_METRICS_HOST
+):
+    """
+    Start the thread-pool gRPC server and block until it terminates.
+
+    The pool has `REQUEST_WORKERS` threads for unary calls plus one per allowed WatchBanner
+    stream, so open streams never take threads from other callers.
+
+    Args:
+        reload_interval (float): Seconds between config reload checks. 0 disables hot reload.
+        image_store (Optional[ImageStore]): Image store to serve from, e.g. one preloaded before forking.
+        reuse_port (bool): Bind with SO_REUSEPORT so other processes can share the port.
+        grace (float): Seconds in-flight RPCs get to finish after SIGTERM.
+        metrics_port (int): HTTP port serving Prometheus metrics on `/metrics`. 0 disables it.
+        renditions (Optional[RenditionCache]): Image renditions to serve, e.g. encoded before forking.
+        compression (Optional[CompressionPolicy]): When to compress responses. Defaults to never.
+        profile_sample_rate (float): Fraction of requests whose stage timings are recorded.
+        profiler_endpoint (bool): Serve on-demand profile captures on the metrics port.
+        schedule_horizon (float): Hours of selections precomputed per location. 0 disables it.
+        max_watch_streams (int): Most concurrent WatchBanner streams.
+        metrics_host (str): Address the metrics port is bound to.
+    """
+    service = BannerService(
+        image_store, renditions=renditions, compression=compression,
+        schedule=ScheduleBuilder(timedelta(hours=schedule_horizon)), max_watch_streams=max_watch_streams
+    )
+    preload_images(service.images, service.renditions, banners)
+    watcher = _start_watcher(reload_interval, service)
+    profiler = Profiler(service.metrics, profile_sample_rate)
+    metrics_server = _start_metrics_server(metrics_port, service, profiler if profiler_endpoint else None, metrics_host)
+    service.log.start()
+    service.schedule.start(lambda: banners)
+
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=REQUEST_WORKERS + max_watch_streams),
+        interceptors=_interceptors(service, profiler, profiler_endpoint, MetricsInterceptor, ProfilingInterceptor),
+        options=_server_options(reuse_port)
+    )
+    add_banner_service_to_server(service, server)
     server.add_insecure_port("[::]:51234")
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop(grace))
     logging.info("Starting gRPC server on port 51234...")
     server.start()
-    server.wait_for_termination()
+    try:
+        server.wait_for_termination()
+    finally:
+        service.scheduler.stop()
+        service.schedule.stop()
+        service.log.stop()
+        if watcher is not None:
+            watcher.stop()
+        if metrics_server is not None:
+            metrics_server.stop()
+
+
+async def serve_async(
+    reload_interval: float = 1.0,
+    image_store: Optional[ImageStore] = None,
+    reuse_port: bool = False,
+    grace: float = 5.0,
+    metrics_port: int = 0,
+    renditions: Optional[RenditionCache] = None,
+    compression: Optional[CompressionPolicy] = None,
+    profile_sample_rate: float = 0.0,
+    profiler_endpoint: bool = False,
+    schedule_horizon: float = 24.0,
+    metrics_host: str = DEFAULT_METRICS_HOST
+):
+    """
+    Start the grpc.aio server and wait until it terminates.
+
+    Args:
+        reload_interval (float): Seconds between config reload checks. 0 disables hot reload.
+        image_store (Optional[ImageStore]): Image store to serve from, e.g. one preloaded before forking.
+        reuse_port (bool): Bind with SO_REUSEPORT so other processes can share the port.
+        grace (float): Seconds in-flight RPCs get to finish after SIGTERM.
+        metrics_port (int): HTTP port serving Prometheus metrics on `/metrics`. 0 disables it.
+        renditions (Optional[RenditionCache]): Image renditions to serve, e.g. encoded before forking.
+        compression (Optional[CompressionPolicy]): When to compress responses. Defaults to never.
+        profile_sample_rate (float): Fraction of requests whose stage timings are recorded.
+        profiler_endpoint (bool): Serve on-demand profile captures on the metrics port.
+        schedule_horizon (float): Hours of selections precomputed per location. 0 disables it.
+        metrics_host (str): Address the metrics port is bound to.
+    """
+    service = AsyncBannerService(
+        image_store, renditions=renditions, compression=compression,
+        schedule=ScheduleBuilder(timedelta(hours=schedule_horizon))
+    )
+    preload_images(service.images, service.renditions, banners)
+    watcher = _start_watcher(reload_interval, service)
+    profiler = Profiler(service.metrics, profile_sample_rate)
+    metrics_server = _start_metrics_server(metrics_port, service, profiler if profiler_endpoint else None, metrics_host)
+    service.log.start()
+    service.schedule.start(lambda: banners)
+
+    interceptors = _interceptors(service, profiler, profiler_endpoint, AsyncMetricsInterceptor, AsyncProfilingInterceptor)
+    server = grpc.aio.server(interceptors=interceptors, options=_server_options(reuse_port))
+    add_banner_service_to_server(service, server)
+    server.add_insecure_port("[::]:51234")
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, lambda: loop.create_task(server.stop(grace)))
+    logging.info("Starting asyncio gRPC server on port 51234...")
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        service.scheduler.stop()
+        service.schedule.stop()
+        service.log.stop()
+        if watcher is not None:
+            watcher.stop()
+        if metrics_server is not None:
+            metrics_server.stop()
+
+
+def run_server(
+    args: argparse.Namespace,
+    image_store: Optional[ImageStore] = None,
+    reuse_port: bool = False,
+    worker: int = 0,
+    renditions: Optional[RenditionCache] = None
+) -> None:
+    """
+    Run a single server process in the mode selected on the command line.
+
+    Worker processes serve their metrics on consecutive ports, `--metrics-port` + worker slot,
+    since each process only sees its own requests.
+    """
+    metrics_port = args.metrics_port + worker if args.metrics_port > 0 else 0
+    compression = CompressionPolicy(args.compression, args.compression_min_size)
+    options = {
+        "profile_sample_rate": args.profile_sample_rate,
+        "profiler_endpoint": args.profiler_endpoint,
+        "schedule_horizon": args.schedule_horizon,
+        "metrics_host": args.metrics_host,
+    }
+    # Started per process: a listener thread started before forking would not exist in the workers
+    log_listener = start_queue_logging()
+    try:
+        if args.mode == "aio":
+            asyncio.run(serve_async(
+                args.reload_interval, image_store, reuse_port,
+                metrics_port=metrics_port, renditions=renditions, compression=compression, **options
+            ))
+        else:
+            serve(
+                args.reload_interval, image_store, reuse_port,
+                metrics_port=metrics_port, renditions=renditions, compression=compression,
+                max_watch_streams=args.max_watch_streams, **options
+            )
+    finally:
+        stop_queue_logging(log_listener)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse the server command line. Every option defaults to its environment variable.
+    """
+    parser = argparse.ArgumentParser(description="Banner gRPC service")
+    parser.add_argument(
+        "--mode",
+        choices=("thread", "aio"),
+        default=os.environ.get("BANNER_SERVER_MODE", "thread"),
+        help="Server implementation: thread pool or grpc.aio (env: BANNER_SERVER_MODE)"
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=float(os.environ.get("BANNER_CONFIG_RELOAD_INTERVAL", "1.0")),
+        help="Seconds between config reload checks, 0 disables (env: BANNER_CONFIG_RELOAD_INTERVAL)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("BANNER_WORKERS", "1")),
+        help="Number of server processes sharing the port, 0 for one per CPU (env: BANNER_WORKERS)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.environ.get("BANNER_METRICS_PORT", "9464")),
+        help="HTTP port for Prometheus metrics, 0 disables; workers use consecutive ports (env: BANNER_METRICS_PORT)"
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default=os.environ.get("BANNER_METRICS_HOST", DEFAULT_METRICS_HOST),
+        help="Address the metrics port is bound to, e.g. 0.0.0.0 for remote scraping (env: BANNER_METRICS_HOST)"
+    )
+    parser.add_argument(
+        "--compression",
+        choices=sorted(ALGORITHMS),
+        default=os.environ.get("BANNER_COMPRESSION", "gzip"),
+        help="Compression for text-heavy responses; image bytes are never recompressed (env: BANNER_COMPRESSION)"
+    )
+    parser.add_argument(
+        "--compression-min-size",
+        type=int,
+        default=int(os.environ.get("BANNER_COMPRESSION_MIN_SIZE", "1024")),
+        help="Minimum compressible bytes for a response to be compressed (env: BANNER_COMPRESSION_MIN_SIZE)"
+    )
+    parser.add_argument(
+        "--profile-sample-rate",
+        type=float,
+        default=float(os.environ.get("BANNER_PROFILE_SAMPLE_RATE", "0")),
+        help="Fraction of requests whose stage timings are recorded, 0 disables (env: BANNER_PROFILE_SAMPLE_RATE)"
+    )
+    parser.add_argument(
+        "--profiler-endpoint",
+        action="store_true",
+        default=os.environ.get("BANNER_PROFILER_ENDPOINT", "0") == "1",
+        help="Serve on-demand profiles on /debug/profile of the metrics port (env: BANNER_PROFILER_ENDPOINT=1)"
+    )
+    parser.add_argument(
+        "--max-watch-streams",
+        type=int,
+        default=int(os.environ.get("BANNER_MAX_WATCH_STREAMS", str(DEFAULT_MAX_WATCH_STREAMS))),
+        help="Most concurrent WatchBanner streams in thread mode, each holding a thread (env: BANNER_MAX_WATCH_STREAMS)"
+    )
+    parser.add_argument(
+        "--schedule-horizon",
+        type=float,
+        default=float(os.environ.get("BANNER_SCHEDULE_HORIZON", "24")),
+        help="Hours of banner selections precomputed per location, 0 disables (env: BANNER_SCHEDULE_HORIZON)"
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    serve()
+    logging.basicConfig(level=logging.INFO, force=True)  # Importing the module already logged with the default config
+    args = parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1:
+        # Load images and encode their renditions before forking so every worker shares the same pages
+        image_store = ImageStore()
+        renditions = RenditionCache()
+        preload_images(image_store, renditions, banners)
+        renditions.wait()
+
+        def prepare_workers() -> None:
+            # Respawned and restarted workers start from the current configs and images
+            set_banners(load_banners())
+            preload_images(image_store, renditions, banners)
+            renditions.wait()
+
+        Supervisor(
+            workers, lambda slot: run_server(args, image_store, reuse_port=True, worker=slot, renditions=renditions),
+            prepare=prepare_workers
+        ).run()
+    else:
+        run_server(args)
@@ -0,0 +1,212 @@
+import os
+import sys
+import mmap
+import struct
+import logging
+import argparse
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from banner_config import BannerConfig, BannerVariant, iter_configs
+
+
+# File layout, all integers little-endian:
+#   header | banner records | location references | variant records | string offsets | string data
+# Every string (ids, titles, descriptions, conditions, location codes) is stored once in the
+# string table and referenced by index, so the fixed-size sections can be read in place.
+MAGIC = b"BNRSNAP\x00"
+FORMAT_VERSION = 3
+
+# magic, version, banner count, location reference count, variant count, string count
+_HEADER = struct.Struct("<8sIIIII")
+# id, title, description, condition (-1 for none), start_us, end_us, first location, location count, priority,
+# weight (0 for none), first variant, variant count
+_RECORD = struct.Struct("<IIIiqqIIqQII")
+_VARIANT = struct.Struct("<IIIIQ")  # id, title, description, image id, weight
+_INDEX = struct.Struct("<I")
+
+_NO_CONDITION = -1
+
+
+class SnapshotError(ValueError):
+    """
+    Raised when a snapshot file is not a valid banner snapshot.
+    """
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings: List[str] = []
+        self._indexes: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        index = self._indexes.get(value)
+        if index is None:
+            index = self._indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def dump_snapshot(banners: Sequence[BannerConfig]) -> bytes:
+    """
+    Serialize banner configs into the binary snapshot format.
+
+    Args:
+        banners (Sequence[BannerConfig]): The banners, in selection order.
+
+    Returns:
+        bytes: The snapshot contents.
+    """
+    strings = _StringTable()
+    records = bytearray()
+    location_refs = bytearray()
+    location_count = 0
+    variants = bytearray()
+    variant_count = 0
+    for banner in banners:
+        condition = strings.add(banner.special_condition) if banner.special_condition else _NO_CONDITION
+        records += _RECORD.pack(
+            strings.add(banner.id), strings.add(banner.title), strings.add(banner.description), condition,
+            banner.start_us, banner.end_us, location_count, len(banner.locations), banner.priority, banner.weight or 0,
+            variant_count, len(banner.variants)
+        )
+        for location in banner.locations:
+            location_refs += _INDEX.pack(strings.add(location))
+        location_count += len(banner.locations)
+        for variant in banner.variants:
+            variants += _VARIANT.pack(
+                strings.add(variant.id), strings.add(variant.title), strings.add(variant.description),
+                strings.add(variant.image_id), variant.weight
+            )
+        variant_count += len(banner.variants)
+
+    encoded = [value.encode("utf-8") for value in strings.strings]
+    offsets = bytearray()
+    position = 0
+    for data in encoded:
+        offsets += _INDEX.pack(position)
+        position += len(data)
+    offsets += _INDEX.pack(position)
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(banners), location_count, variant_count, len(encoded))
+    return b"".join([header, records, location_refs, variants, offsets, *encoded])
+
+
+def parse_snapshot(buffer) -> Tuple[BannerConfig, ...]:
+    """
+    Read banner configs from snapshot contents.
+
+    Args:
+        buffer: The snapshot contents, e.g. bytes or a memory map.
+
+    Returns:
+        Tuple[BannerConfig, ...]: The banners, in the order they were written.
+
+    Raises:
+        SnapshotError: If the contents are not a valid snapshot.
+    """
+    try:
+        magic, version, banner_count, location_count, variant_count, string_count = _HEADER.unpack_from(buffer, 0)
+    except struct.error as e:
+        raise SnapshotError(f"Truncated snapshot header: {e}") from e
+    if magic != MAGIC:
+        raise SnapshotError("Not a banner snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+
+    records_at = _HEADER.size
+    locations_at = records_at + banner_count * _RECORD.size
+    variants_at = locations_at + location_count * _INDEX.size
+    offsets_at = variants_at + variant_count * _VARIANT.size
+    strings_at = offsets_at + (string_count + 1) * _INDEX.size
+    try:
+        offsets = struct.unpack_from(f"<{string_count + 1}I", buffer, offsets_at)
+        if strings_at + offsets[-1] > len(buffer):
+            raise SnapshotError("Truncated snapshot string data")
+        strings = [
+            sys.intern(str(buffer[strings_at + start:strings_at + end], "utf-8"))
+            for start, end in zip(offsets, offsets[1:])
+        ]
+        location_refs = struct.unpack_from(f"<{location_count}I", buffer, locations_at)
+        variants = [
+            BannerVariant(strings[id], strings[title], strings[description], strings[image_id], weight)
+            for id, title, description, image_id, weight in _VARIANT.iter_unpack(buffer[variants_at:offsets_at])
+        ]
+
+        banners = []
+        for (
+            id, title, description, condition, start_us, end_us, first, count, priority, weight, first_variant, variant_count
+        ) in _RECORD.iter_unpack(buffer[records_at:locations_at]):
+            banners.append(BannerConfig.from_fields(
+                strings[id], strings[title], strings[description], start_us, end_us,
+                [strings[index] for index in location_refs[first:first + count]],
+                strings[condition] if condition != _NO_CONDITION else None,
+                priority, weight or None, variants[first_variant:first_variant + variant_count]
+            ))
+    except (struct.error, IndexError, UnicodeDecodeError, ValueError) as e:
+        raise SnapshotError(f"Corrupt snapshot: {e}") from e
+    return tuple(banners)
+
+
+def build_snapshot(config_dir: str, snapshot_path: str) -> int:
+    """
+    Compile all configs in a directory or NDJSON bundle into a snapshot file.
+
+    Configs are read in file name order, matching the config watcher. Invalid configs are
+    skipped with the same errors as at runtime. The file is replaced atomically.
+
+    Args:
+        config_dir (str): Directory containing the JSON config files, or an NDJSON bundle.
+        snapshot_path (str): Path of the snapshot file to write.
+
+    Returns:
+        int: The number of banners written.
+    """
+    banners = list(iter_configs(config_dir))
+    temporary_path = f"{snapshot_path}.tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        snapshot_file.write(dump_snapshot(banners))
+    os.replace(temporary_path, snapshot_path)
+    return len(banners)
+
+
+def load_snapshot(snapshot_path: str) -> Tuple[BannerConfig, ...]:
+    """
+    Load banner configs from a snapshot file.
+
+    The file is memory-mapped, so only the pages holding the configs are read.
+
+    Args:
+        snapshot_path (str): Path of the snapshot file.
+
+    Returns:
+        Tuple[BannerConfig, ...]: The banners, in selection order.
+
+    Raises:
+        OSError: If the file cannot be read.
+        SnapshotError: If the file is not a valid snapshot.
+    """
+    with open(snapshot_path, "rb") as snapshot_file:
+        if os.fstat(snapshot_file.fileno()).st_size == 0:
+            raise SnapshotError("Empty snapshot file")
+        with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            banners = parse_snapshot(buffer)
+    logging.info(f"Loaded {len(banners)} banner configs from snapshot {snapshot_path}.")
+    return banners
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compile banner configs into a binary snapshot.")
+    parser.add_argument("output", help="Path of the snapshot file to write")
+    parser.add_argument(
+        "--config-dir",
+        default="resources/configs",
+        help="Directory containing the JSON config files, or an NDJSON bundle (default: resources/configs)"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+    count = build_snapshot(args.config_dir, args.output)
+    logging.info(f"Wrote {count} banner configs to {args.output}.")
@@ -0,0 +1,156 @@
+import gc
+import os
+import time
+import signal
+import logging
+from typing import Callable, Dict, Optional
+
+
+class Supervisor:
+    """
+    Forks and supervises worker processes that each run their own gRPC server.
+
+    Workers are forked after the parent has loaded configs and images, so they share that
+    memory copy-on-write instead of loading it again. Each worker binds the same port with
+    SO_REUSEPORT and the kernel spreads incoming connections across them.
+
+    Workers started later, to replace a crashed worker or in a rolling restart, would inherit
+    whatever the parent loaded at startup. `prepare` runs in the parent before they are forked
+    to bring that state up to date, e.g. to reload the configs.
+
+    Signals:
+        SIGTERM/SIGINT: Forward SIGTERM to all workers and wait for them to drain.
+        SIGHUP: Graceful rolling restart; each worker is replaced by a new one before it is stopped.
+
+    Attributes:
+        workers (int): Number of worker processes to keep running.
+        target (Callable[[int], None]): Runs a server in the worker process, given the worker's slot
+            number; returns when it stops.
+        restart_delay (float): Delay before respawning a worker that exited unexpectedly.
+        poll_interval (float): Seconds between checks for exited workers and pending signals.
+        prepare (Optional[Callable[[], None]]): Refreshes the parent's state before workers are
+            respawned or restarted.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        target: Callable[[int], None],
+        restart_delay: float = 1.0,
+        poll_interval: float = 0.2,
+        prepare: Optional[Callable[[], None]] = None
+    ):
+        self.workers = workers
+        self.target = target
+        self.prepare = prepare
+        self.restart_delay = restart_delay
+        self.poll_interval = poll_interval
+        self._children: Dict[int, int] = {}  # pid -> worker slot
+        self._stopping = False
+        self._restart_requested = False
+        self._stop_requested = False
+
+    def run(self) -> None:
+        """
+        Start the workers and supervise them until a shutdown signal arrives.
+        """
+        # Keep the objects loaded so far out of the GC's reach so collections in the workers
+        # do not touch, and therefore copy, the shared pages
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+        logging.info(f"Supervisor started {self.workers} workers.")
+
+        while self._children:
+            # Signals are acted on here rather than in their handlers, which could run between
+            # a fork and the new worker's pid being recorded and so miss that worker
+            if self._stop_requested:
+                self._stop_requested = False
+                self._stop_workers()
+                continue
+            if self._restart_requested:
+                self._restart_requested = False
+                self._rolling_restart()
+                continue
+            # Poll rather than block in os.wait(), which is retried after signal handlers run
+            # and would delay a requested restart until some worker exits
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(self.poll_interval)
+                continue
+            self._reap(pid, status)
+
+        logging.info("All workers stopped.")
+
+    def _spawn(self, slot: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            # Worker: restore default signal handling; the server installs its own SIGTERM handler
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            exit_code = 0
+            try:
+                self.target(slot)
+            except BaseException:
+                logging.exception(f"Worker {slot} crashed.")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self._children[pid] = slot
+        logging.info(f"Started worker {slot} (pid {pid}).")
+        return pid
+
+    def _reap(self, pid: int, status: int) -> None:
+        slot = self._children.pop(pid, None)
+        if slot is None:
+            return  # A worker replaced during a rolling restart
+        if self._stopping:
+            return
+        logging.warning(f"Worker {slot} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting it.")
+        time.sleep(self.restart_delay)
+        self._prepare()
+        if not self._stopping:
+            self._spawn(slot)
+
+    def _prepare(self) -> None:
+        if self.prepare is not None:
+            try:
+                self.prepare()
+            except Exception as e:
+                logging.error(f"Error preparing new workers, starting them with the previous state: {e}")
+        gc.freeze()  # As in run(), for whatever was loaded since
+
+    def _rolling_restart(self) -> None:
+        logging.info("Restarting workers.")
+        self._prepare()
+        for old_pid, slot in list(self._children.items()):
+            if self._stopping:
+                return
+            # Start the replacement first so the port is never left without a listener
+            self._spawn(slot)
+            del self._children[old_pid]
+            os.kill(old_pid, signal.SIGTERM)
+            os.waitpid(old_pid, 0)
+
+    def _stop_workers(self) -> None:
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+        self._stop_requested = True
+
+    def _handle_restart(self, signum, frame) -> None:
+        self._restart_requested = True
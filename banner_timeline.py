@@ -0,0 +1,119 @@
+import itertools
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from banner_config import BannerConfig
+from banner_index import BannerIndex
+
+
+TIME_MIN = datetime.min.replace(tzinfo=timezone.utc)
+TIME_MAX = datetime.max.replace(tzinfo=timezone.utc)
+
+# Banners are active while start_time <= now <= end_time, so they stop one tick after end_time.
+_RESOLUTION = timedelta(microseconds=1)
+
+_timeline_versions = itertools.count(1)
+
+
+class TimelineSegment:
+    """
+    A half-open time range [valid_from, valid_until) during which the set of active banners
+    does not change.
+
+    Attributes:
+        number (int): Position of the segment in its timeline.
+        version (Tuple[int, int]): Identifies the active set across timeline rebuilds.
+        valid_from (datetime): First instant covered by the segment.
+        valid_until (datetime): First instant after the segment.
+        banners (Tuple[BannerConfig, ...]): Banners active during the segment, in load order.
+        index (BannerIndex): Location index over the active banners.
+        conditions (Tuple[Condition, ...]): Distinct compiled special conditions of the active banners.
+    """
+
+    __slots__ = ("number", "version", "valid_from", "valid_until", "banners", "index", "conditions")
+
+    def __init__(self, version: Tuple[int, int], valid_from: datetime, valid_until: datetime, banners: Tuple[BannerConfig, ...]):
+        self.number = version[1]
+        self.version = version
+        self.valid_from = valid_from
+        self.valid_until = valid_until
+        self.banners = banners
+        self.index = BannerIndex(banners)
+        self.conditions = tuple(dict.fromkeys(b.condition for b in banners if b.condition is not None))
+
+    def contains(self, current_time: datetime) -> bool:
+        return self.valid_from <= current_time < self.valid_until
+
+    def __repr__(self):
+        return f"TimelineSegment(number={self.number}, valid_from={self.valid_from}, valid_until={self.valid_until}, banners={len(self.banners)})"
+
+
+class BannerTimeline:
+    """
+    Sorted boundary timeline over the activation windows of a banner list.
+
+    The start and end times of all banners split time into segments. The active banner set
+    of every segment is precomputed with a single sweep, so a caller only needs to look up a
+    new segment once the current time crosses the next boundary.
+
+    Attributes:
+        source (Sequence[BannerConfig]): The banner list the timeline was built from.
+        version (int): Unique number of this timeline, distinguishing it from rebuilt ones.
+        boundaries (List[datetime]): Sorted instants at which the active set changes.
+        locations (FrozenSet[str]): Every location configured on any banner, active or not.
+    """
+
+    def __init__(self, banners: Sequence[BannerConfig]):
+        self.source = banners
+        self.version = next(_timeline_versions)
+        self.locations = frozenset(location for banner in banners for location in banner.locations)
+
+        starts: Dict[datetime, List[int]] = {}
+        ends: Dict[datetime, List[int]] = {}
+        for position, banner in enumerate(banners):
+            if banner.start_us > banner.end_us:
+                continue  # Never active
+            starts.setdefault(banner.start_time, []).append(position)
+            if banner.end_time < TIME_MAX:
+                ends.setdefault(banner.end_time + _RESOLUTION, []).append(position)
+            # An end time of datetime.max has no instant after it: the banner never ends
+        self.boundaries = sorted(starts.keys() | ends.keys())
+
+        # Sweep the boundaries once, recording the active set that starts at each of them
+        self._active: List[Tuple[BannerConfig, ...]] = [()]
+        active: Dict[int, BannerConfig] = {}
+        for boundary in self.boundaries:
+            for position in ends.get(boundary, ()):
+                del active[position]
+            for position in starts.get(boundary, ()):
+                active[position] = banners[position]
+            self._active.append(tuple(active[position] for position in sorted(active)))
+
+        self._segments: Dict[int, TimelineSegment] = {}
+
+    def segment_at(self, current_time: datetime) -> TimelineSegment:
+        """
+        Return the segment containing the given time.
+
+        Args:
+            current_time (datetime): The time to look up.
+
+        Returns:
+            TimelineSegment: The segment, with its location index over the active banners.
+        """
+        number = bisect_right(self.boundaries, current_time)
+        segment = self._segments.get(number)
+        if segment is None:
+            valid_from = self.boundaries[number - 1] if number > 0 else TIME_MIN
+            valid_until = self.boundaries[number] if number < len(self.boundaries) else TIME_MAX
+            segment = TimelineSegment((self.version, number), valid_from, valid_until, self._active[number])
+            self._segments[number] = segment
+        return segment
+
+    def next_change(self, current_time: datetime) -> Optional[datetime]:
+        """
+        Return the first boundary after the given time, or None if the active set never changes again.
+        """
+        number = bisect_right(self.boundaries, current_time)
+        return self.boundaries[number] if number < len(self.boundaries) else None
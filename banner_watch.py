@@ -0,0 +1,149 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Set
+
+from banner_responses import CachedResponse
+
+
+# Upper bound for a single scheduler sleep, so clock adjustments are picked up eventually
+_MAX_SLEEP = 60.0
+
+
+class Subscription:
+    """
+    A single WatchBanner stream. Holds the latest undelivered response for its location.
+
+    Slow subscribers only ever see the most recent banner; intermediate changes are dropped.
+
+    Attributes:
+        location (str): The watched location.
+    """
+
+    __slots__ = ("location", "_wakeup", "_pending", "_lock")
+
+    def __init__(self, location: str, wakeup: Callable[[], None]):
+        self.location = location
+        self._wakeup = wakeup
+        self._pending: Optional[CachedResponse] = None
+        self._lock = threading.Lock()
+
+    def deliver(self, response: CachedResponse) -> None:
+        with self._lock:
+            self._pending = response
+        self._wakeup()
+
+    def take(self) -> Optional[CachedResponse]:
+        """
+        Return the pending response, if any, and clear it.
+        """
+        with self._lock:
+            response, self._pending = self._pending, None
+        return response
+
+
+class _Location:
+    __slots__ = ("subscribers", "last")
+
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.last: Optional[CachedResponse] = None
+
+
+class BannerScheduler:
+    """
+    Single timer thread that pushes banner changes to all WatchBanner subscribers.
+
+    The thread sleeps until the service's next possible change (a time-window boundary or a
+    special-condition flip) or until it is notified of a config reload or a new location. It
+    then resolves each watched location once and fans the result out to that location's
+    subscribers only if the selected banner changed, so cost scales with changes, not clients.
+
+    Attributes:
+        service (BannerService): The service used to resolve banners.
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self._locations: Dict[str, _Location] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, location: str, wakeup: Callable[[], None]) -> Subscription:
+        """
+        Register a subscriber. It receives the current banner right away and every change after that.
+
+        Args:
+            location (str): The location to watch.
+            wakeup (Callable[[], None]): Called from the scheduler thread when a response is pending.
+
+        Returns:
+            Subscription: The subscription to take responses from.
+        """
+        subscription = Subscription(location, wakeup)
+        with self._lock:
+            state = self._locations.setdefault(location, _Location())
+            state.subscribers.add(subscription)
+            last = state.last
+            self._ensure_started()
+        if last is not None:
+            subscription.deliver(last)
+        else:
+            self.notify()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            state = self._locations.get(subscription.location)
+            if state is None:
+                return
+            state.subscribers.discard(subscription)
+            if not state.subscribers:
+                del self._locations[subscription.location]
+
+    def notify(self) -> None:
+        """
+        Wake the scheduler to re-resolve all watched locations, e.g. after a config reload.
+        """
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name="banner-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            # Clear before publishing so a notification arriving meanwhile triggers another pass
+            self._wake.clear()
+            current_time = datetime.now(timezone.utc)
+            try:
+                self._publish(current_time)
+                timeout = (self.service.next_change(current_time) - current_time).total_seconds()
+            except Exception as e:
+                logging.error(f"Error publishing banner changes: {e}")
+                timeout = 1.0
+            self._wake.wait(min(max(timeout, 0.0), _MAX_SLEEP))
+
+    def _publish(self, current_time: datetime) -> None:
+        with self._lock:
+            locations = list(self._locations.items())
+        for location, state in locations:
+            response = self.service.watch_response(location, current_time)
+            if state.last is not None and state.last.serialized == response.serialized:
+                continue
+            with self._lock:
+                # Together with subscribe(), guarantees every subscriber gets the latest response
+                state.last = response
+                subscribers = list(state.subscribers)
+            for subscription in subscribers:
+                subscription.deliver(response)
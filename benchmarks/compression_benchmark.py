@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "generated"))
+
+import banner_service
+from banner_compression import CompressionPolicy
+from banner_config import load_configs
+
+# gRPC's message compression uses zlib streams: gzip framing for "gzip", zlib framing for "deflate"
+WINDOW_BITS = {"gzip": 31, "deflate": 15}
+LOCATIONS = ["US", "FR", "INVALID_LOCATION", "GB", "DE"]
+
+
+def compress(data: bytes, algorithm: str) -> bytes:
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, WINDOW_BITS[algorithm])
+    return compressor.compress(data) + compressor.flush()
+
+
+def build_payloads(config_dir: str, current_time: datetime) -> dict:
+    """
+    Build the serialized responses the service sends for each kind of request.
+
+    Returns:
+        dict: Payload name -> (serialized bytes, bytes of already compressed image data).
+    """
+    banner_service.set_banners(load_configs(config_dir))
+    service = banner_service.BannerService()
+    payloads = {}
+    for location in LOCATIONS:
+        response = service.get_response(location, current_time)
+        reference = response.as_reference()
+        payloads[f"GetCurrentBanner-{location}"] = (response.serialized, response.embedded_image_size)
+        payloads[f"GetCurrentBanner-{location}-by-reference"] = (reference.serialized, reference.embedded_image_size)
+    banners = service.get_banners(LOCATIONS, current_time)
+    image_bytes = sum(len(banner.image) for banner in banners.banners)
+    payloads["GetBanners"] = (banners.SerializeToString(), image_bytes)
+    return payloads
+
+
+def measure(payloads: dict, algorithms: list, repeat: int, policy: CompressionPolicy) -> list:
+    """
+    Compress every payload with every algorithm and time it.
+
+    Returns:
+        list: One row per payload and algorithm: name, algorithm, size, compressed size,
+            CPU microseconds per compression and per decompression, and whether the policy compresses it.
+    """
+    rows = []
+    for name, (data, incompressible) in payloads.items():
+        compressed_by_policy = policy.should_compress(len(data), incompressible)
+        for algorithm in algorithms:
+            started = time.process_time()
+            for _ in range(repeat):
+                compressed = compress(data, algorithm)
+            compress_us = (time.process_time() - started) / repeat * 1e6
+            started = time.process_time()
+            for _ in range(repeat):
+                zlib.decompress(compressed, WINDOW_BITS[algorithm])
+            decompress_us = (time.process_time() - started) / repeat * 1e6
+            rows.append((name, algorithm, len(data), len(compressed), compress_us, decompress_us, compressed_by_policy))
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure the CPU/bytes tradeoff of compressing banner responses.")
+    parser.add_argument("--config-dir", default="resources/configs", help="Config directory (default: resources/configs)")
+    parser.add_argument("--repeat", type=int, default=20, help="Compressions per payload and algorithm (default: 20)")
+    parser.add_argument("--min-size", type=int, default=1024, help="Policy threshold in bytes (default: 1024)")
+    parser.add_argument("--time", default="2024-12-10T12:00:00+00:00", help="Time to resolve banners at")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    payloads = build_payloads(args.config_dir, datetime.fromisoformat(args.time).astimezone(timezone.utc))
+    policy = CompressionPolicy("gzip", args.min_size)
+    print(f"{'payload':<45} {'algorithm':<8} {'bytes':>9} {'compressed':>10} {'ratio':>6} {'comp µs':>9} {'decomp µs':>9} policy")
+    for name, algorithm, size, compressed, compress_us, decompress_us, by_policy in measure(
+        payloads, list(WINDOW_BITS), args.repeat, policy
+    ):
+        print(
+            f"{name:<45} {algorithm:<8} {size:>9} {compressed:>10} {compressed / size:>6.2f} "
+            f"{compress_us:>9.0f} {decompress_us:>9.0f} {'compress' if by_policy else 'skip'}"
+        )
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import grpc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "generated"))
+
+from generated import banner_service_pb2
+
+LOCATIONS = ["US", "FR", "INVALID_LOCATION", "GB", "DE"]
+METHODS = {
+    "GetCurrentBanner": "/banner.BannerService/GetCurrentBanner",
+    "GetBanners": "/banner.BannerService/GetBanners",
+}
+# Metrics compared against a baseline: name -> whether higher values are better
+BASELINE_METRICS = {"p50_ms": False, "p99_ms": False, "p999_ms": False, "throughput_rps": True}
+
+
+class LoadResult:
+    """
+    Latencies and sizes of the requests sent during one run.
+
+    Attributes:
+        latencies (List[float]): Latency of every successful request in seconds.
+        errors (int): Number of failed requests.
+        bytes_received (int): Total size of the serialized responses.
+        duration (float): Wall clock length of the run in seconds.
+    """
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.bytes_received = 0
+        self.duration = 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Return a latency percentile in milliseconds, by the nearest-rank method.
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered) - 1, max(0, int(fraction * len(ordered) + 0.5) - 1))
+        return ordered[rank] * 1000
+
+    def summary(self) -> Dict[str, float]:
+        requests = len(self.latencies) + self.errors
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "error_rate": self.errors / requests if requests else 0.0,
+            "duration_s": self.duration,
+            "throughput_rps": len(self.latencies) / self.duration if self.duration else 0.0,
+            "bytes_per_s": self.bytes_received / self.duration if self.duration else 0.0,
+            "mean_ms": sum(self.latencies) / len(self.latencies) * 1000 if self.latencies else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "p999_ms": self.percentile(0.999),
+            "max_ms": max(self.latencies) * 1000 if self.latencies else 0.0,
+        }
+
+
+def build_requests(method: str, by_reference: bool) -> List[bytes]:
+    """
+    Serialize the requests to cycle through, so the generator spends no time building messages.
+    """
+    if method == "GetBanners":
+        return [banner_service_pb2.GetBannersRequest(locations=LOCATIONS).SerializeToString()]
+    return [
+        banner_service_pb2.GetCurrentBannerRequest(location=location, image_by_reference=by_reference).SerializeToString()
+        for location in LOCATIONS
+    ]
+
+
+class LoadGenerator:
+    """
+    Drives a banner server with pre-serialized requests over several grpc.aio channels.
+
+    Responses are not deserialized, so the client's own cost per request stays small and the
+    results reflect the server rather than the generator.
+
+    Attributes:
+        target (str): Server address.
+        method (str): The RPC to call, a key of METHODS.
+        channels (int): Number of channels (HTTP/2 connections) requests are spread over.
+        requests (List[bytes]): Serialized requests, sent round-robin.
+    """
+
+    def __init__(self, target: str, method: str, channels: int, requests: List[bytes]):
+        self.target = target
+        self.method = method
+        self.channels = channels
+        self.requests = requests
+        self._calls = []
+        self._channels = []
+        self._sent = 0
+
+    async def __aenter__(self) -> "LoadGenerator":
+        for _ in range(self.channels):
+            # Distinct channel arguments keep grpc from sharing one connection between channels
+            channel = grpc.aio.insecure_channel(self.target, options=[("grpc.channel_id", len(self._channels))])
+            await channel.channel_ready()
+            self._channels.append(channel)
+            self._calls.append(channel.unary_unary(METHODS[self.method]))
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        for channel in self._channels:
+            await channel.close()
+
+    async def _send(self, result: LoadResult, started: float) -> None:
+        number = self._sent
+        self._sent += 1
+        call = self._calls[number % len(self._calls)]
+        try:
+            response = await call(self.requests[number % len(self.requests)])
+        except grpc.RpcError:
+            result.errors += 1
+            return
+        result.latencies.append(time.perf_counter() - started)
+        result.bytes_received += len(response)
+
+    async def closed_loop(self, concurrency: int, duration: float) -> LoadResult:
+        """
+        Keep `concurrency` requests in flight, sending the next one as soon as one completes.
+        Measures the maximum throughput and the latency at that load.
+        """
+        result = LoadResult()
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self._send(result, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result.duration = time.perf_counter() - started
+        return result
+
+    async def open_loop(self, rate: float, duration: float) -> LoadResult:
+        """
+        Start requests at a fixed rate, regardless of how fast earlier ones complete.
+
+        Latency is measured from the time a request was scheduled to be sent, so delays in the
+        server (or the generator falling behind) show up in the percentiles instead of quietly
+        lowering the offered load.
+        """
+        result = LoadResult()
+        interval = 1.0 / rate
+        started = time.perf_counter()
+        pending = set()
+        for number in range(int(rate * duration)):
+            scheduled = started + number * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self._send(result, scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        result.duration = time.perf_counter() - started
+        return result
+
+
+def check_thresholds(summary: Dict[str, float], args: argparse.Namespace) -> List[str]:
+    """
+    Return a message for every absolute threshold the run exceeded.
+    """
+    failures = []
+    for metric, limit in (("p50_ms", args.max_p50_ms), ("p99_ms", args.max_p99_ms), ("p999_ms", args.max_p999_ms)):
+        if limit is not None and summary[metric] > limit:
+            failures.append(f"{metric} {summary[metric]:.2f} exceeds {limit:.2f}")
+    if summary["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {summary['error_rate']:.4f} exceeds {args.max_error_rate:.4f}")
+    return failures
+
+
+def check_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Return a message for every metric that regressed by more than `tolerance` against the baseline.
+    """
+    scenario = ("method", "mode", "by_reference")
+    if any(results.get(key) != baseline.get(key) for key in scenario):
+        return [f"baseline was recorded for a different scenario: {[baseline.get(key) for key in scenario]}"]
+    failures = []
+    for metric, higher_is_better in BASELINE_METRICS.items():
+        if not baseline.get(metric):
+            continue
+        change = results[metric] / baseline[metric] - 1
+        if (change < -tolerance) if higher_is_better else (change > tolerance):
+            failures.append(f"{metric} {results[metric]:.2f} regressed {change:+.0%} against baseline {baseline[metric]:.2f}")
+    return failures
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Closed- and open-loop load generator for the banner service.")
+    parser.add_argument("--target", default="localhost:51234", help="Server address (default: localhost:51234)")
+    parser.add_argument("--method", choices=sorted(METHODS), default="GetCurrentBanner", help="RPC to call")
+    parser.add_argument("--by-reference", action="store_true", help="Request images by reference instead of inline")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed", help="Closed loop at max concurrency or open loop at a fixed rate")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight in closed-loop mode (default: 64)")
+    parser.add_argument("--rate", type=float, default=500.0, help="Requests per second in open-loop mode (default: 500)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (default: 30)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of unmeasured load before the run (default: 2)")
+    parser.add_argument("--channels", type=int, default=8, help="Number of channels (default: 8)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--max-p50-ms", type=float, help="Fail if the p50 latency exceeds this")
+    parser.add_argument("--max-p99-ms", type=float, help="Fail if the p99 latency exceeds this")
+    parser.add_argument("--max-p999-ms", type=float, help="Fail if the p99.9 latency exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="Fail if the share of failed requests exceeds this (default: 0)")
+    parser.add_argument("--baseline", help="Fail on regressions against the results stored in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression against the baseline (default: 0.2)")
+    parser.add_argument("--save-baseline", help="Store the results as the new baseline in this JSON file")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, float]:
+    async with LoadGenerator(args.target, args.method, args.channels, build_requests(args.method, args.by_reference)) as generator:
+        if args.warmup > 0:
+            await generator.closed_loop(min(args.concurrency, 8), args.warmup)
+        if args.mode == "closed":
+            result = await generator.closed_loop(args.concurrency, args.duration)
+        else:
+            result = await generator.open_loop(args.rate, args.duration)
+    return result.summary()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    summary = asyncio.run(run(args))
+    load = f"concurrency {args.concurrency}" if args.mode == "closed" else f"{args.rate:.0f} req/s offered"
+    print(f"{args.method} {args.mode} loop, {load}, {args.channels} channels, {summary['duration_s']:.1f}s:")
+    print(
+        f"  {summary['requests']} requests, {summary['errors']} errors, "
+        f"{summary['throughput_rps']:.0f} req/s, {summary['bytes_per_s'] / 1e6:.2f} MB/s"
+    )
+    print(
+        f"  latency ms: mean {summary['mean_ms']:.2f}  p50 {summary['p50_ms']:.2f}  p90 {summary['p90_ms']:.2f}  "
+        f"p99 {summary['p99_ms']:.2f}  p99.9 {summary['p999_ms']:.2f}  max {summary['max_ms']:.2f}"
+    )
+
+    results = {"method": args.method, "mode": args.mode, "by_reference": args.by_reference, **summary}
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+    failures = check_thresholds(summary, args)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            failures += check_baseline(results, json.load(baseline_file), args.tolerance)
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
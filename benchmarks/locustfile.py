@@ -40,14 +40,9 @@ class BannerServiceUser(User):
                     request_type="gRPC",
                     name=f"GetCurrentBanner-{location}",
                     response_time=response_time,
-                    response_length=len(response.image),
+                    response_length=response.ByteSize(),
                     exception=None,
                 )
-                print("Banner Response:")
-                print(f"Title: {response.title}")
-                print(f"Description: {response.description}")
-                print(f"Image Format: {response.image_format}")
-                print(f"Image Data Size: {len(response.image)} bytes")
 
             except grpc.RpcError as e:
                 response_time = (time.time() - start_time) * 1000  # Response time in milliseconds
@@ -60,7 +55,37 @@ class BannerServiceUser(User):
                     response_length=0,
                     exception=e,
                 )
-                print(f"gRPC error for location {location}: {e.code()} - {e.details()}")
+
+    @task
+    def get_banners(self):
+        """
+        Task to fetch the banners for all locations with a single GetBanners call.
+        Logs the request as a success or failure for Locust tracking.
+        """
+        locations = ["US", "FR", "INVALID_LOCATION", "GB", "DE"]
+        request = banner_service_pb2.GetBannersRequest(locations=locations)
+        start_time = time.time()  # Start time for tracking response duration
+        try:
+            response = self.stub.GetBanners(request)
+            response_time = (time.time() - start_time) * 1000  # Response time in milliseconds
+
+            self.environment.events.request.fire(
+                request_type="gRPC",
+                name="GetBanners",
+                response_time=response_time,
+                response_length=response.ByteSize(),
+                exception=None,
+            )
+        except grpc.RpcError as e:
+            response_time = (time.time() - start_time) * 1000  # Response time in milliseconds
+
+            self.environment.events.request.fire(
+                request_type="gRPC",
+                name="GetBanners",
+                response_time=response_time,
+                response_length=0,
+                exception=e,
+            )
 
     def on_stop(self):
         """
@@ -0,0 +1,313 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "generated"))
+
+import banner_service
+from banner_config import load_configs, validate_config
+from banner_images import ImageStore
+from banner_renditions import RenditionCache
+from banner_responses import ResponseCache
+from banner_schedule import ScheduleBuilder, build_schedule
+from banner_selection import select_banners
+from banner_timeline import BannerTimeline
+
+# Conditions the synthetic banners cycle through; each holds for part of every hour
+SPECIAL_CONDITIONS = [
+    "odd-minutes",
+    "even-minutes",
+    "minute-mod:3:0",
+    "minute-mod:4:1",
+    "hours:0-11",
+    "hours:12-23",
+    "cron:*/5 * * * *",
+    "days:mon-fri & hours:8-20",
+]
+CURRENT_TIME = datetime(2024, 12, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def generate_configs(
+    directory: str,
+    banners: int,
+    locations: int,
+    conditions: int,
+    image_size: int,
+    seed: int = 0
+) -> List[dict]:
+    """
+    Write a synthetic config set: `banners` banner configs spread over `locations` locations,
+    the first `conditions` of them with a special condition, and an image of `image_size`
+    bytes per banner.
+
+    Configs go to `<directory>/configs/<id>.json` and images to `<directory>/content/<id>.png`.
+    About a tenth of the banners target several locations and one in twenty targets "ALL".
+    All banners are active at CURRENT_TIME, with staggered start times and priorities.
+
+    Args:
+        directory (str): The directory to write to.
+        banners (int): Number of banners.
+        locations (int): Number of distinct locations.
+        conditions (int): Number of banners with a special condition.
+        image_size (int): Size of each image in bytes.
+        seed (int): Seed for the random choices, so runs are comparable.
+
+    Returns:
+        List[dict]: The generated configs.
+    """
+    rng = random.Random(seed)
+    codes = [f"L{number:04d}" for number in range(locations)]
+    config_dir = os.path.join(directory, "configs")
+    content_dir = os.path.join(directory, "content")
+    os.makedirs(config_dir, exist_ok=True)
+    os.makedirs(content_dir, exist_ok=True)
+    # The image store does not decode images, so random bytes behind a PNG signature will do
+    image = b"\x89PNG\r\n\x1a\n" + rng.randbytes(max(0, image_size - 8))
+
+    configs = []
+    for number in range(banners):
+        if number % 20 == 19:
+            targets = ["ALL"]
+        elif number % 10 == 9:
+            targets = rng.sample(codes, min(len(codes), 3))
+        else:
+            targets = [codes[number % len(codes)]]
+        config = {
+            "id": f"banner-{number:06d}",
+            "title": f"Synthetic banner {number}",
+            "description": f"Generated banner {number} for {', '.join(targets)}.",
+            "start_time": (CURRENT_TIME - timedelta(days=1 + rng.randrange(30), minutes=number)).isoformat(),
+            "end_time": (CURRENT_TIME + timedelta(days=1 + rng.randrange(30))).isoformat(),
+            "locations": targets,
+            "priority": rng.randrange(3),
+        }
+        if number < conditions:
+            config["special_condition"] = SPECIAL_CONDITIONS[number % len(SPECIAL_CONDITIONS)]
+        configs.append(config)
+        with open(os.path.join(config_dir, f"{config['id']}.json"), "w") as config_file:
+            json.dump(config, config_file)
+        with open(os.path.join(content_dir, f"{config['id']}.png"), "wb") as image_file:
+            image_file.write(image)
+    return configs
+
+
+def measure(function: Callable[[], object], min_time: float, rounds: int) -> Dict[str, float]:
+    """
+    Time a function the way pytest-benchmark does, and measure its memory allocations.
+
+    The number of calls per round is calibrated so a round takes at least `min_time` seconds,
+    which keeps timer resolution out of the results. Timings are per call; the garbage
+    collector is disabled while timing. Allocations are measured in a separate pass, since
+    tracemalloc slows every allocation down.
+
+    Args:
+        function (Callable[[], object]): The operation to measure.
+        min_time (float): Minimum duration of a round in seconds.
+        rounds (int): Number of timed rounds.
+
+    Returns:
+        Dict[str, float]: Statistics of the per-call time in microseconds, the calls per
+            round, the peak memory of one call and the memory retained per call in bytes.
+    """
+    function()  # Warm up caches and lazy initialization
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        if time.perf_counter() - started >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                function()
+            timings.append((time.perf_counter() - started) / iterations * 1e6)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        peak_bytes = peak - start_size
+        start_size, _ = tracemalloc.get_traced_memory()
+        for _ in range(iterations):
+            function()
+        retained_bytes = (tracemalloc.get_traced_memory()[0] - start_size) / iterations
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "min_us": min(timings),
+        "median_us": statistics.median(timings),
+        "mean_us": statistics.mean(timings),
+        "stddev_us": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "ops_per_s": 1e6 / statistics.median(timings),
+        "iterations": iterations,
+        "rounds": rounds,
+        "peak_bytes": peak_bytes,
+        "retained_bytes": retained_bytes,
+    }
+
+
+def build_stages(directory: str, configs: List[dict]) -> Dict[str, Callable[[], object]]:
+    """
+    Build the operations to measure over a generated config set, each a stage of serving a
+    request or loading the configs.
+
+    Returns:
+        Dict[str, Callable[[], object]]: Stage name -> operation.
+    """
+    config_dir = os.path.join(directory, "configs")
+    banners = load_configs(config_dir, workers=1)
+    locations = sorted({location for config in configs for location in config["locations"]}) + ["UNKNOWN"]
+    timeline = BannerTimeline(banners)
+    segment = timeline.segment_at(CURRENT_TIME)
+    conditions = {condition: condition(CURRENT_TIME) for condition in segment.conditions}
+
+    banner_service.set_banners(banners)
+    service = banner_service.BannerService(
+        ImageStore(os.path.join(directory, "content")), ResponseCache(), renditions=RenditionCache(formats=())
+    )
+    scheduled = banner_service.BannerService(
+        service.images, ResponseCache(), renditions=service.renditions, schedule=ScheduleBuilder()
+    )
+    scheduled.schedule.refresh(banners, CURRENT_TIME)
+    for location in locations:
+        service.get_response(location, CURRENT_TIME)
+        scheduled.get_response(location, CURRENT_TIME)
+    banner = banners[0]
+    image_data = service.images.get(banner.id)
+    etag = service.images.etag(banner.id, image_data)
+    message = service._create_response(banner, "png", image_data, etag)
+
+    counter = iter(range(1 << 62))
+
+    def cycle(items):
+        return lambda: items[next(counter) % len(items)]
+
+    next_config = cycle(configs)
+    next_location = cycle(locations)
+    return {
+        "validate_config": lambda: validate_config(next_config()),
+        "load_configs": lambda: load_configs(config_dir, workers=1),
+        "load_configs_parallel": lambda: load_configs(config_dir),
+        "build_timeline": lambda: BannerTimeline(banners).segment_at(CURRENT_TIME),
+        "select_banners": lambda: select_banners(segment.index.candidates(next_location()), conditions),
+        "build_schedule": lambda: build_schedule(banners, CURRENT_TIME),
+        "get_response_cached": lambda: service.get_response(next_location(), CURRENT_TIME),
+        "get_response_scheduled": lambda: scheduled.get_response(next_location(), CURRENT_TIME),
+        "create_response": lambda: service._create_response(banner, "png", image_data, etag),
+        "serialize_response": message.SerializeToString,
+    }
+
+
+def compare(results: Dict, previous: Dict, max_regression: float) -> List[str]:
+    """
+    Print the change of each stage's median time and peak memory against a previous run.
+
+    Returns:
+        List[str]: A message for every stage whose median time grew by more than `max_regression`.
+    """
+    failures = []
+    print(f"\n{'stage':<24} {'median µs':>12} {'previous':>12} {'change':>8} {'peak KiB':>10} {'previous':>10}")
+    for name, stats in results["stages"].items():
+        old = previous.get("stages", {}).get(name)
+        if old is None:
+            print(f"{name:<24} {stats['median_us']:>12.2f} {'-':>12}")
+            continue
+        change = stats["median_us"] / old["median_us"] - 1 if old["median_us"] else 0.0
+        print(
+            f"{name:<24} {stats['median_us']:>12.2f} {old['median_us']:>12.2f} {change:>+8.1%} "
+            f"{stats['peak_bytes'] / 1024:>10.1f} {old['peak_bytes'] / 1024:>10.1f}"
+        )
+        if change > max_regression:
+            failures.append(f"{name} median {stats['median_us']:.2f}µs regressed {change:+.0%}")
+    return failures
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="In-process microbenchmarks of config loading and response building.")
+    parser.add_argument("--banners", type=int, default=1000, help="Number of synthetic banners (default: 1000)")
+    parser.add_argument("--locations", type=int, default=50, help="Number of distinct locations (default: 50)")
+    parser.add_argument("--conditions", type=int, default=100, help="Banners with a special condition (default: 100)")
+    parser.add_argument("--image-size", type=int, default=64 * 1024, help="Image size in bytes (default: 65536)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic configs (default: 0)")
+    parser.add_argument("--min-time", type=float, default=0.01, help="Minimum seconds per round (default: 0.01)")
+    parser.add_argument("--rounds", type=int, default=20, help="Timed rounds per stage (default: 20)")
+    parser.add_argument("--stage", action="append", help="Only run this stage; may be repeated")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against the results stored in this JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed median slowdown with --compare (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    # Tied synthetic banners would log a warning per selection
+    logging.disable(logging.WARNING)
+    scenario = {
+        "banners": args.banners,
+        "locations": args.locations,
+        "conditions": args.conditions,
+        "image_size": args.image_size,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        configs = generate_configs(directory, args.banners, args.locations, args.conditions, args.image_size, args.seed)
+        stages = build_stages(directory, configs)
+        unknown = set(args.stage or ()) - stages.keys()
+        if unknown:
+            print(f"Unknown stages {sorted(unknown)}, expected some of {sorted(stages)}")
+            return 2
+
+        print(f"{'stage':<24} {'median µs':>12} {'min µs':>12} {'stddev µs':>10} {'ops/s':>12} {'peak KiB':>10} {'retained B':>11}")
+        results = {"scenario": scenario, "python": sys.version.split()[0], "stages": {}}
+        for name, function in stages.items():
+            if args.stage and name not in args.stage:
+                continue
+            stats = measure(function, args.min_time, args.rounds)
+            results["stages"][name] = stats
+            print(
+                f"{name:<24} {stats['median_us']:>12.2f} {stats['min_us']:>12.2f} {stats['stddev_us']:>10.2f} "
+                f"{stats['ops_per_s']:>12.0f} {stats['peak_bytes'] / 1024:>10.1f} {stats['retained_bytes']:>11.0f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if not args.compare:
+        return 0
+    with open(args.compare) as previous_file:
+        previous = json.load(previous_file)
+    if previous.get("scenario") != scenario:
+        print(f"FAILED: previous results were recorded for a different scenario: {previous.get('scenario')}")
+        return 1
+    failures = compare(results, previous, args.max_regression)
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
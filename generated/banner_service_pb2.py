@@ -24,17 +24,31 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x62\x61nner_service.proto\x12\x06\x62\x61nner\"+\n\x17GetCurrentBannerRequest\x12\x10\n\x08location\x18\x01 \x01(\t\"c\n\x18GetCurrentBannerResponse\x12\r\n\x05title\x18\x01 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x02 \x01(\t\x12\r\n\x05image\x18\x03 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x04 \x01(\t2f\n\rBannerService\x12U\n\x10GetCurrentBanner\x12\x1f.banner.GetCurrentBannerRequest\x1a .banner.GetCurrentBannerResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x62\x61nner_service.proto\x12\x06\x62\x61nner\"\x9a\x01\n\x17GetCurrentBannerRequest\x12\x10\n\x08location\x18\x01 \x01(\t\x12\x15\n\rif_none_match\x18\x02 \x01(\t\x12\x1a\n\x12image_by_reference\x18\x03 \x01(\x08\x12\x0f\n\x07user_id\x18\x04 \x01(\t\x12\x16\n\x0e\x61\x63\x63\x65pt_formats\x18\x05 \x03(\t\x12\x11\n\tmax_width\x18\x06 \x01(\r\"\xac\x01\n\x18GetCurrentBannerResponse\x12\r\n\x05title\x18\x01 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x02 \x01(\t\x12\r\n\x05image\x18\x03 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x04 \x01(\t\x12\x0c\n\x04\x65tag\x18\x05 \x01(\t\x12\x14\n\x0cnot_modified\x18\x06 \x01(\x08\x12\x12\n\nimage_size\x18\x07 \x01(\x04\x12\x0f\n\x07variant\x18\x08 \x01(\t\")\n\x15GetBannerImageRequest\x12\x10\n\x08image_id\x18\x01 \x01(\t\"Z\n\x10\x42\x61nnerImageChunk\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x0e\n\x06offset\x18\x02 \x01(\x04\x12\x12\n\ntotal_size\x18\x03 \x01(\x04\x12\x14\n\x0cimage_format\x18\x04 \x01(\t\"&\n\x12WatchBannerRequest\x12\x10\n\x08location\x18\x01 \x01(\t\"b\n\x11GetBannersRequest\x12\x11\n\tlocations\x18\x01 \x03(\t\x12\x0f\n\x07user_id\x18\x02 \x01(\t\x12\x16\n\x0e\x61\x63\x63\x65pt_formats\x18\x03 \x03(\t\x12\x11\n\tmax_width\x18\x04 \x01(\r\"n\n\x06\x42\x61nner\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\r\n\x05image\x18\x04 \x01(\x0c\x12\x14\n\x0cimage_format\x18\x05 \x01(\t\x12\x0f\n\x07variant\x18\x06 \x01(\t\"F\n\x0eLocationBanner\x12\x10\n\x08location\x18\x01 \x01(\t\x12\x11\n\tbanner_id\x18\x02 \x01(\t\x12\x0f\n\x07variant\x18\x03 \x01(\t\"a\n\x12GetBannersResponse\x12*\n\nplacements\x18\x01 \x03(\x0b\x32\x16.banner.LocationBanner\x12\x1f\n\x07\x62\x61nners\x18\x02 \x03(\x0b\x32\x0e.banner.Banner2\xc7\x02\n\rBannerService\x12U\n\x10GetCurrentBanner\x12\x1f.banner.GetCurrentBannerRequest\x1a .banner.GetCurrentBannerResponse\x12\x43\n\nGetBanners\x12\x19.banner.GetBannersRequest\x1a\x1a.banner.GetBannersResponse\x12K\n\x0eGetBannerImage\x12\x1d.banner.GetBannerImageRequest\x1a\x18.banner.BannerImageChunk0\x01\x12M\n\x0bWatchBanner\x12\x1a.banner.WatchBannerRequest\x1a .banner.GetCurrentBannerResponse0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'banner_service_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_GETCURRENTBANNERREQUEST']._serialized_start=32
-  _globals['_GETCURRENTBANNERREQUEST']._serialized_end=75
-  _globals['_GETCURRENTBANNERRESPONSE']._serialized_start=77
-  _globals['_GETCURRENTBANNERRESPONSE']._serialized_end=176
-  _globals['_BANNERSERVICE']._serialized_start=178
-  _globals['_BANNERSERVICE']._serialized_end=280
+  _globals['_GETCURRENTBANNERREQUEST']._serialized_start=33
+  _globals['_GETCURRENTBANNERREQUEST']._serialized_end=187
+  _globals['_GETCURRENTBANNERRESPONSE']._serialized_start=190
+  _globals['_GETCURRENTBANNERRESPONSE']._serialized_end=362
+  _globals['_GETBANNERIMAGEREQUEST']._serialized_start=364
+  _globals['_GETBANNERIMAGEREQUEST']._serialized_end=405
+  _globals['_BANNERIMAGECHUNK']._serialized_start=407
+  _globals['_BANNERIMAGECHUNK']._serialized_end=497
+  _globals['_WATCHBANNERREQUEST']._serialized_start=499
+  _globals['_WATCHBANNERREQUEST']._serialized_end=537
+  _globals['_GETBANNERSREQUEST']._serialized_start=539
+  _globals['_GETBANNERSREQUEST']._serialized_end=637
+  _globals['_BANNER']._serialized_start=639
+  _globals['_BANNER']._serialized_end=749
+  _globals['_LOCATIONBANNER']._serialized_start=751
+  _globals['_LOCATIONBANNER']._serialized_end=821
+  _globals['_GETBANNERSRESPONSE']._serialized_start=823
+  _globals['_GETBANNERSRESPONSE']._serialized_end=920
+  _globals['_BANNERSERVICE']._serialized_start=923
+  _globals['_BANNERSERVICE']._serialized_end=1250
 # @@protoc_insertion_point(module_scope)
@@ -40,6 +40,21 @@ class BannerServiceStub(object):
                 request_serializer=banner__service__pb2.GetCurrentBannerRequest.SerializeToString,
                 response_deserializer=banner__service__pb2.GetCurrentBannerResponse.FromString,
                 _registered_method=True)
+        self.GetBanners = channel.unary_unary(
+                '/banner.BannerService/GetBanners',
+                request_serializer=banner__service__pb2.GetBannersRequest.SerializeToString,
+                response_deserializer=banner__service__pb2.GetBannersResponse.FromString,
+                _registered_method=True)
+        self.GetBannerImage = channel.unary_stream(
+                '/banner.BannerService/GetBannerImage',
+                request_serializer=banner__service__pb2.GetBannerImageRequest.SerializeToString,
+                response_deserializer=banner__service__pb2.BannerImageChunk.FromString,
+                _registered_method=True)
+        self.WatchBanner = channel.unary_stream(
+                '/banner.BannerService/WatchBanner',
+                request_serializer=banner__service__pb2.WatchBannerRequest.SerializeToString,
+                response_deserializer=banner__service__pb2.GetCurrentBannerResponse.FromString,
+                _registered_method=True)
 
 
 class BannerServiceServicer(object):
@@ -47,7 +62,30 @@ class BannerServiceServicer(object):
     """
 
     def GetCurrentBanner(self, request, context):
-        """Fetches the current banner configuration.
+        """Fetches the current banner configuration. The trailing metadata "banner-valid-for-ms" holds
+        the milliseconds until the banner selected for the location may change; clients may cache
+        the response for that long. GetBanners sends the minimum over its locations.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBanners(self, request, context):
+        """Fetches the current banners of several locations in one call.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetBannerImage(self, request, context):
+        """Streams the bytes of an image by its content hash, in chunks.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchBanner(self, request, context):
+        """Streams the banner for a location, sending a message whenever the selected banner changes.
         """
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
@@ -61,6 +99,21 @@ def add_BannerServiceServicer_to_server(servicer, server):
                     request_deserializer=banner__service__pb2.GetCurrentBannerRequest.FromString,
                     response_serializer=banner__service__pb2.GetCurrentBannerResponse.SerializeToString,
             ),
+            'GetBanners': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetBanners,
+                    request_deserializer=banner__service__pb2.GetBannersRequest.FromString,
+                    response_serializer=banner__service__pb2.GetBannersResponse.SerializeToString,
+            ),
+            'GetBannerImage': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetBannerImage,
+                    request_deserializer=banner__service__pb2.GetBannerImageRequest.FromString,
+                    response_serializer=banner__service__pb2.BannerImageChunk.SerializeToString,
+            ),
+            'WatchBanner': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchBanner,
+                    request_deserializer=banner__service__pb2.WatchBannerRequest.FromString,
+                    response_serializer=banner__service__pb2.GetCurrentBannerResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'banner.BannerService', rpc_method_handlers)
@@ -99,3 +152,84 @@ class BannerService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetBanners(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/banner.BannerService/GetBanners',
+            banner__service__pb2.GetBannersRequest.SerializeToString,
+            banner__service__pb2.GetBannersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetBannerImage(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/banner.BannerService/GetBannerImage',
+            banner__service__pb2.GetBannerImageRequest.SerializeToString,
+            banner__service__pb2.BannerImageChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchBanner(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/banner.BannerService/WatchBanner',
+            banner__service__pb2.WatchBannerRequest.SerializeToString,
+            banner__service__pb2.GetCurrentBannerResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
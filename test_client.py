@@ -2,37 +2,33 @@ import grpc
 
 import sys
 import os
-# Add the root project directory to PYTHONPATH 
+# Add the root project directory to PYTHONPATH
 sys.path.append(os.path.join(os.path.dirname(__file__), "generated"))
 
-from generated import banner_service_pb2, banner_service_pb2_grpc
+from banner_client import BannerClient
 
 
-def test_get_current_banner(location):
-    # Connect to the server
-    with grpc.insecure_channel("localhost:51234") as channel:
-        stub = banner_service_pb2_grpc.BannerServiceStub(channel)
-        
-        # Prepare the request
-        request = banner_service_pb2.GetCurrentBannerRequest(location=location)
-        
-        try:
-            # Call the method
-            response = stub.GetCurrentBanner(request)
-            
-            # Print the response
-            print("Banner Response:")
-            print(f"Title: {response.title}")
-            print(f"Description: {response.description}")
-            print(f"Image Format: {response.image_format}")
-            print(f"Image Data Size: {len(response.image)} bytes")
-        except grpc.RpcError as e:
-            print(f"gRPC error: {e.code()} - {e.details()}")
+def test_get_current_banner(client, location):
+    try:
+        # Served from the client's cache while the server says the banner holds
+        banner = client.get_banner(location)
+
+        # Print the response
+        print("Banner Response:")
+        print(f"Title: {banner.title}")
+        print(f"Description: {banner.description}")
+        print(f"Image Format: {banner.image_format}")
+        print(f"Image Data Size: {len(banner.image)} bytes")
+    except grpc.RpcError as e:
+        print(f"gRPC error: {e.code()} - {e.details()}")
 
 if __name__ == "__main__":
-    # Test with different locations
-    test_get_current_banner("US")
-    test_get_current_banner("FR")
-    test_get_current_banner("INVALID_LOCATION")
-    test_get_current_banner("GB")
-    test_get_current_banner("DE")
\ No newline at end of file
+    # One client, and one connection, for all calls
+    with BannerClient("localhost:51234") as client:
+        # Test with different locations
+        test_get_current_banner(client, "US")
+        test_get_current_banner(client, "FR")
+        test_get_current_banner(client, "INVALID_LOCATION")
+        test_get_current_banner(client, "GB")
+        test_get_current_banner(client, "DE")
+        print(f"Client cache: {dict(client.stats)}")
@@ -0,0 +1,178 @@
+import threading
+import time
+from concurrent import futures
+from datetime import datetime, timezone
+
+import grpc
+import pytest
+from banner_client import BannerClient
+from banner_config import load_configs
+from banner_service import BannerService, add_banner_service_to_server
+from banner_metadata import VALID_FOR_METADATA
+from generated import banner_service_pb2, banner_service_pb2_grpc
+
+pytestmark = pytest.mark.unit
+
+
+class ScriptedService(banner_service_pb2_grpc.BannerServiceServicer):
+    """
+    Answers GetCurrentBanner with a settable banner and valid-for hint, and counts the calls.
+    """
+
+    def __init__(self):
+        self.title = "Sale"
+        self.image = b"image-1"
+        self.valid_for_ms = None
+        self.delay = 0.0
+        self.status = None
+        self.calls = 0
+        self.image_calls = 0
+
+    def GetCurrentBanner(self, request, context):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.status is not None:
+            context.abort(self.status, "unavailable")
+        if self.valid_for_ms is not None:
+            context.set_trailing_metadata(((VALID_FOR_METADATA, str(self.valid_for_ms)),))
+        return banner_service_pb2.GetCurrentBannerResponse(
+            title=self.title, image_format="png", etag=self.image.decode(), image_size=len(self.image)
+        )
+
+    def GetBannerImage(self, request, context):
+        self.image_calls += 1
+        yield banner_service_pb2.BannerImageChunk(data=request.image_id.encode(), image_format="png")
+
+
+def start_server(servicer, add=banner_service_pb2_grpc.add_BannerServiceServicer_to_server):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    add(servicer, server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    return server, f"localhost:{port}"
+
+
+@pytest.fixture
+def scripted():
+    service = ScriptedService()
+    server, target = start_server(service)
+    yield service, target
+    server.stop(None)
+
+
+def test_cached_until_the_servers_hint(scripted):
+    """
+    Test that a banner is served from the cache for the hinted time, then fetched again.
+    """
+    service, target = scripted
+    service.valid_for_ms = 200
+    with BannerClient(target, max_ttl=60.0) as client:
+        assert client.get_banner("US").title == "Sale"
+        service.title = "New Sale"
+        assert client.get_banner("US").title == "Sale"
+        assert service.calls == 1
+
+        time.sleep(0.25)
+        assert client.get_banner("US").title == "New Sale"
+        assert service.calls == 2
+        assert client.stats["hits"] == 1
+        assert client.stats["refreshes"] == 0  # Known changes are not refreshed ahead
+
+
+def test_refreshes_in_the_background_before_max_ttl(scripted):
+    """
+    Test that a banner cached for max_ttl is refreshed in the background while the cached one
+    is still served.
+    """
+    service, target = scripted
+    with BannerClient(target, max_ttl=0.5, refresh_ahead=0.5) as client:
+        client.get_banner("US")
+        service.title = "New Sale"
+        service.delay = 0.2
+
+        time.sleep(0.3)
+        started = time.monotonic()
+        assert client.get_banner("US").title == "Sale"
+        assert time.monotonic() - started < 0.1
+
+        deadline = time.monotonic() + 5
+        while client.get_banner("US").title != "New Sale" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.get_banner("US").title == "New Sale"
+        assert client.stats["refreshes"] == 1
+
+
+def test_concurrent_misses_are_coalesced(scripted):
+    """
+    Test that concurrent requests for an uncached banner wait on a single RPC.
+    """
+    service, target = scripted
+    service.delay = 0.2
+    with BannerClient(target, channels=2) as client:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.get_banner("US"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(results) == 8
+        assert service.calls == 1
+        assert client.stats["coalesced"] == 7
+
+
+def test_images_are_cached_by_etag(scripted):
+    """
+    Test that an image is fetched once per etag, whichever banner or location uses it.
+    """
+    service, target = scripted
+    service.valid_for_ms = 0
+    with BannerClient(target) as client:
+        assert client.get_banner("US").image == b"image-1"
+        assert client.get_banner("FR").image == b"image-1"
+        service.image = b"image-2"
+        assert client.get_banner("US").image == b"image-2"
+
+        assert service.calls == 3
+        assert service.image_calls == 2
+        assert client.stats["image_hits"] == 1
+
+
+def test_serves_stale_banner_if_the_server_fails(scripted):
+    """
+    Test that an expired banner is served within stale_if_error when refreshing fails, and
+    the error raised after that.
+    """
+    service, target = scripted
+    service.valid_for_ms = 100
+    with BannerClient(target, stale_if_error=0.3) as client:
+        client.get_banner("US")
+        service.status = grpc.StatusCode.UNAVAILABLE
+
+        time.sleep(0.15)
+        assert client.get_banner("US").title == "Sale"
+        assert client.stats["stale"] == 1
+
+        time.sleep(0.3)
+        with pytest.raises(grpc.RpcError) as error:
+            client.get_banner("US")
+        assert error.value.code() == grpc.StatusCode.UNAVAILABLE
+
+
+def test_hint_from_banner_service(mocker):
+    """
+    Test that the client caches a real service's banner until its next special-condition flip.
+    """
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, 12, 0, 59, 900000, tzinfo=timezone.utc)
+    service = BannerService()
+    server, target = start_server(service, add_banner_service_to_server)
+    try:
+        with BannerClient(target) as client:
+            banner = client.get_banner("GB")
+            assert banner.title == "Big Winter Sale"
+            assert banner.image
+            assert client._entries[("GB", "")].expires_at - time.monotonic() < 0.1
+    finally:
+        server.stop(None)
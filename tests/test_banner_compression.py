@@ -0,0 +1,40 @@
+import grpc
+import pytest
+from banner_compression import CompressionPolicy
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize("size, incompressible, expected", [
+    (5000, 0, True),         # Large text-only response
+    (500, 0, False),         # Too small to gain anything
+    (600000, 590000, False), # Mostly PNG bytes
+    (4000, 1500, True),      # Mostly text
+])
+def test_should_compress_text_heavy_responses(size, incompressible, expected):
+    """
+    Test that only responses with enough compressible bytes are compressed.
+    """
+    assert CompressionPolicy("gzip", min_size=1024).should_compress(size, incompressible) is expected
+
+
+def test_apply_sets_call_compression(mocker):
+    """
+    Test that the policy enables compression on the call only when it pays off, and never when disabled.
+    """
+    context = mocker.Mock()
+
+    CompressionPolicy("deflate").apply(context, 600000, 590000)
+    CompressionPolicy("none").apply(context, 5000)
+    context.set_compression.assert_not_called()
+
+    CompressionPolicy("deflate").apply(context, 5000)
+    context.set_compression.assert_called_once_with(grpc.Compression.Deflate)
+
+
+def test_unknown_algorithm_is_rejected():
+    """
+    Test that a misspelled algorithm fails at startup instead of silently disabling compression.
+    """
+    with pytest.raises(ValueError):
+        CompressionPolicy("brotli")
@@ -1,6 +1,8 @@
+import json
 import os
 import pytest
-from banner_config import BannerConfig, validate_config, load_configs
+from datetime import datetime, timezone
+from banner_config import BannerConfig, validate_config, load_configs, compile_condition
 pytestmark = pytest.mark.unit
 
 @pytest.fixture
@@ -50,6 +52,27 @@ def test_banner_config_creation(example_config):
     assert "FJ" in banner.locations
 
 
+def test_banner_config_is_immutable(example_config):
+    """
+    Test that BannerConfig is slotted and cannot be modified after creation.
+    """
+    banner = BannerConfig(**example_config)
+    with pytest.raises(AttributeError):
+        banner.title = "Changed"
+    assert not hasattr(banner, "__dict__")
+    assert banner.start_us == 1733011200000000
+
+
+def test_banner_config_interns_locations(example_config):
+    """
+    Test that location codes are stored as interned tuples shared between configs.
+    """
+    first = BannerConfig(**example_config)
+    second = BannerConfig(**dict(example_config, locations=["".join(["F", "J"])]))
+    assert isinstance(first.locations, tuple)
+    assert second.locations[0] is first.locations[1]
+
+
 def test_load_configs_with_example_file():
     """
     Test that load_configs correctly loads the example.json file.
@@ -64,3 +87,170 @@ def test_load_configs_with_example_file():
     assert example_banner.description == "End of Season LOOOOOT!"
     assert "FJ" in example_banner.locations
     assert "BE" in example_banner.locations
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("odd-minutes", True),
+    ("even-minutes", False),
+    ("minute-mod:5:1", True),
+    ("hours:9-17", True),
+    ("hours:22-2", False),
+    ("days:mon-fri", True),
+    ("days:sat,sun", False),
+    ("hours:9-17 & days:mon-fri", True),
+    ("hours:20-23 @Asia/Tokyo", True),  # 21:01 in Tokyo
+    ("cron:*/2 9-17 * * 1-5", False),
+    ("cron:1 12 10 * *", True),
+])
+def test_compile_condition_evaluates(expression, expected):
+    """
+    Test that compiled special conditions evaluate at a fixed time (Tuesday 2024-12-10 12:01 UTC).
+    """
+    current_time = datetime(2024, 12, 10, 12, 1, 30, tzinfo=timezone.utc)
+    assert compile_condition(expression)(current_time) is expected
+
+
+def test_compile_condition_next_transition():
+    """
+    Test that next_transition skips ahead to the time the condition actually flips.
+    """
+    current_time = datetime(2024, 12, 10, 12, 1, 30, tzinfo=timezone.utc)
+    assert compile_condition("odd-minutes").next_transition(current_time) == datetime(2024, 12, 10, 12, 2, tzinfo=timezone.utc)
+    assert compile_condition("hours:9-17").next_transition(current_time) == datetime(2024, 12, 10, 18, tzinfo=timezone.utc)
+    assert compile_condition("cron:0 9 * * mon").next_transition(current_time) == datetime(2024, 12, 16, 9, tzinfo=timezone.utc)
+
+
+def test_compile_condition_is_shared():
+    """
+    Test that banners with the same special condition share one compiled condition.
+    """
+    assert compile_condition("odd-minutes") is compile_condition("odd-minutes")
+
+
+@pytest.mark.parametrize("expression", ["weekends", "hours:25", "cron:* * *", "days:someday", "odd-minutes @Mars/Base"])
+def test_validate_config_rejects_invalid_condition(example_config, expression):
+    """
+    Test that configs with an unparsable special condition are rejected at load time.
+    """
+    example_config["special_condition"] = expression
+    assert validate_config(example_config) is False
+    with pytest.raises(ValueError):
+        BannerConfig(**example_config)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("special_condition", 5),
+    ("special_condition", True),
+    ("special_condition", ["odd-minutes"]),
+    ("id", 5),
+    ("id", ""),
+    ("title", None),
+    ("description", 5),
+    ("locations", "US"),
+    ("locations", ["US", 1]),
+])
+def test_validate_config_rejects_wrongly_typed_fields(example_config, field, value):
+    """
+    Test that fields of the wrong type are reported as invalid configs instead of raising.
+    """
+    example_config[field] = value
+    assert validate_config(example_config) is False
+
+
+@pytest.mark.parametrize("field, value", [("priority", "high"), ("priority", 1.5), ("weight", 0), ("weight", -3), ("weight", True)])
+def test_validate_config_rejects_invalid_priority_or_weight(example_config, field, value):
+    """
+    Test that priorities must be integers and weights positive integers.
+    """
+    example_config[field] = value
+    assert validate_config(example_config) is False
+
+
+def test_banner_config_priority_and_weight(example_config):
+    """
+    Test that priority defaults to 0, weight to None, and both are read from the config.
+    """
+    banner = BannerConfig(**example_config)
+    assert (banner.priority, banner.weight) == (0, None)
+
+    banner = BannerConfig(**example_config, priority=5, weight=3)
+    assert (banner.priority, banner.weight) == (5, 3)
+
+
+def test_banner_config_variants(example_config):
+    """
+    Test that variants inherit title, description and image from the banner unless overridden.
+    """
+    example_config["variants"] = [
+        {"id": "control", "weight": 3},
+        {"id": "test", "weight": 1, "title": "New Sale", "image": "example-test"},
+    ]
+    control, test = BannerConfig(**example_config).variants
+
+    assert (control.title, control.description, control.image_id) == ("Some Sale", "End of Season LOOOOOT!", "example")
+    assert (test.title, test.image_id) == ("New Sale", "example-test")
+    assert BannerConfig(**example_config).variant_weights == (3, 4)
+
+
+@pytest.mark.parametrize("variants", [
+    {"id": "a", "weight": 1},
+    [{"id": "a"}],
+    [{"id": "a", "weight": 0}],
+    [{"id": "a", "weight": 1}, {"id": "a", "weight": 2}],
+])
+def test_validate_config_rejects_invalid_variants(example_config, variants):
+    """
+    Test that variants must be a list of objects with unique ids and positive weights.
+    """
+    example_config["variants"] = variants
+    assert validate_config(example_config) is False
+
+
+def test_load_configs_parallel_keeps_file_order(tmp_path, example_config):
+    """
+    Test that a large directory loaded by a worker pool yields configs in file name order.
+    """
+    for number in range(600):
+        (tmp_path / f"{number:04d}.json").write_text(json.dumps(dict(example_config, id=f"banner-{number:04d}")))
+    (tmp_path / "0300.json").write_text("{not json")
+
+    sequential = load_configs(str(tmp_path), workers=1)
+    parallel = load_configs(str(tmp_path), workers=2)
+
+    assert len(parallel) == 599
+    assert [c.id for c in parallel] == [c.id for c in sequential] == sorted(c.id for c in parallel)
+
+
+def test_load_configs_from_ndjson_bundle(tmp_path, example_config):
+    """
+    Test that a bundle with one config per line is loaded, skipping blank and invalid lines.
+    """
+    bundle = tmp_path / "banners.ndjson"
+    bundle.write_text("\n".join([
+        json.dumps(dict(example_config, id="first")),
+        "",
+        "{not json",
+        json.dumps({"id": "missing-fields"}),
+        json.dumps(dict(example_config, id="second")),
+    ]))
+
+    configs = load_configs(str(bundle))
+
+    assert [c.id for c in configs] == ["first", "second"]
+
+
+def test_load_configs_confines_unexpected_errors_to_their_file(mocker, tmp_path, example_config):
+    """
+    Test that an unexpected exception while loading one file only skips that file.
+    """
+    from banner_config import parse_config
+    for name in ("first", "broken", "second"):
+        (tmp_path / f"{name}.json").write_text(json.dumps(dict(example_config, id=name)))
+
+    def parse(config):
+        if config["id"] == "broken":
+            raise RuntimeError("boom")
+        return parse_config(config)
+
+    mocker.patch("banner_config.parse_config", side_effect=parse)
+    assert [c.id for c in load_configs(str(tmp_path))] == ["first", "second"]
@@ -0,0 +1,145 @@
+import os
+import logging
+import pytest
+import banner_images
+from banner_images import ImageStore
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def content_dir(tmp_path):
+    """
+    Provides a content directory with two small banner images.
+    """
+    (tmp_path / "a.png").write_bytes(b"a" * 10)
+    (tmp_path / "b.png").write_bytes(b"b" * 10)
+    return tmp_path
+
+
+def test_get_serves_from_memory(mocker, content_dir):
+    """
+    Test that an image is read from disk once and served from memory afterwards.
+    """
+    store = ImageStore(content_dir=str(content_dir), revalidate_interval=60)
+    assert store.get("a") == b"a" * 10
+
+    mocker.patch("builtins.open", side_effect=AssertionError("unexpected disk read"))
+    assert store.get("a") == b"a" * 10
+
+
+def test_missing_image_is_cached_as_negative_entry(mocker, content_dir):
+    """
+    Test that a missing image is only looked up on disk once.
+    """
+    store = ImageStore(content_dir=str(content_dir), revalidate_interval=60)
+    assert store.get("missing") is None
+
+    mocker.patch("builtins.open", side_effect=AssertionError("unexpected disk read"))
+    assert store.get("missing") is None
+
+
+def test_changed_file_is_reloaded(content_dir):
+    """
+    Test that an entry is invalidated when the file's mtime/size changes.
+    """
+    store = ImageStore(content_dir=str(content_dir), revalidate_interval=0)
+    assert store.get("a") == b"a" * 10
+
+    store.get("b")  # Evicts "a" again
+    path = content_dir / "a.png"
+    path.write_bytes(b"new content")
+    os.utime(path, ns=(0, 0))
+    assert store.get("a") == b"new content"
+
+
+def test_lru_eviction_respects_byte_budget(content_dir):
+    """
+    Test that the least recently used image is evicted once the budget is exceeded.
+    """
+    (content_dir / "c.png").write_bytes(b"c" * 10)
+    store = ImageStore(content_dir=str(content_dir), max_bytes=20, revalidate_interval=60)
+
+    store.get("a")
+    store.get("b")
+    store.get("a")  # "b" is now the least recently used entry
+    store.get("c")
+
+    assert store.size == 20
+    assert "b" not in store._entries
+    assert "a" in store._entries and "c" in store._entries
+
+
+def test_get_by_etag_rereads_evicted_and_oversized_images(mocker, content_dir):
+    """
+    Test that images are fetched by content hash from memory, and from disk again once evicted
+    or if too large to cache, as long as the file still has that hash.
+    """
+    (content_dir / "large.png").write_bytes(b"l" * 50)
+    store = ImageStore(content_dir=str(content_dir), max_bytes=10, revalidate_interval=0)
+    data = store.get("a")
+    etag = store.etag("a", data)
+    large = store.get("large")
+    large_etag = store.etag("large", large)
+
+    read = mocker.spy(store, "_load")
+    assert store.get_by_etag(etag) == data
+    assert read.call_count == 0
+
+    store.get("b")  # Evicts "a"
+    assert store.get_by_etag(etag) == data
+    assert store.get_by_etag(large_etag) == large
+
+    store.get("b")  # Evicts "a" again
+    path = content_dir / "a.png"
+    path.write_bytes(b"new content")
+    os.utime(path, ns=(0, 0))
+    assert store.get_by_etag(etag) is None
+    assert store.get_by_etag("unknown") is None
+
+
+def test_only_current_image_hashes_are_kept(content_dir):
+    """
+    Test that a banner's replaced image hashes are forgotten, so repeated edits do not grow the
+    store, and that invalidating everything forgets all hashes.
+    """
+    store = ImageStore(content_dir=str(content_dir), revalidate_interval=0)
+    path = content_dir / "a.png"
+    for version in range(5):
+        path.write_bytes(b"version %d" % version)
+        os.utime(path, ns=(version, version))
+        store.get("a")
+    store.get("b")
+
+    current = store.etag("a", store.get("a"))
+    assert store._etag_ids == {current: "a", store.etag("b", store.get("b")): "b"}
+
+    store.invalidate()
+    assert store._etag_ids == {}
+    assert store.get_by_etag(current) is None
+
+
+def test_oversized_image_is_hashed_and_reported_once(mocker, caplog, content_dir):
+    """
+    Test that an image too large to cache is read on every get, but hashed and reported only
+    once, and that its current hash is known without reading it until the file changes.
+    """
+    path = content_dir / "large.png"
+    path.write_bytes(b"l" * 50)
+    store = ImageStore(content_dir=str(content_dir), max_bytes=10, revalidate_interval=0)
+    hashes = mocker.spy(banner_images, "content_etag")
+
+    with caplog.at_level(logging.WARNING):
+        assert store.get("large") == store.get("large") == b"l" * 50
+    assert hashes.call_count == 1
+    etag = banner_images.content_etag(b"l" * 50)
+    hashes.reset_mock()
+
+    read = mocker.spy(store, "_load")
+    assert store.current_etag("large") == etag
+    assert read.call_count == 0 and hashes.call_count == 0
+    assert len([record for record in caplog.records if "exceeds the cache budget" in record.message]) == 1
+
+    path.write_bytes(b"L" * 60)
+    assert store.current_etag("large") == banner_images.content_etag(b"L" * 60)
+    assert read.call_count == 1
@@ -0,0 +1,69 @@
+import pytest
+from banner_config import BannerConfig
+from banner_index import BannerIndex
+
+pytestmark = pytest.mark.unit
+
+
+def make_banner(id, locations, start_time="2024-12-01T00:00:00Z", priority=0):
+    return BannerConfig(
+        id=id,
+        title=id,
+        description=id,
+        start_time=start_time,
+        end_time="2024-12-31T23:59:59Z",
+        locations=locations,
+        priority=priority
+    )
+
+
+def test_candidates_include_location_and_all_banners():
+    """
+    Test that a location's candidates contain its own banners and the "ALL" banners only.
+    """
+    index = BannerIndex([
+        make_banner("us", ["US", "CA"]),
+        make_banner("fr", ["FR"]),
+        make_banner("global", ["ALL"]),
+    ])
+
+    # Same start time, so ordered by id
+    assert [b.id for b in index.candidates("US")] == ["global", "us"]
+    assert [b.id for b in index.candidates("CA")] == ["global", "us"]
+    assert [b.id for b in index.candidates("UNKNOWN")] == ["global"]
+
+
+def test_candidates_sorted_by_start_time():
+    """
+    Test that candidates are ordered by start time regardless of load order.
+    """
+    index = BannerIndex([
+        make_banner("late", ["US"], start_time="2024-12-10T00:00:00Z"),
+        make_banner("global", ["ALL"], start_time="2024-12-05T00:00:00Z"),
+        make_banner("early", ["US"], start_time="2024-12-01T00:00:00Z"),
+    ])
+
+    assert [b.id for b in index.candidates("US")] == ["early", "global", "late"]
+
+
+def test_candidates_sorted_by_priority_first():
+    """
+    Test that a higher priority wins over an earlier start time.
+    """
+    index = BannerIndex([
+        make_banner("early", ["US"], start_time="2024-12-01T00:00:00Z"),
+        make_banner("urgent", ["US"], start_time="2024-12-10T00:00:00Z", priority=10),
+        make_banner("global", ["ALL"], start_time="2024-12-05T00:00:00Z", priority=-1),
+    ])
+
+    assert [b.id for b in index.candidates("US")] == ["urgent", "early", "global"]
+
+
+def test_candidates_order_independent_of_load_order():
+    """
+    Test that banners with equal priority and start time are ordered by id, whatever the load order.
+    """
+    banners = [make_banner(id, ["US"]) for id in ("c", "a", "b")]
+
+    assert [b.id for b in BannerIndex(banners).candidates("US")] == ["a", "b", "c"]
+    assert [b.id for b in BannerIndex(banners[::-1]).candidates("US")] == ["a", "b", "c"]
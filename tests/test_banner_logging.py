@@ -0,0 +1,93 @@
+import logging
+import logging.handlers
+import pytest
+from banner_logging import HotPathLogger, start_queue_logging, stop_queue_logging
+
+pytestmark = pytest.mark.unit
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def handler():
+    """
+    Provides a handler collecting the messages of an isolated test logger.
+    """
+    logger = logging.getLogger("test_banner_logging")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = RecordingHandler()
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+def test_messages_are_rate_limited_per_key(mocker, handler):
+    """
+    Test that each key emits at most `limit` records per window and reports what it suppressed.
+    """
+    clock = mocker.patch("banner_logging.time.monotonic", return_value=0.0)
+    log = HotPathLogger(logging.getLogger("test_banner_logging"), limit=2, window=60)
+
+    emitted = [log.error("no_match", "No match for %s", location) for location in ("A", "B", "C", "D")]
+    log.error("other_key", "Other")
+
+    assert emitted == [True, True, False, False]
+    assert handler.messages == ["No match for A", "No match for B", "Other"]
+
+    clock.return_value = 61.0
+    log.error("no_match", "No match for %s", "E")
+    assert handler.messages[-2:] == ["Suppressed 2 similar messages (no_match) in the last 60s.", "No match for E"]
+
+
+class Unformattable:
+    def __str__(self):
+        raise AssertionError("argument was formatted")
+
+
+def test_suppressed_messages_are_not_formatted(handler):
+    """
+    Test that arguments of suppressed records are never formatted.
+    """
+    log = HotPathLogger(logging.getLogger("test_banner_logging"), limit=0)
+
+    assert log.warning("key", "Value %s", Unformattable()) is False
+    assert handler.messages == []
+
+
+def test_flush_summarizes_counted_events(handler):
+    """
+    Test that counted events are reported as one summary line per key and label.
+    """
+    log = HotPathLogger(logging.getLogger("test_banner_logging"), summary_interval=60)
+    log.summarize("fallback", logging.WARNING, "%(count)d requests fell back for %(label)s in the last %(interval).0fs")
+    for location in ("XX", "XX", "YY"):
+        log.count("fallback", location)
+
+    log.flush()
+    log.flush()  # Counts are reset after each summary
+
+    assert handler.messages == ["2 requests fell back for XX in the last 60s", "1 requests fell back for YY in the last 60s"]
+
+
+def test_queue_logging_writes_records_from_listener(handler):
+    """
+    Test that queued records reach the original handlers and the handlers are restored on stop.
+    """
+    logger = logging.getLogger("test_banner_logging")
+    listener = start_queue_logging(logger)
+
+    assert handler not in logger.handlers
+    logger.info("Queued %d", 1)
+    stop_queue_logging(listener, logger)
+
+    assert handler.messages == ["Queued 1"]
+    assert handler in logger.handlers
+    assert not any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers)
@@ -0,0 +1,83 @@
+import grpc
+import pytest
+from banner_metrics import BannerMetrics, Counter, Histogram, MetricsInterceptor
+
+pytestmark = pytest.mark.unit
+
+
+def test_counter_renders_labeled_series():
+    """
+    Test that counters are rendered in the Prometheus text format with escaped labels.
+    """
+    counter = Counter("requests_total", "Requests.", ("location",))
+    counter.inc("US")
+    counter.inc("US", amount=2)
+    counter.inc('quo"te')
+
+    assert counter.render() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{location="US"} 3',
+        'requests_total{location="quo\\"te"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    """
+    Test that observations land in the first bucket whose bound they do not exceed.
+    """
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+    assert histogram.count() == 4
+
+
+def make_handler(behavior):
+    return grpc.unary_unary_rpc_method_handler(behavior)
+
+
+def test_interceptor_records_status_and_latency(mocker):
+    """
+    Test that the interceptor counts RPCs by method and status code, including aborted ones.
+    """
+    metrics = BannerMetrics()
+    interceptor = MetricsInterceptor(metrics)
+    details = mocker.Mock(method="/banner.BannerService/GetCurrentBanner")
+
+    def fail(request, context):
+        raise RuntimeError("aborted")
+
+    ok = interceptor.intercept_service(lambda _: make_handler(lambda request, context: "response"), details)
+    failed = interceptor.intercept_service(lambda _: make_handler(fail), details)
+
+    assert ok.unary_unary("request", mocker.Mock(code=lambda: None)) == "response"
+    with pytest.raises(RuntimeError):
+        failed.unary_unary("request", mocker.Mock(code=lambda: grpc.StatusCode.NOT_FOUND))
+
+    assert metrics.rpc_requests.value("GetCurrentBanner", "OK") == 1
+    assert metrics.rpc_requests.value("GetCurrentBanner", "NOT_FOUND") == 1
+    assert metrics.rpc_latency.count("GetCurrentBanner") == 2
+    assert "banner_rpc_requests_total" in metrics.render()
+
+
+def test_interceptor_records_streams_apart_from_unary_latency(mocker):
+    """
+    Test that a server stream's lifetime is recorded as its duration, not as RPC latency.
+    """
+    metrics = BannerMetrics()
+    details = mocker.Mock(method="/banner.BannerService/WatchBanner")
+    handler = MetricsInterceptor(metrics).intercept_service(
+        lambda _: grpc.unary_stream_rpc_method_handler(lambda request, context: iter(["first", "second"])), details
+    )
+
+    assert list(handler.unary_stream("request", mocker.Mock(code=lambda: None))) == ["first", "second"]
+
+    assert metrics.rpc_requests.value("WatchBanner", "OK") == 1
+    assert metrics.rpc_stream_duration.count("WatchBanner") == 1
+    assert metrics.rpc_latency.count("WatchBanner") == 0
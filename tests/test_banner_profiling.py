@@ -0,0 +1,186 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+import grpc
+import pytest
+from banner_config import load_configs
+from banner_metrics import BannerMetrics, MetricsServer
+from banner_profiling import Profiler, ProfilerBusy, ProfilingInterceptor, RequestTrace, current_trace
+from banner_service import BannerService
+from generated import banner_service_pb2
+
+pytestmark = pytest.mark.unit
+
+
+def intercept(profiler, behavior, mocker):
+    details = mocker.Mock(method="/banner.BannerService/GetCurrentBanner")
+    handler = ProfilingInterceptor(profiler).intercept_service(
+        lambda _: grpc.unary_unary_rpc_method_handler(behavior), details
+    )
+    return handler.unary_unary
+
+
+def test_trace_marks_consecutive_stages():
+    """
+    Test that each mark records the time since the previous one and repeated stages add up.
+    """
+    trace = RequestTrace()
+    time.sleep(0.01)
+    trace.mark("selection")
+    trace.mark("proto_build")
+    time.sleep(0.01)
+    trace.mark("selection")
+
+    assert set(trace.stages) == {"selection", "proto_build"}
+    assert trace.stages["selection"] >= 0.02
+    assert trace.stages["proto_build"] < 0.01
+
+
+def test_unsampled_requests_are_not_traced(mocker):
+    """
+    Test that with a zero sample rate handlers see no trace and nothing is recorded.
+    """
+    metrics = BannerMetrics()
+    handler = intercept(Profiler(metrics, sample_rate=0.0), lambda request, context: current_trace(), mocker)
+
+    assert handler("request", None) is None
+    assert metrics.request_stage_latency.count("GetCurrentBanner", "total") == 0
+
+
+def test_sampled_request_records_service_stages(mocker):
+    """
+    Test that a sampled GetCurrentBanner cache miss records every stage of the service and the total.
+    """
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mocker.patch("banner_service.datetime").now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+    service = BannerService()
+    profiler = Profiler(service.metrics, sample_rate=1.0)
+    handler = intercept(profiler, service.GetCurrentBanner, mocker)
+
+    response = handler(banner_service_pb2.GetCurrentBannerRequest(location="FJ"), None)
+
+    assert response.title == "Some Sale"
+    for stage in ("selection", "cache_lookup", "image_fetch", "proto_build", "negotiation", "total"):
+        assert service.metrics.request_stage_latency.count("GetCurrentBanner", stage) == 1
+    assert current_trace() is None
+
+
+def test_capture_rejects_invalid_parameters_and_concurrent_captures():
+    """
+    Test that out-of-range parameters and a second concurrent capture are refused.
+    """
+    profiler = Profiler(BannerMetrics(), max_seconds=5)
+    with pytest.raises(ValueError):
+        profiler.capture(mode="perf")
+    with pytest.raises(ValueError):
+        profiler.capture(seconds=10)
+    with pytest.raises(ValueError):
+        Profiler(BannerMetrics(), sample_rate=2.0)
+
+    running = threading.Thread(target=profiler.capture, kwargs={"seconds": 0.5})
+    running.start()
+    time.sleep(0.1)
+    try:
+        with pytest.raises(ProfilerBusy):
+            profiler.capture(seconds=0.1)
+        assert profiler.handle_request({"seconds": ["0.1"]})[0] == 409
+    finally:
+        running.join()
+    assert profiler.handle_request({"mode": ["bogus"]})[0] == 400
+
+
+def spin(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_sample_capture_sees_busy_threads():
+    """
+    Test that sampling reports the functions other threads are running.
+    """
+    stop = threading.Event()
+    worker = threading.Thread(target=spin, args=(stop,))
+    worker.start()
+    try:
+        report = Profiler(BannerMetrics()).capture(seconds=0.2, interval=0.001)
+        collapsed = Profiler(BannerMetrics()).capture(seconds=0.1, interval=0.001, collapsed=True)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert "(spin)" in report
+    assert any(line.split(" ")[0].endswith("(spin)") for line in collapsed.splitlines())
+
+
+def test_cprofile_capture_profiles_handlers(mocker):
+    """
+    Test that a cProfile capture profiles the RPC handlers run while it is active, and only then.
+    """
+    profiler = Profiler(BannerMetrics())
+
+    def handled_during_capture(request, context):
+        return sum(range(1000))
+
+    handler = intercept(profiler, handled_during_capture, mocker)
+    reports = []
+    capture = threading.Thread(target=lambda: reports.append(profiler.capture(mode="cprofile", seconds=0.3)))
+    capture.start()
+    time.sleep(0.1)
+    for _ in range(5):
+        handler("request", None)
+    capture.join()
+
+    assert "handled_during_capture" in reports[0]
+    assert profiler.handler_profiles is None
+
+
+def test_profile_endpoint_is_served_only_with_a_profiler():
+    """
+    Test that the metrics server serves captures on /debug/profile only if given a profiler.
+    """
+    metrics = BannerMetrics()
+    with_profiler = MetricsServer(metrics, 0, profiler=Profiler(metrics))
+    without_profiler = MetricsServer(metrics, 0)
+    for server in (with_profiler, without_profiler):
+        server.start()
+    try:
+        deadline = time.monotonic() + 5
+        while (with_profiler._server is None or without_profiler._server is None) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        url = "http://localhost:{}/debug/profile?seconds=0.1"
+        with urllib.request.urlopen(url.format(with_profiler._server.server_port)) as response:
+            assert response.status == 200
+            assert b"samples" in response.read()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url.format(without_profiler._server.server_port))
+        assert error.value.code == 404
+    finally:
+        with_profiler.stop()
+        without_profiler.stop()
+
+
+def test_debug_endpoints_are_served_only_to_local_clients(mocker):
+    """
+    Test that the metrics server binds the loopback address by default, and refuses /debug
+    requests from other hosts while still serving /metrics to them.
+    """
+    server = MetricsServer(BannerMetrics(), 0, profiler=Profiler(BannerMetrics()))
+    server.start()
+    try:
+        deadline = time.monotonic() + 5
+        while server._server is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert server._server.server_address[0] == "127.0.0.1"
+
+        mocker.patch("banner_metrics.ipaddress.ip_address").return_value.is_loopback = False
+        url = f"http://127.0.0.1:{server._server.server_port}"
+        with urllib.request.urlopen(url + "/metrics") as response:
+            assert response.status == 200
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url + "/debug/profile?seconds=0.1")
+        assert error.value.code == 403
+    finally:
+        server.stop()
@@ -0,0 +1,107 @@
+import json
+import os
+import pytest
+from banner_config import load_config_files, load_configs
+from banner_metrics import BannerMetrics
+from banner_reload import ConfigWatcher
+
+pytestmark = pytest.mark.unit
+
+
+def write_config(config_dir, id, title="Some Sale"):
+    path = config_dir / f"{id}.json"
+    path.write_text(json.dumps({
+        "id": id,
+        "title": title,
+        "description": "End of Season LOOOOOT!",
+        "start_time": "2024-12-01T00:00:00Z",
+        "end_time": "2024-12-25T23:59:59Z",
+        "locations": ["US"]
+    }))
+    return path
+
+
+@pytest.fixture
+def snapshots():
+    return []
+
+
+@pytest.fixture
+def watcher(tmp_path, snapshots):
+    """
+    Provides a watcher primed on a directory with two configs.
+    """
+    write_config(tmp_path, "a")
+    write_config(tmp_path, "b")
+    watcher = ConfigWatcher(snapshots.append, config_dir=str(tmp_path))
+    watcher.scan(notify=False)
+    return watcher
+
+
+def test_scan_without_changes_does_not_reload(watcher, snapshots):
+    """
+    Test that an unchanged directory does not publish a new snapshot.
+    """
+    assert watcher.scan() is False
+    assert snapshots == []
+
+
+def test_scan_reparses_only_changed_files(mocker, tmp_path, watcher, snapshots):
+    """
+    Test that only modified files are re-parsed and a new immutable snapshot is published.
+    """
+    load = mocker.patch("banner_reload.load_config_files", wraps=load_config_files)
+    path = write_config(tmp_path, "b", title="Updated Sale")
+    os.utime(path, ns=(0, 0))
+
+    assert watcher.scan() is True
+    load.assert_called_once_with([str(path)])
+    assert isinstance(snapshots[-1], tuple)
+    assert [(c.id, c.title) for c in snapshots[-1]] == [("a", "Some Sale"), ("b", "Updated Sale")]
+    assert watcher.stats.reloads == 1
+
+
+def test_scan_handles_removed_and_invalid_files(tmp_path, watcher, snapshots):
+    """
+    Test that removed files drop out of the snapshot and invalid files are skipped.
+    """
+    os.remove(tmp_path / "a.json")
+    (tmp_path / "broken.json").write_text("{not json")
+
+    assert watcher.scan() is True
+    assert [c.id for c in snapshots[-1]] == ["b"]
+
+
+def test_prime_publishes_changes_made_since_loading(tmp_path, snapshots):
+    """
+    Test that priming publishes the directory only if it changed after the served snapshot was loaded.
+    """
+    write_config(tmp_path, "a")
+    loaded = load_configs(str(tmp_path))
+
+    unchanged = ConfigWatcher(snapshots.append, config_dir=str(tmp_path), loaded=loaded)
+    unchanged.prime()
+    assert snapshots == []
+
+    write_config(tmp_path, "a", title="Updated Sale")
+    changed = ConfigWatcher(snapshots.append, config_dir=str(tmp_path), loaded=loaded)
+    changed.prime()
+    assert [c.title for c in snapshots[-1]] == ["Updated Sale"]
+    assert changed.scan() is False
+
+
+def test_reloads_are_recorded_as_metrics(tmp_path, watcher):
+    """
+    Test that reloads, parsed files, failed scans and reload latency are exported as metrics.
+    """
+    watcher.metrics = metrics = BannerMetrics()
+    write_config(tmp_path, "c")
+    assert watcher.scan() is True
+    os.rename(tmp_path, str(tmp_path) + "-gone")
+    assert watcher.scan() is False
+
+    rendered = metrics.render()
+    assert "banner_config_reloads_total 1" in rendered
+    assert "banner_config_files_parsed_total 1" in rendered
+    assert "banner_config_reload_errors_total 1" in rendered
+    assert "banner_config_reload_seconds_count 1" in rendered
@@ -0,0 +1,70 @@
+import struct
+import zlib
+import pytest
+from banner_renditions import RenditionCache, optimize_png
+
+pytestmark = pytest.mark.unit
+
+
+def chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def make_png(width=64, height=64):
+    """
+    Build a grayscale PNG with poorly compressed image data and a metadata chunk.
+    """
+    rows = b"".join(b"\x00" + bytes(x % 4 for x in range(width)) for _ in range(height))
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)),
+        chunk(b"tEXt", b"Comment\x00" + b"x" * 200),
+        chunk(b"IDAT", zlib.compress(rows, 0)),
+        chunk(b"IEND", b""),
+    ])
+
+
+def image_data(png):
+    """
+    Return the decompressed pixel rows of a PNG.
+    """
+    position, compressed = 8, b""
+    while position < len(png):
+        length, kind = struct.unpack_from(">I4s", png, position)
+        if kind == b"IDAT":
+            compressed += png[position + 8:position + 8 + length]
+        position += 12 + length
+    return zlib.decompress(compressed)
+
+
+def test_optimize_png_is_lossless_and_smaller():
+    """
+    Test that recompression keeps the pixels, drops metadata and shrinks the file.
+    """
+    source = make_png()
+    optimized = optimize_png(source)
+
+    assert len(optimized) < len(source)
+    assert image_data(optimized) == image_data(source)
+    assert b"tEXt" not in optimized
+    assert optimize_png(optimized) is None  # Nothing left to gain
+    assert optimize_png(b"not a png") is None
+
+
+def test_rendition_cache_chooses_ready_rendition():
+    """
+    Test that renditions are encoded in the background and chosen by format and source version.
+    """
+    source = make_png()
+    renditions = RenditionCache(formats=["png"], workers=1)
+
+    assert renditions.choose("banner", "etag-1", ["png"]) is None  # Not encoded yet
+    renditions.prepare("banner", source, "etag-1")
+    renditions.wait()
+
+    rendition = renditions.choose("banner", "etag-1", [])
+    assert rendition.format == "png" and len(rendition.data) < len(source)
+    assert renditions.choose("banner", "etag-1", ["png"], max_width=100) is rendition
+    assert renditions.choose("banner", "etag-1", ["gif"]) is None
+    assert renditions.choose("banner", "etag-2", ["png"]) is None  # The source image changed
+    assert renditions.get_by_etag(rendition.etag) is rendition
@@ -0,0 +1,136 @@
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from banner_config import BannerConfig, load_configs
+from banner_schedule import ScheduleBuilder, build_schedule
+from banner_selection import select_banners
+from banner_service import BannerService
+from banner_timeline import BannerTimeline
+
+pytestmark = pytest.mark.unit
+
+START = datetime(2024, 12, 10, 11, 59, 30, tzinfo=timezone.utc)
+
+
+def make_banner(id, locations, priority=0, special_condition=None, end_time="2024-12-31T23:59:59Z"):
+    return BannerConfig(
+        id=id,
+        title=id,
+        description=id,
+        start_time="2024-12-01T00:00:00Z",
+        end_time=end_time,
+        locations=locations,
+        special_condition=special_condition,
+        priority=priority
+    )
+
+
+@pytest.fixture
+def banners():
+    return [
+        make_banner("us-odd", ["US"], priority=1, special_condition="odd-minutes"),
+        make_banner("us", ["US"]),
+        make_banner("fr", ["FR"], end_time="2024-12-10T12:30:00Z"),
+        make_banner("all", ["ALL"], priority=-1),
+    ]
+
+
+def ids(selection):
+    return [banner.id for banner in selection.banners]
+
+
+def test_schedule_ranges_follow_conditions_and_campaign_ends(banners):
+    """
+    Test that a location's ranges change at condition flips and campaign ends, and nowhere else.
+    """
+    table = build_schedule(banners, START, timedelta(hours=1))
+
+    us = table.preview("US")
+    assert len(us) == 61  # The 30 seconds left of 11:59, then a flip every minute
+    assert [entry["banners"][0]["id"] for entry in us[:3]] == ["us-odd", "us", "us-odd"]
+    assert us[1]["from"] == "2024-12-10T12:00:00+00:00"
+
+    fr = table.preview("FR")
+    assert [(entry["until"], entry["banners"][0]["id"]) for entry in fr] == [
+        ("2024-12-10T12:30:00.000001+00:00", "fr"),
+        ("2024-12-10T12:59:30+00:00", "all"),
+    ]
+    assert [entry["banners"][0]["id"] for entry in table.preview(None)] == ["all"]
+
+
+def test_lookup_matches_on_demand_selection(banners):
+    """
+    Test that table lookups agree with selecting from the timeline at random times, for known
+    and unknown locations, and that times outside the table are not answered.
+    """
+    banners = banners + load_configs("resources/configs")
+    table = build_schedule(banners, START, timedelta(hours=6))
+    timeline = BannerTimeline(banners)
+    rng = random.Random(7)
+
+    for _ in range(500):
+        current_time = START + timedelta(seconds=rng.uniform(0, 6 * 3600))
+        segment = timeline.segment_at(current_time)
+        conditions = {condition: condition(current_time) for condition in segment.conditions}
+        for location in ("US", "FR", "GB", "DE", "XX"):
+            expected = select_banners(segment.index.candidates(location), conditions)
+            assert ids(table.lookup(location, current_time)) == ids(expected)
+
+    assert table.lookup("US", START - timedelta(microseconds=1)) is None
+    assert table.lookup("US", START + timedelta(hours=6)) is None
+
+
+def test_service_serves_from_table_and_falls_back_when_outdated(mocker, banners):
+    """
+    Test that the service picks from the table while it is current, and resolves selections
+    itself once the banner list has changed.
+    """
+    mocker.patch("banner_service.banners", banners)
+    service = BannerService()
+    service.schedule.refresh(banners, START)
+    state = mocker.spy(service, "_get_condition_state")
+
+    assert service._pick_banner("US", START)[0].id == "us-odd"
+    assert service._pick_banner("XX", START) == (banners[3], "other")
+    assert state.call_count == 0
+
+    reloaded = banners[1:]
+    mocker.patch("banner_service.banners", reloaded)
+    notify = mocker.spy(service.schedule, "notify")
+    assert service._pick_banner("US", START)[0].id == "us"
+    assert state.call_count == 1
+    assert notify.call_count == 1
+
+
+def test_builder_rebuilds_in_background_and_previews(banners):
+    """
+    Test that the builder thread builds a table, rebuilds it after the banner list changes,
+    and previews it over HTTP-style requests.
+    """
+    builder = ScheduleBuilder(timedelta(hours=1))
+    assert builder.handle_request({})[0] == 503
+
+    source = {"banners": banners}
+    builder.start(lambda: source["banners"])
+    try:
+        deadline = time.monotonic() + 5
+        while builder.table is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert builder.table.source is banners
+
+        source["banners"] = banners[:2]
+        builder.notify()
+        while builder.table.source is not source["banners"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert builder.table.source is source["banners"]
+    finally:
+        builder.stop()
+
+    status, body = builder.handle_request({"location": ["US", "XX"]})
+    preview = json.loads(body)
+    assert status == 200
+    assert set(preview["locations"]) == {"US", "XX"}
+    assert preview["locations"]["XX"] == [{"from": preview["valid_from"], "until": preview["valid_until"], "banners": []}]
@@ -0,0 +1,96 @@
+import random
+import pytest
+from banner_config import BannerConfig, compile_condition
+from banner_selection import assign_variant, select_banners
+
+pytestmark = pytest.mark.unit
+
+ODD = compile_condition("odd-minutes")
+
+
+def make_banner(id, priority=0, weight=None, special_condition=None, variants=None):
+    return BannerConfig(
+        id=id,
+        title=id,
+        description=id,
+        start_time="2024-12-01T00:00:00Z",
+        end_time="2024-12-31T23:59:59Z",
+        locations=["US"],
+        special_condition=special_condition,
+        priority=priority,
+        weight=weight,
+        variants=variants
+    )
+
+
+def test_select_first_matching_banner():
+    """
+    Test that the first candidate whose special condition holds is selected.
+    """
+    candidates = [make_banner("odd", priority=1, special_condition="odd-minutes"), make_banner("plain")]
+
+    assert select_banners(candidates, {ODD: True}).banners == (candidates[0],)
+    assert select_banners(candidates, {ODD: False}).banners == (candidates[1],)
+
+
+def test_select_reports_tie_of_equal_priority():
+    """
+    Test that an equal-priority banner losing only on order is reported, but a lower-priority one is not.
+    """
+    a, b, c = make_banner("a", priority=1), make_banner("b", priority=1), make_banner("c")
+
+    assert select_banners([a, b], {}).tied is b
+    assert select_banners([a, c], {}).tied is None
+
+
+def test_select_nothing_matches():
+    """
+    Test that the empty selection picks no banner.
+    """
+    selection = select_banners([make_banner("odd", special_condition="odd-minutes")], {ODD: False})
+
+    assert selection.banners == ()
+    assert selection.pick(random.Random()) is None
+
+
+def test_weighted_rotation_follows_weights():
+    """
+    Test that matching weighted banners of the same priority are rotated in proportion to their weights.
+    """
+    candidates = [
+        make_banner("a", priority=1, weight=3),
+        make_banner("b", priority=1, weight=1),
+        make_banner("skipped", priority=1, weight=5, special_condition="odd-minutes"),
+        make_banner("low", weight=100),
+    ]
+    selection = select_banners(candidates, {ODD: False})
+    rng = random.Random(42)
+
+    picks = [selection.pick(rng).id for _ in range(4000)]
+
+    assert selection.cumulative_weights == (3, 4)
+    assert set(picks) == {"a", "b"}
+    assert 2800 < picks.count("a") < 3200
+
+
+def test_assign_variant_is_sticky_per_user():
+    """
+    Test that a user gets the same variant regardless of the random state, i.e. on every worker.
+    """
+    banner = make_banner("experiment", variants=[{"id": "a", "weight": 1}, {"id": "b", "weight": 1}])
+
+    for user in ("alice", "bob", "carol"):
+        assert assign_variant(banner, user, random.Random(1)) is assign_variant(banner, user, random.Random(2))
+    assert assign_variant(make_banner("plain"), "alice", random.Random()) is None
+
+
+def test_assign_variant_follows_weights():
+    """
+    Test that users are spread over the variants in proportion to their weights.
+    """
+    banner = make_banner("experiment", variants=[{"id": "control", "weight": 9}, {"id": "test", "weight": 1}])
+    rng = random.Random()
+
+    assigned = [assign_variant(banner, f"user-{n}", rng).id for n in range(5000)]
+
+    assert 400 < assigned.count("test") < 600
@@ -1,6 +1,11 @@
+import asyncio
+import grpc
 import pytest
-from banner_service import BannerService
-from banner_config import load_configs
+from banner_compression import CompressionPolicy
+from banner_service import AsyncBannerService, BannerService
+from banner_config import BannerConfig, load_configs
+from banner_images import ImageStore
+from banner_metadata import VALID_FOR_METADATA
 from generated import banner_service_pb2
 from datetime import datetime, timezone
 
@@ -15,6 +20,22 @@ def service():
     return BannerService()
 
 
+def read_image(image_id):
+    with open(f"resources/content/{image_id}.png", "rb") as image_file:
+        return image_file.read()
+
+
+def experiment_banner():
+    """
+    Return banner-DE with a "test" variant that shows banner-FR's image.
+    """
+    return BannerConfig(
+        id="banner-DE", title="Original", description="d", start_time="2024-12-01T00:00:00Z",
+        end_time="2024-12-31T23:59:59Z", locations=["DE"],
+        variants=[{"id": "control", "weight": 1}, {"id": "test", "weight": 1, "title": "New", "image": "banner-FR"}]
+    )
+
+
 def test_get_current_banner_with_image(mocker, service):
     """
     Test that GetCurrentBanner returns the banner with the correct image data.
@@ -55,3 +76,386 @@ def test_get_current_banner_image_not_found(mocker, service):
     assert response.description == "This is a default banner."
     assert response.image_format == "png"
     assert not response.image  # Default banner has no image
+    assert service.metrics.image_not_found.value("US") == 1
+    assert service.metrics.default_banner.value("US", "image_not_found") == 1
+
+
+def test_get_current_banner_served_from_response_cache(mocker, service):
+    """
+    Test that repeated requests reuse the serialized response until the minute parity flips.
+    """
+    mock_banners = load_configs(config_dir="resources/configs")
+    mocker.patch("banner_service.banners", mock_banners)
+
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, 12, 1, tzinfo=timezone.utc)
+
+    request = banner_service_pb2.GetCurrentBannerRequest(location="GB")
+    first = service.GetCurrentBanner(request, None)
+    second = service.GetCurrentBanner(request, None)
+
+    assert first is second
+    assert first.title == "Coming Soon: Spring Sale"
+    assert banner_service_pb2.GetCurrentBannerResponse.FromString(first.SerializeToString()).title == first.title
+
+    mock_datetime.now.return_value = datetime(2024, 12, 10, 12, 2, tzinfo=timezone.utc)
+    third = service.GetCurrentBanner(request, None)
+
+    assert third.title == "Big Winter Sale"
+
+
+def test_async_get_current_banner(mocker):
+    """
+    Test that the asyncio service returns the same banner, and serves repeats from the cache.
+    """
+    mock_banners = load_configs(config_dir="resources/configs")
+    mocker.patch("banner_service.banners", mock_banners)
+
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    service = AsyncBannerService()
+    request = banner_service_pb2.GetCurrentBannerRequest(location="FJ")
+
+    async def call_twice():
+        return await service.GetCurrentBanner(request, None), await service.GetCurrentBanner(request, None)
+
+    first, second = asyncio.run(call_twice())
+
+    assert first.title == "Some Sale"
+    assert first.image
+    assert second is first
+
+
+def test_get_banners_dedupes_banners(mocker, service):
+    """
+    Test that GetBanners resolves every location and sends each distinct banner once.
+    """
+    mock_banners = load_configs(config_dir="resources/configs")
+    mocker.patch("banner_service.banners", mock_banners)
+
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    request = banner_service_pb2.GetBannersRequest(locations=["US", "CA", "FJ", "INVALID", "XX", "US"])
+    response = service.GetBanners(request, None)
+
+    placements = {p.location: p.banner_id for p in response.placements}
+    assert placements == {"US": "banner-US", "CA": "banner-US", "FJ": "example", "INVALID": "default", "XX": "default"}
+    assert sorted(b.id for b in response.banners) == ["banner-US", "default", "example"]
+    banners_by_id = {b.id: b for b in response.banners}
+    assert banners_by_id["banner-US"].title == "Holiday Bonanza"
+    assert banners_by_id["banner-US"].image
+    assert not banners_by_id["default"].image
+
+
+def test_get_banners_identifies_variants_by_their_banner(mocker, service):
+    """
+    Test that a variant showing another banner's image is placed and included under its own
+    banner's id.
+    """
+    french = next(banner for banner in load_configs(config_dir="resources/configs") if banner.id == "banner-FR")
+    mocker.patch("banner_service.banners", [experiment_banner(), french])
+    now = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    responses = [service.get_banners(["DE", "FR"], now, f"user-{n}") for n in range(20)]
+    response = next(r for r in responses if r.placements[0].variant == "test")
+
+    assert [(p.location, p.banner_id, p.variant) for p in response.placements] == [
+        ("DE", "banner-DE", "test"), ("FR", "banner-FR", "")
+    ]
+    banners_by_id = {b.id: b for b in response.banners}
+    assert len(banners_by_id) == len(response.banners) == 2
+    assert (banners_by_id["banner-DE"].title, banners_by_id["banner-DE"].variant) == ("New", "test")
+    assert banners_by_id["banner-DE"].image == banners_by_id["banner-FR"].image == read_image("banner-FR")
+    assert banners_by_id["banner-FR"].title == french.title
+
+
+def test_get_current_banner_not_modified(mocker, service):
+    """
+    Test that a matching if_none_match returns the banner text with its ETag but without the image.
+    """
+    mock_banners = load_configs(config_dir="resources/configs")
+    mocker.patch("banner_service.banners", mock_banners)
+
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    full = service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="US"), None)
+    assert full.etag
+    assert not full.not_modified
+
+    request = banner_service_pb2.GetCurrentBannerRequest(location="US", if_none_match=full.etag)
+    response = service.GetCurrentBanner(request, None)
+
+    assert response.not_modified
+    assert response.etag == full.etag
+    assert response.title == "Holiday Bonanza"
+    assert not response.image
+    assert len(response.SerializeToString()) < len(full.SerializeToString())
+
+    stale = banner_service_pb2.GetCurrentBannerRequest(location="US", if_none_match="outdated")
+    assert service.GetCurrentBanner(stale, None).image
+
+
+def test_get_current_banner_by_reference(mocker, service):
+    """
+    Test that a by-reference response carries the image id and size, and GetBannerImage serves the bytes.
+    """
+    mock_banners = load_configs(config_dir="resources/configs")
+    mocker.patch("banner_service.banners", mock_banners)
+
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    request = banner_service_pb2.GetCurrentBannerRequest(location="US", image_by_reference=True)
+    response = service.GetCurrentBanner(request, None)
+
+    assert response.title == "Holiday Bonanza"
+    assert not response.image
+    assert response.etag
+    assert response.image_size > 0
+
+    image_request = banner_service_pb2.GetBannerImageRequest(image_id=response.etag)
+    chunks = list(service.GetBannerImage(image_request, None))
+
+    image = b"".join(chunk.data for chunk in chunks)
+    assert len(image) == response.image_size == chunks[0].total_size
+    assert image == service.images.get("banner-US")
+
+
+def test_get_current_banner_records_cache_metrics(mocker, service):
+    """
+    Test that cache hits and misses are counted per location, grouping unconfigured locations.
+    """
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    for location in ("US", "US", "nowhere"):
+        service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location=location), None)
+
+    cache = service.metrics.response_cache
+    assert (cache.value("US", "miss"), cache.value("US", "hit")) == (1, 1)
+    assert cache.value("other", "miss") == 1
+    assert service.metrics.selection_latency.count("US") == 1
+    assert service.metrics.default_banner.value("other", "no_match") == 1
+
+
+def test_get_current_banner_rotates_weighted_banners(mocker, service):
+    """
+    Test that matching weighted banners of the highest priority are rotated, each with its cached response.
+    """
+    def make_banner(id, priority, weight=None):
+        return BannerConfig(
+            id=id, title=id, description=id, start_time="2024-12-01T00:00:00Z", end_time="2024-12-31T23:59:59Z",
+            locations=["XX"], priority=priority, weight=weight
+        )
+
+    mocker.patch("banner_service.banners", [
+        make_banner("banner-DE", 1, weight=1),
+        make_banner("banner-FR", 1, weight=1),
+        make_banner("banner-US", 0),
+    ])
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    request = banner_service_pb2.GetCurrentBannerRequest(location="XX")
+    titles = [service.GetCurrentBanner(request, None).title for _ in range(200)]
+
+    assert set(titles) == {"banner-DE", "banner-FR"}
+    assert service.metrics.response_cache.value("XX", "miss") == 2
+    assert service.metrics.selection_latency.count("XX") == 1
+
+
+def test_get_current_banner_assigns_sticky_variant(mocker, service):
+    """
+    Test that a user id is always shown the same experiment variant, with the variant's title and image.
+    """
+    mocker.patch("banner_service.banners", [experiment_banner()])
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    def get(user_id):
+        return service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="DE", user_id=user_id), None)
+
+    responses = {user: get(user) for user in (f"user-{n}" for n in range(20))}
+
+    images = {"control": read_image("banner-DE"), "test": read_image("banner-FR")}
+
+    assert {response.variant for response in responses.values()} == {"control", "test"}
+    for user, response in responses.items():
+        assert get(user) is response
+        assert response.title == {"control": "Original", "test": "New"}[response.variant]
+        assert response.image == images[response.variant]
+
+
+def test_get_current_banner_sends_ready_rendition(mocker, service):
+    """
+    Test that the smaller recompressed rendition is sent once encoded, and can be fetched by its etag.
+    """
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+    request = banner_service_pb2.GetCurrentBannerRequest(location="FJ", accept_formats=["png"])
+
+    source = service.GetCurrentBanner(request, None)
+    service.renditions.wait()
+    optimized = service.GetCurrentBanner(request, None)
+
+    assert optimized.image_format == "png"
+    assert optimized.etag != source.etag
+    assert 0 < optimized.image_size < source.image_size
+    chunks = list(service.GetBannerImage(banner_service_pb2.GetBannerImageRequest(image_id=optimized.etag), None))
+    assert b"".join(chunk.data for chunk in chunks) == optimized.image
+
+
+def test_get_banners_sends_ready_renditions(mocker, service):
+    """
+    Test that GetBanners sends the same ready rendition of each image as GetCurrentBanner.
+    """
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+    request = banner_service_pb2.GetBannersRequest(locations=["FJ"], accept_formats=["png"])
+
+    source = service.GetBanners(request, None).banners[0]
+    service.renditions.wait()
+    optimized = service.GetBanners(request, None).banners[0]
+
+    current = service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="FJ", accept_formats=["png"]), None)
+    assert optimized.image == current.image
+    assert optimized.image_format == "png"
+    assert 0 < len(optimized.image) < len(source.image)
+
+
+def test_get_current_banner_compresses_only_text_heavy_responses(mocker):
+    """
+    Test that responses carrying PNG bytes are sent uncompressed, and text-only ones compressed.
+    """
+    service = BannerService(compression=CompressionPolicy("gzip", min_size=10))
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    context = mocker.Mock()
+    service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="FJ"), context)
+    context.set_compression.assert_not_called()
+
+    service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="FJ", image_by_reference=True), context)
+    context.set_compression.assert_called_once()
+
+
+def test_get_current_banner_sends_valid_for_hint(mocker, service):
+    """
+    Test that responses carry the time until the location's banner may change as trailing
+    metadata, from the schedule table or, without one, from the next special-condition flip.
+    """
+    mock_banners = load_configs(config_dir="resources/configs")
+    mocker.patch("banner_service.banners", mock_banners)
+    mock_datetime = mocker.patch("banner_service.datetime")
+    current_time = datetime(2024, 12, 10, 12, 0, 15, tzinfo=timezone.utc)
+    mock_datetime.now.return_value = current_time
+
+    def valid_for(context):
+        (metadata,), _ = context.set_trailing_metadata.call_args
+        return dict(metadata)[VALID_FOR_METADATA]
+
+    context = mocker.Mock()
+    service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="GB"), context)
+    assert valid_for(context) == "45000"  # The odd-minutes condition flips at 12:01
+
+    service.schedule.refresh(mock_banners, current_time)
+    service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="GB"), context)
+    assert valid_for(context) == "45000"
+    service.GetCurrentBanner(banner_service_pb2.GetCurrentBannerRequest(location="FJ"), context)
+    assert int(valid_for(context)) > 45000  # FJ has no special conditions
+
+    service.GetBanners(banner_service_pb2.GetBannersRequest(locations=["FJ", "GB"]), context)
+    assert valid_for(context) == "45000"
+
+
+def test_get_banner_image_serves_images_too_large_to_cache(mocker):
+    """
+    Test that an image referenced by a response can be fetched even if it is not kept in memory.
+    """
+    service = BannerService(image_store=ImageStore(max_bytes=1))
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    request = banner_service_pb2.GetCurrentBannerRequest(location="FJ", image_by_reference=True)
+    response = service.GetCurrentBanner(request, None)
+    chunks = list(service.GetBannerImage(banner_service_pb2.GetBannerImageRequest(image_id=response.etag), None))
+
+    assert len(b"".join(chunk.data for chunk in chunks)) == response.image_size > 1
+
+
+def test_watch_response_is_deterministic_and_not_recorded(mocker, service):
+    """
+    Test that streams are sent the first banner of a rotation in its first variant, without
+    recording requests in the metrics.
+    """
+    def make_banner(id, variants=None):
+        return BannerConfig(
+            id=id, title=id, description=id, start_time="2024-12-01T00:00:00Z", end_time="2024-12-31T23:59:59Z",
+            locations=["XX"], weight=1, variants=variants
+        )
+
+    mocker.patch("banner_service.banners", [
+        make_banner("banner-DE", [{"id": "control", "weight": 1}, {"id": "test", "weight": 1, "title": "New"}]),
+        make_banner("banner-FR"),
+    ])
+    now = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    responses = {id(service.watch_response("XX", now)) for _ in range(50)}
+    response = service.watch_response("XX", now)
+
+    assert responses == {id(response)}
+    assert (response.title, response.variant) == ("banner-DE", "control")
+    assert service.metrics.response_cache.value("XX", "miss") == 0
+    assert service.metrics.serialization_latency.count("XX") == 0
+    assert service.metrics.image_load_latency.count("XX") == 0
+
+
+def test_watch_banner_rejects_streams_over_the_limit(mocker):
+    """
+    Test that WatchBanner streams beyond `max_watch_streams` are rejected, and a closed stream
+    frees its slot.
+    """
+    class Aborted(Exception):
+        pass
+
+    context = mocker.Mock()
+    context.abort.side_effect = Aborted
+    service = BannerService(max_watch_streams=1)
+    request = banner_service_pb2.WatchBannerRequest(location="US")
+
+    first = service.WatchBanner(request, context)
+    assert next(first).title
+    with pytest.raises(Aborted):
+        next(service.WatchBanner(request, context))
+    context.abort.assert_called_once()
+    assert context.abort.call_args[0][0] == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+    first.close()
+    second = service.WatchBanner(request, context)
+    assert next(second).title
+    second.close()
+
+
+def test_response_with_image_too_large_to_cache_stays_cached(mocker):
+    """
+    Test that the response for an image kept out of memory is served from the response cache
+    until the image changes, instead of being rebuilt on every request.
+    """
+    service = BannerService(image_store=ImageStore(max_bytes=1))
+    mocker.patch("banner_service.banners", load_configs(config_dir="resources/configs"))
+    mock_datetime = mocker.patch("banner_service.datetime")
+    mock_datetime.now.return_value = datetime(2024, 12, 10, tzinfo=timezone.utc)
+
+    request = banner_service_pb2.GetCurrentBannerRequest(location="FJ")
+    responses = [service.GetCurrentBanner(request, None) for _ in range(3)]
+
+    assert responses[0] is responses[1] is responses[2]
+    assert service.metrics.response_cache.value("FJ", "hit") == 2
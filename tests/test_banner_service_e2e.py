@@ -46,3 +46,18 @@ def test_get_current_banner_invalid_location(grpc_stub):
     assert response.description == "This is a default banner.", "Default banner description should match"
     assert response.image_format == "png", "Image format should be 'png'"
     assert isinstance(response.image, bytes), "Image data should be in bytes"
+
+
+def test_watch_banner_sends_current_banner(grpc_stub):
+    """
+    Test the WatchBanner gRPC endpoint streams the current banner first.
+    """
+    request = banner_service_pb2.WatchBannerRequest(location="US")
+    stream = grpc_stub.WatchBanner(request)
+    try:
+        response = next(stream)
+    finally:
+        stream.cancel()
+
+    assert len(response.title) > 0, "Title should not be empty"
+    assert response.image_format == "png", "Image format should be 'png'"
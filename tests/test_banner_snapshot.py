@@ -0,0 +1,75 @@
+import pytest
+from banner_config import BannerConfig
+from banner_snapshot import SnapshotError, build_snapshot, dump_snapshot, load_snapshot, parse_snapshot
+
+pytestmark = pytest.mark.unit
+
+
+def make_banner(id, locations, special_condition=None, priority=0, weight=None, variants=None):
+    return BannerConfig(
+        id=id,
+        title=f"Title {id}",
+        description="Snapshot ünïcode",
+        start_time="2024-12-01T00:00:00Z",
+        end_time="2024-12-31T23:59:59.500000Z",
+        locations=locations,
+        special_condition=special_condition,
+        priority=priority,
+        weight=weight,
+        variants=variants
+    )
+
+
+def vars_of(variant):
+    return variant.id, variant.title, variant.description, variant.image_id, variant.weight
+
+
+def test_snapshot_round_trip():
+    """
+    Test that all fields and the banner order survive a dump/parse round trip.
+    """
+    variants = [{"id": "control", "weight": 2}, {"id": "test", "weight": 1, "title": "Test", "image": "b-test"}]
+    banners = [
+        make_banner("b", ["US", "CA"], "odd-minutes", priority=-3, weight=7, variants=variants),
+        make_banner("a", ["US"]),
+    ]
+
+    loaded = parse_snapshot(dump_snapshot(banners))
+
+    assert [banner.id for banner in loaded] == ["b", "a"]
+    for original, copy in zip(banners, loaded):
+        assert copy.title == original.title
+        assert copy.description == original.description
+        assert copy.start_us == original.start_us
+        assert copy.end_us == original.end_us
+        assert copy.locations == original.locations
+        assert copy.special_condition == original.special_condition
+        assert copy.condition is original.condition
+        assert (copy.priority, copy.weight) == (original.priority, original.weight)
+        assert [vars_of(variant) for variant in copy.variants] == [vars_of(variant) for variant in original.variants]
+        assert copy.variant_weights == original.variant_weights
+
+
+def test_build_and_load_snapshot_file(tmp_path):
+    """
+    Test that the build step compiles the config directory and the file loads back.
+    """
+    snapshot_path = tmp_path / "banners.snap"
+
+    count = build_snapshot("resources/configs", str(snapshot_path))
+    banners = load_snapshot(str(snapshot_path))
+
+    assert count == len(banners) > 0
+    assert any(banner.id == "example" for banner in banners)
+
+
+@pytest.mark.parametrize("contents", [b"", b"not a snapshot at all", dump_snapshot([make_banner("a", ["US"])])[:-3]])
+def test_invalid_snapshot_is_rejected(tmp_path, contents):
+    """
+    Test that empty, foreign and truncated files raise SnapshotError.
+    """
+    snapshot_path = tmp_path / "banners.snap"
+    snapshot_path.write_bytes(contents)
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(str(snapshot_path))
@@ -0,0 +1,134 @@
+import gc
+import os
+import signal
+import threading
+import time
+
+import pytest
+from banner_supervisor import Supervisor
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def restore_signals():
+    """
+    Restores the test process's signal handlers, which the supervisor replaces.
+    """
+    handlers = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP)}
+    yield
+    for signum, handler in handlers.items():
+        signal.signal(signum, handler)
+    gc.unfreeze()
+
+
+def started(log_dir):
+    """
+    Return the (slot, pid) of every worker started so far, from the files the workers write.
+    """
+    return sorted(
+        (int(name.split("-")[0]), int(name.split("-")[1])) for name in os.listdir(log_dir)
+    )
+
+
+def worker(log_dir, crash_slot=None):
+    """
+    Return a worker target that records its start, then serves until terminated. The first
+    worker in `crash_slot` crashes instead.
+    """
+    def target(slot):
+        first = not any(entry[0] == slot for entry in started(log_dir))
+        open(os.path.join(log_dir, f"{slot}-{os.getpid()}"), "w").close()
+        if slot == crash_slot and first:
+            raise RuntimeError("crash")
+        time.sleep(30)
+    return target
+
+
+def signal_when(condition, *signums):
+    """
+    Send each signal to the test process once the condition holds for the signals sent so far.
+    """
+    def run():
+        for number, signum in enumerate(signums):
+            deadline = time.monotonic() + 10
+            while not condition(number) and time.monotonic() < deadline:
+                time.sleep(0.02)
+            os.kill(os.getpid(), signum)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def assert_reaped(pids):
+    for pid in pids:
+        with pytest.raises(ChildProcessError):
+            os.waitpid(pid, os.WNOHANG)
+
+
+def test_respawns_crashed_worker_from_prepared_state(tmp_path):
+    """
+    Test that a crashed worker is replaced after `prepare` ran, and stopping ends all workers.
+    """
+    prepared = []
+    supervisor = Supervisor(
+        2, worker(str(tmp_path), crash_slot=0), restart_delay=0, poll_interval=0.02,
+        prepare=lambda: prepared.append(True)
+    )
+    sender = signal_when(lambda _: len(started(tmp_path)) == 3, signal.SIGTERM)
+    supervisor.run()
+    sender.join()
+
+    slots = [slot for slot, _ in started(tmp_path)]
+    assert sorted(slots) == [0, 0, 1]
+    assert prepared == [True]
+    assert supervisor._children == {}
+    assert_reaped(pid for _, pid in started(tmp_path))
+
+
+def test_rolling_restart_replaces_every_worker(tmp_path):
+    """
+    Test that SIGHUP prepares once and replaces each worker, then SIGTERM stops the new ones.
+    """
+    prepared = []
+    supervisor = Supervisor(2, worker(str(tmp_path)), poll_interval=0.02, prepare=lambda: prepared.append(True))
+    sender = signal_when(
+        lambda number: len(started(tmp_path)) == 2 * (number + 1), signal.SIGHUP, signal.SIGTERM
+    )
+    supervisor.run()
+    sender.join()
+
+    assert sorted(slot for slot, _ in started(tmp_path)) == [0, 0, 1, 1]
+    assert prepared == [True]
+    assert supervisor._children == {}
+    assert_reaped(pid for _, pid in started(tmp_path))
+
+
+def test_failing_prepare_still_starts_workers(tmp_path):
+    """
+    Test that an error in `prepare` is logged and the worker started with the previous state.
+    """
+    def prepare():
+        raise OSError("configs unavailable")
+
+    supervisor = Supervisor(1, worker(str(tmp_path), crash_slot=0), restart_delay=0, poll_interval=0.02, prepare=prepare)
+    sender = signal_when(lambda _: len(started(tmp_path)) == 2, signal.SIGTERM)
+    supervisor.run()
+    sender.join()
+
+    assert [slot for slot, _ in started(tmp_path)] == [0, 0]
+
+
+def test_stop_during_restart_delay_starts_no_worker(tmp_path):
+    """
+    Test that a worker that crashes is not replaced once a stop arrives during the restart delay.
+    """
+    supervisor = Supervisor(1, worker(str(tmp_path), crash_slot=0), restart_delay=0.5, poll_interval=0.02)
+    sender = signal_when(lambda _: len(started(tmp_path)) == 1, signal.SIGTERM)
+    started_at = time.monotonic()
+    supervisor.run()
+    sender.join()
+
+    assert [slot for slot, _ in started(tmp_path)] == [0]
+    assert supervisor._children == {}
+    assert time.monotonic() - started_at < 5
@@ -0,0 +1,75 @@
+import pytest
+from datetime import datetime, timezone
+from banner_config import BannerConfig
+from banner_timeline import BannerTimeline
+
+pytestmark = pytest.mark.unit
+
+
+def make_banner(id, start_time, end_time, locations=("US",)):
+    return BannerConfig(
+        id=id,
+        title=id,
+        description=id,
+        start_time=start_time,
+        end_time=end_time,
+        locations=list(locations)
+    )
+
+
+@pytest.fixture
+def timeline():
+    """
+    Provides a timeline over an expired, a current and two overlapping future banners.
+    """
+    return BannerTimeline([
+        make_banner("expired", "2024-01-01T00:00:00Z", "2024-01-31T23:59:59Z"),
+        make_banner("current", "2024-12-01T00:00:00Z", "2024-12-31T23:59:59Z"),
+        make_banner("future", "2025-01-01T00:00:00Z", "2025-01-31T23:59:59Z"),
+        make_banner("future-global", "2025-01-15T00:00:00Z", "2025-02-15T00:00:00Z", locations=("ALL",)),
+    ])
+
+
+def test_segment_contains_only_active_banners(timeline):
+    """
+    Test that a segment only holds the banners active at the looked-up time.
+    """
+    segment = timeline.segment_at(datetime(2024, 12, 10, tzinfo=timezone.utc))
+
+    assert [b.id for b in segment.banners] == ["current"]
+    assert segment.valid_from == datetime(2024, 12, 1, tzinfo=timezone.utc)
+    assert segment.contains(datetime(2024, 12, 31, 23, 59, 59, tzinfo=timezone.utc))
+    assert not segment.contains(datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+
+def test_overlapping_banners_share_a_segment(timeline):
+    """
+    Test that overlapping activation windows are both active and indexed by location.
+    """
+    segment = timeline.segment_at(datetime(2025, 1, 20, tzinfo=timezone.utc))
+
+    assert [b.id for b in segment.index.candidates("US")] == ["future", "future-global"]
+    assert [b.id for b in segment.index.candidates("FR")] == ["future-global"]
+
+
+def test_end_time_is_inclusive(timeline):
+    """
+    Test that a banner is still active at its exact end time and inactive right after it.
+    """
+    at_end = timeline.segment_at(datetime(2024, 1, 31, 23, 59, 59, tzinfo=timezone.utc))
+    after_end = timeline.segment_at(datetime(2024, 1, 31, 23, 59, 59, 1, tzinfo=timezone.utc))
+
+    assert [b.id for b in at_end.banners] == ["expired"]
+    assert after_end.banners == ()
+    assert timeline.next_change(datetime(2025, 3, 1, tzinfo=timezone.utc)) is None
+
+
+def test_open_ended_banner_never_ends():
+    """
+    Test that a banner ending at datetime.max stays active to the end of time.
+    """
+    timeline = BannerTimeline([make_banner("forever", "2024-12-01T00:00:00Z", "9999-12-31T23:59:59.999999Z")])
+    segment = timeline.segment_at(datetime(9999, 12, 31, 23, 59, 59, 999999, tzinfo=timezone.utc))
+
+    assert [b.id for b in segment.banners] == ["forever"]
+    assert timeline.next_change(datetime(2024, 12, 10, tzinfo=timezone.utc)) is None
@@ -0,0 +1,73 @@
+import threading
+import pytest
+from datetime import timedelta
+from banner_responses import CachedResponse
+from banner_watch import BannerScheduler
+from generated import banner_service_pb2
+
+pytestmark = pytest.mark.unit
+
+
+class FakeService:
+    """
+    Resolves every location to the current title, and reports changes far in the future.
+    """
+
+    def __init__(self, title):
+        self.title = title
+        self.resolved = []
+
+    def watch_response(self, location, current_time):
+        self.resolved.append(location)
+        return CachedResponse(banner_service_pb2.GetCurrentBannerResponse(title=self.title))
+
+    def next_change(self, current_time):
+        return current_time + timedelta(hours=1)
+
+
+def wait_for(subscription, event):
+    assert event.wait(timeout=5), "no response delivered"
+    event.clear()
+    return subscription.take()
+
+
+def test_subscriber_receives_current_banner_and_changes():
+    """
+    Test that a subscriber gets the current banner, then only changed banners after a notify.
+    """
+    service = FakeService("First")
+    scheduler = BannerScheduler(service)
+    event = threading.Event()
+    try:
+        subscription = scheduler.subscribe("US", event.set)
+        assert wait_for(subscription, event).title == "First"
+
+        scheduler.notify()  # Nothing changed, so nothing is delivered
+        service.title = "Second"
+        scheduler.notify()
+        assert wait_for(subscription, event).title == "Second"
+    finally:
+        scheduler.stop()
+
+
+def test_locations_are_resolved_once_for_all_subscribers():
+    """
+    Test that a change is resolved once per location and fanned out to every subscriber.
+    """
+    service = FakeService("First")
+    scheduler = BannerScheduler(service)
+    first, second = threading.Event(), threading.Event()
+    try:
+        first_subscription = scheduler.subscribe("US", first.set)
+        wait_for(first_subscription, first)
+        second_subscription = scheduler.subscribe("US", second.set)
+        assert wait_for(second_subscription, second).title == "First"
+
+        service.resolved.clear()
+        service.title = "Second"
+        scheduler.notify()
+        assert wait_for(first_subscription, first).title == "Second"
+        assert wait_for(second_subscription, second).title == "Second"
+        assert set(service.resolved) == {"US"}
+    finally:
+        scheduler.stop()